@@ -0,0 +1,37 @@
+"""create revoked token table
+
+Revision ID: 8c2f4e1a9d37
+Revises: 31644831b386
+Create Date: 2026-10-19 09:12:44.103215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2f4e1a9d37'
+down_revision: Union[str, Sequence[str], None] = '31644831b386'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('revoked_token_db',
+    sa.Column('jti', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user_db.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_revoked_token_db_expires_at'), 'revoked_token_db', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_revoked_token_db_expires_at'), table_name='revoked_token_db')
+    op.drop_table('revoked_token_db')
@@ -0,0 +1,40 @@
+"""create idempotency key table
+
+Revision ID: a7d3e9f1c254
+Revises: f2c8a51e0b94
+Create Date: 2026-10-19 16:05:12.448190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9f1c254'
+down_revision: Union[str, Sequence[str], None] = 'f2c8a51e0b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_key_db',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user_db.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'key')
+    )
+    op.create_index(op.f('ix_idempotency_key_db_expires_at'), 'idempotency_key_db', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotency_key_db_expires_at'), table_name='idempotency_key_db')
+    op.drop_table('idempotency_key_db')
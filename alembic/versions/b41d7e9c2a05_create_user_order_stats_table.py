@@ -0,0 +1,49 @@
+"""create user order stats table
+
+Revision ID: b41d7e9c2a05
+Revises: 8c2f4e1a9d37
+Create Date: 2026-10-19 11:03:27.518940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d7e9c2a05'
+down_revision: Union[str, Sequence[str], None] = '8c2f4e1a9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_order_stats_db',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('delivered_count', sa.Integer(), nullable=False),
+    sa.Column('canceled_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user_db.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""
+        INSERT INTO user_order_stats_db (user_id, orders_count, delivered_count, canceled_count, total_spent, last_order_at)
+        SELECT user_id,
+               count(*),
+               count(*) FILTER (WHERE status = 'DELIVERED'),
+               count(*) FILTER (WHERE status = 'CANCELED'),
+               coalesce(sum(total) FILTER (WHERE status <> 'CANCELED'), 0),
+               max(created_at)
+        FROM order_db
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_order_stats_db')
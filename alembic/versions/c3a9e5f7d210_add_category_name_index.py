@@ -0,0 +1,35 @@
+"""add category name index
+
+Revision ID: c3a9e5f7d210
+Revises: b8f1d4c6e2a7
+Create Date: 2026-10-19 21:04:37.582914
+
+Index for the keyset pagination of GET /category/all, ordered by
+(name, id). On Postgres the name is indexed with COLLATE "C" so the
+same index serves the ORDER BY and the LIKE 'prefix%' filter, which
+cannot use an index built with a linguistic collation.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e5f7d210'
+down_revision: Union[str, Sequence[str], None] = 'b8f1d4c6e2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index('ix_category_db_name_id', 'category_db', [sa.text('name COLLATE "C"'), 'id'], unique=False)
+    else:
+        op.create_index('ix_category_db_name_id', 'category_db', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_category_db_name_id', table_name='category_db')
@@ -0,0 +1,28 @@
+"""add order version
+
+Revision ID: c5e81b2d7f46
+Revises: a7d3e9f1c254
+Create Date: 2026-10-19 17:02:31.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e81b2d7f46'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e9f1c254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_db', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_db', 'version')
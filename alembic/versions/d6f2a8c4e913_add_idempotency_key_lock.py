@@ -0,0 +1,31 @@
+"""add idempotency key lock
+
+Revision ID: d6f2a8c4e913
+Revises: c3a9e5f7d210
+Create Date: 2026-10-19 23:18:52.104637
+
+locked_until is the in-flight lease of an Idempotency-Key: once it passes
+without a stored response, a retry can take the key over. Rows created
+before this column existed keep NULL and stay in flight until they expire.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f2a8c4e913'
+down_revision: Union[str, Sequence[str], None] = 'c3a9e5f7d210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('idempotency_key_db', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_key_db', 'locked_until')
@@ -0,0 +1,51 @@
+"""create sales rollup tables
+
+Revision ID: d93a0f6b7c18
+Revises: b41d7e9c2a05
+Create Date: 2026-10-19 13:41:09.277603
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93a0f6b7c18'
+down_revision: Union[str, Sequence[str], None] = 'b41d7e9c2a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_rollup_db',
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'product_id')
+    )
+    op.create_index('ix_sales_rollup_db_granularity_bucket', 'sales_rollup_db', ['granularity', 'bucket_start'], unique=False)
+    op.create_index('ix_sales_rollup_db_granularity_category_bucket', 'sales_rollup_db', ['granularity', 'category_id', 'bucket_start'], unique=False)
+    op.create_table('rollup_watermark_db',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(op.f('ix_order_db_created_at'), 'order_db', ['created_at'], unique=False)
+    op.create_index(op.f('ix_order_db_updated_at'), 'order_db', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_db_updated_at'), table_name='order_db')
+    op.drop_index(op.f('ix_order_db_created_at'), table_name='order_db')
+    op.drop_table('rollup_watermark_db')
+    op.drop_index('ix_sales_rollup_db_granularity_category_bucket', table_name='sales_rollup_db')
+    op.drop_index('ix_sales_rollup_db_granularity_bucket', table_name='sales_rollup_db')
+    op.drop_table('sales_rollup_db')
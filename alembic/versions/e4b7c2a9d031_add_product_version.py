@@ -0,0 +1,28 @@
+"""add product version
+
+Revision ID: e4b7c2a9d031
+Revises: c5e81b2d7f46
+Create Date: 2026-10-19 19:12:08.417352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c2a9d031'
+down_revision: Union[str, Sequence[str], None] = 'c5e81b2d7f46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('product_db', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('product_db', 'version')
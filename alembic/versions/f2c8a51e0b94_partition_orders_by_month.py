@@ -0,0 +1,129 @@
+"""partition orders by month
+
+Revision ID: f2c8a51e0b94
+Revises: d93a0f6b7c18
+Create Date: 2026-10-19 15:58:12.640117
+
+Converts order_db and order_item_db into tables partitioned by RANGE
+(created_at), one partition per month plus a DEFAULT partition.
+order_item_db receives created_at (copied from its order) so both tables
+share the partition key; the primary keys become (id, created_at) and the
+item -> order foreign key becomes (order_id, created_at). Only Postgres is
+converted; on other dialects only the new column is added.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.partitions import add_months, create_month_partitions, month_start
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a51e0b94'
+down_revision: Union[str, Sequence[str], None] = 'd93a0f6b7c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.add_column('order_item_db', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_index('ix_order_item_db_order_id_created_at', 'order_item_db', ['order_id', 'created_at'], unique=False)
+        return
+
+    op.execute("ALTER TABLE order_item_db ADD COLUMN created_at timestamptz")
+    op.execute("UPDATE order_item_db i SET created_at = o.created_at FROM order_db o WHERE o.id = i.order_id")
+
+    op.execute("ALTER TABLE order_item_db RENAME TO order_item_db_legacy")
+    op.execute("ALTER TABLE order_db RENAME TO order_db_legacy")
+    op.execute("ALTER INDEX ix_order_db_created_at RENAME TO ix_order_db_legacy_created_at")
+    op.execute("ALTER INDEX ix_order_db_updated_at RENAME TO ix_order_db_legacy_updated_at")
+
+    op.execute("""
+        CREATE TABLE order_db (
+            id uuid NOT NULL,
+            user_id uuid NOT NULL REFERENCES user_db (id),
+            total double precision NOT NULL,
+            status status NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE TABLE order_item_db (
+            id uuid NOT NULL,
+            order_id uuid NOT NULL,
+            produtc_id uuid NOT NULL REFERENCES product_db (id),
+            quantity integer NOT NULL,
+            price double precision NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (order_id, created_at) REFERENCES order_db (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_order_db_created_at ON order_db (created_at)")
+    op.execute("CREATE INDEX ix_order_db_updated_at ON order_db (updated_at)")
+    op.execute("CREATE INDEX ix_order_db_user_id_created_at ON order_db (user_id, created_at)")
+    op.execute("CREATE INDEX ix_order_item_db_order_id_created_at ON order_item_db (order_id, created_at)")
+
+    first = bind.execute(sa.text("SELECT min(created_at) FROM order_db_legacy")).scalar()
+    current = month_start(bind.execute(sa.text("SELECT now()")).scalar().date())
+    month = month_start(first.date()) if first else current
+    while month <= add_months(current, MONTHS_AHEAD):
+        create_month_partitions(bind, month)
+        month = add_months(month, 1)
+    op.execute("CREATE TABLE order_db_default PARTITION OF order_db DEFAULT")
+    op.execute("CREATE TABLE order_item_db_default PARTITION OF order_item_db DEFAULT")
+
+    op.execute("INSERT INTO order_db (id, user_id, total, status, created_at, updated_at) "
+               "SELECT id, user_id, total, status, created_at, updated_at FROM order_db_legacy")
+    op.execute("INSERT INTO order_item_db (id, order_id, produtc_id, quantity, price, created_at) "
+               "SELECT id, order_id, produtc_id, quantity, price, created_at FROM order_item_db_legacy")
+    op.execute("DROP TABLE order_item_db_legacy")
+    op.execute("DROP TABLE order_db_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index('ix_order_item_db_order_id_created_at', table_name='order_item_db')
+        op.drop_column('order_item_db', 'created_at')
+        return
+
+    op.execute("ALTER TABLE order_item_db RENAME TO order_item_db_partitioned")
+    op.execute("ALTER TABLE order_db RENAME TO order_db_partitioned")
+    op.execute("ALTER INDEX ix_order_db_created_at RENAME TO ix_order_db_partitioned_created_at")
+    op.execute("ALTER INDEX ix_order_db_updated_at RENAME TO ix_order_db_partitioned_updated_at")
+    op.execute("ALTER INDEX ix_order_item_db_order_id_created_at RENAME TO ix_order_item_db_partitioned_order_id_created_at")
+    op.execute("""
+        CREATE TABLE order_db (
+            id uuid NOT NULL PRIMARY KEY,
+            user_id uuid NOT NULL REFERENCES user_db (id),
+            total double precision NOT NULL,
+            status status NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE order_item_db (
+            id uuid NOT NULL PRIMARY KEY,
+            order_id uuid NOT NULL REFERENCES order_db (id),
+            produtc_id uuid NOT NULL REFERENCES product_db (id),
+            quantity integer NOT NULL,
+            price double precision NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX ix_order_db_created_at ON order_db (created_at)")
+    op.execute("CREATE INDEX ix_order_db_updated_at ON order_db (updated_at)")
+    op.execute("INSERT INTO order_db SELECT id, user_id, total, status, created_at, updated_at FROM order_db_partitioned")
+    op.execute("INSERT INTO order_item_db SELECT id, order_id, produtc_id, quantity, price FROM order_item_db_partitioned")
+    op.execute("DROP TABLE order_item_db_partitioned")
+    op.execute("DROP TABLE order_db_partitioned")
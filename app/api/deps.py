@@ -1,10 +1,10 @@
 from sqlalchemy.orm import Session, sessionmaker
-from app.models.base import db
+from app.models.base import db, replica_router
+from app.core.replicas import pinned_to_primary
 from app.models.user import User
-from fastapi import Depends, HTTPException
-from jose import jwt, JWTError
-from app.core.vars import SECRET_KEY, ALGORITHM
+from fastapi import Depends, HTTPException, Request
 from app.core.security import oauth2_schema
+from app.services.auth_service import AuthService
 from uuid import UUID
 
 def get_session():
@@ -15,13 +15,31 @@ def get_session():
     finally:
         session.close()
 
+def get_read_session(request: Request):
+    """Sessão para rotas GET que só leem: usa uma réplica saudável quando houver.
+
+    Clientes que escreveram há menos de READ_YOUR_WRITES_SECONDS continuam no primário.
+    O vínculo vem só do cookie PRIMARY_PIN_COOKIE: clientes que não guardam cookies
+    (ex.: integrações só com o token Bearer) não têm read-your-writes.
+    """
+    engine = None if pinned_to_primary(request.cookies) else replica_router.pick()
+    session = sessionmaker(bind=engine or db)()
+    session.info["replica"] = engine is not None
+    try:
+        yield session
+    finally:
+        session.close()
+
 def verify_token(token: str = Depends(oauth2_schema), session: Session = Depends(get_session)):
+    dic_info = AuthService.decode_token(token)
     try:
-        dic_info = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         id = UUID(dic_info.get("sub"))
-    except JWTError:
+    except (TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Acesso negado")
-    
+
+    if AuthService.is_token_revoked(dic_info, session):
+        raise HTTPException(status_code=401, detail="Token revogado")
+
     user = session.query(User).filter(User.id==id).first()
     if not user:
         raise HTTPException(status_code=401, detail="Acesso inválido")
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import datetime
+from app.api.deps import get_session, verify_token
+from app.services.analytics_service import AnalyticsService
+from app.schemas.analytics_schemas import RevenueBucketSchema, ProductRevenueSchema, CategoryRevenueSchema
+from app.models.user import User
+
+analytics_router = APIRouter(prefix="/admin/analytics", tags=["Analytics"])
+
+@analytics_router.get("/revenue", response_model=list[RevenueBucketSchema])
+async def revenue_over_time(start: datetime | None = None,
+                            end: datetime | None = None,
+                            granularity: str = "day",
+                            session: Session = Depends(get_session),
+                            user: User = Depends(verify_token)):
+    return AnalyticsService.revenue_over_time(start, end, granularity, session, user)
+
+@analytics_router.get("/revenue/products", response_model=list[ProductRevenueSchema])
+async def revenue_by_product(start: datetime | None = None,
+                             end: datetime | None = None,
+                             limit: int = Query(50, ge=1, le=500),
+                             session: Session = Depends(get_session),
+                             user: User = Depends(verify_token)):
+    return AnalyticsService.revenue_by_product(start, end, limit, session, user)
+
+@analytics_router.get("/revenue/categories", response_model=list[CategoryRevenueSchema])
+async def revenue_by_category(start: datetime | None = None,
+                              end: datetime | None = None,
+                              session: Session = Depends(get_session),
+                              user: User = Depends(verify_token)):
+    return AnalyticsService.revenue_by_category(start, end, session, user)
\ No newline at end of file
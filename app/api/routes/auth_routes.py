@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.api.deps import get_session, verify_token
 from app.services.auth_service import AuthService
-from app.schemas.auth_schemas import RegisterSchema, LoginSchema
+from app.schemas.auth_schemas import RegisterSchema, LoginSchema, LogoutSchema
 from app.schemas.user_schemas import UserResponseSchema
 from app.models.user import User
+from app.core.security import oauth2_schema
 from fastapi.security import OAuth2PasswordRequestForm
 
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -21,6 +22,13 @@ async def login(body: LoginSchema, session: Session = Depends(get_session)):
 async def refresh_token(user: User = Depends(verify_token)):
     return AuthService.refresh_token(user)
 
+@auth_router.post("/logout")
+async def logout(body: LogoutSchema | None = None,
+                 token: str = Depends(oauth2_schema),
+                 session: Session = Depends(get_session),
+                 user: User = Depends(verify_token)):
+    return AuthService.logout(token, body, session, user)
+
 @auth_router.post("/login-docs")
 async def login_docs(body: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
     return AuthService.login_docs(body, session)
\ No newline at end of file
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, UploadFile, status
+from fastapi import APIRouter, Depends, UploadFile, status, Query, Response
 from sqlalchemy.orm import Session
-from app.api.deps import get_session, verify_token
-from app.schemas.category_schemas import UpdateCategoryNameAndSlugSchema, CategoryResponseSchema
+from app.api.deps import get_session, get_read_session, verify_token
+from app.schemas.category_schemas import CreateCategorySchema, UpdateCategoryNameAndSlugSchema, CategoryResponseSchema
+from app.schemas.upload_schemas import UploadedImageSchema
 from app.services.category_service import CategoryService
 from app.models.user import User
+from app.core.vars import CATEGORY_PAGE_SIZE, CATEGORY_PAGE_MAX_SIZE
 
 category_router = APIRouter(prefix="/category", tags=["Category"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 @category_router.get("/all", response_model=list[CategoryResponseSchema])
-async def get_all_categories(session: Session = Depends(get_session)):
-    return CategoryService.get_all_categories(session)
+async def get_all_categories(response: Response,
+                             limit: int = Query(CATEGORY_PAGE_SIZE, ge=1, le=CATEGORY_PAGE_MAX_SIZE),
+                             cursor: str | None = None,
+                             prefix: str | None = None,
+                             session: Session = Depends(get_read_session)):
+    categories, next_cursor = CategoryService.get_all_categories(session, limit, cursor, prefix)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return categories
 
 @category_router.post("", response_model=CategoryResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_category(name: str, 
@@ -19,9 +30,15 @@ async def create_category(name: str,
                           user: User = Depends(verify_token)):
     return CategoryService.create_category(name, slug, image, session, user)
 
+@category_router.post("/uploaded", response_model=CategoryResponseSchema, status_code=status.HTTP_201_CREATED)
+async def create_category_from_upload(body: CreateCategorySchema,
+                                      session: Session = Depends(get_session),
+                                      user: User = Depends(verify_token)):
+    return CategoryService.create_category_from_upload(body, session, user)
+
 @category_router.get("/{slug}", response_model=CategoryResponseSchema)
 async def get_category(slug: str, 
-                       session: Session = Depends(get_session)):
+                       session: Session = Depends(get_read_session)):
     return CategoryService.get_category(slug, session)
 
 @category_router.put("/{slug}", response_model=CategoryResponseSchema)
@@ -38,6 +55,13 @@ async def update_category_image(slug: str,
                                 user: User = Depends(verify_token)):
     return CategoryService.update_category_image(slug, image, session, user)
 
+@category_router.patch("/{slug}/image", response_model=CategoryResponseSchema)
+async def set_category_image(slug: str,
+                             body: UploadedImageSchema,
+                             session: Session = Depends(get_session),
+                             user: User = Depends(verify_token)):
+    return CategoryService.set_category_image(slug, body, session, user)
+
 @category_router.delete("/{slug}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(slug: str, session: Session = Depends(get_session), user: User = Depends(verify_token)):
     return CategoryService.delete_category(slug, session, user)
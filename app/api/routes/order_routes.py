@@ -1,39 +1,111 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 from uuid import UUID
-from app.api.deps import get_session, verify_token
+from datetime import datetime
+from app.api.deps import get_session, get_read_session, verify_token
 from sqlalchemy.orm import Session
 from app.services.order_service import OrderService
-from app.schemas.order_schemas import CreateOrderSchema, OrderResponseSchema
+from app.services.user_order_stats_service import UserOrderStatsService
+from app.services.order_archive_service import OrderArchiveService
+from app.services.idempotency_service import IdempotencyService
+from app.schemas.order_schemas import (
+    CreateOrderSchema, QuoteOrderSchema, OrderQuoteSchema, OrderResponseSchema, UserOrderStatsSchema, BulkOrderStatusSchema, BulkOrderStatusResultSchema
+)
+from app.core.fieldsets import render
+from app.core.etags import format_etag
 from app.models.user import User
+from app.enums.order_status import OrderStatus
 
 order_router = APIRouter(prefix="/order", tags=["Orders"])
 
 @order_router.post("", response_model=OrderResponseSchema)
 async def create_order(body: CreateOrderSchema, 
+                       idempotency_key: str | None = Header(default=None),
                        session: Session = Depends(get_session),
                        user: User = Depends(verify_token)):
-    return OrderService.create_order(body, session, user)
+    if idempotency_key is None:
+        return OrderService.create_order(body, session, user)
+    return await IdempotencyService.execute(
+        idempotency_key,
+        IdempotencyService.fingerprint("POST", "/order", body.model_dump(mode="json")),
+        session,
+        user,
+        lambda: OrderResponseSchema.model_validate(OrderService.create_order(body, session, user, commit=False), from_attributes=True).model_dump(mode="json"),
+    )
+
+@order_router.post("/quote", response_model=OrderQuoteSchema)
+async def quote_order(body: QuoteOrderSchema,
+                      session: Session = Depends(get_read_session),
+                      user: User = Depends(verify_token)):
+    return OrderService.quote_order(body, session, user)
+
+@order_router.patch("/bulk/cancel", response_model=BulkOrderStatusResultSchema)
+async def bulk_cancel_orders(body: BulkOrderStatusSchema,
+                             session: Session = Depends(get_session),
+                             user: User = Depends(verify_token)):
+    return OrderService.bulk_transition(OrderStatus.CANCELED, body, session, user)
+
+@order_router.patch("/bulk/delivered", response_model=BulkOrderStatusResultSchema)
+async def bulk_delivery_orders(body: BulkOrderStatusSchema,
+                               session: Session = Depends(get_session),
+                               user: User = Depends(verify_token)):
+    return OrderService.bulk_transition(OrderStatus.DELIVERED, body, session, user)
 
 @order_router.get("/{id}", response_model=OrderResponseSchema)
 async def get_order_by_id(id: UUID, 
-                          session: Session = Depends(get_session),
+                          response: Response,
+                          fields: str | None = None,
+                          session: Session = Depends(get_read_session),
                           user: User = Depends(verify_token)):
-    return OrderService.get_order_by_id(id, session, user)
+    order = OrderService.get_order_by_id(id, session, user, fields)
+    headers = {"ETag": format_etag(order.version)}
+    if fields:
+        return Response(render(OrderResponseSchema, OrderService.fieldset(fields), order), media_type="application/json",
+                        headers=headers)
+    response.headers.update(headers)
+    return order
 
 @order_router.get("/user/{id}", response_model=list[OrderResponseSchema])
 async def get_user_orders(id: UUID, 
-                          session: Session = Depends(get_session),
+                          since: datetime | None = None,
+                          until: datetime | None = None,
+                          include_archived: bool = False,
+                          fields: str | None = None,
+                          session: Session = Depends(get_read_session),
                           user: User = Depends(verify_token)):
-    return OrderService.list_user_orders(id, session, user)
+    orders = OrderService.list_user_orders(id, session, user, since, until, include_archived, fields)
+    if fields:
+        return Response(render(OrderResponseSchema, OrderService.fieldset(fields), orders, many=True),
+                        media_type="application/json")
+    return orders
+
+@order_router.get("/user/{id}/stats", response_model=UserOrderStatsSchema)
+async def get_user_order_stats(id: UUID,
+                               session: Session = Depends(get_read_session),
+                               user: User = Depends(verify_token)):
+    return UserOrderStatsService.get_user_stats(id, session, user)
 
 @order_router.patch("/{id}/cancel", response_model=OrderResponseSchema)
 async def cancel_order(id: UUID, 
+                       response: Response,
+                       if_match: str | None = Header(default=None),
                        session: Session = Depends(get_session),
                        user: User = Depends(verify_token)):
-    return OrderService.cancel_order(id, session, user)
+    order = OrderService.cancel_order(id, session, user, OrderService.expected_version(if_match))
+    response.headers["ETag"] = format_etag(order.version)
+    return order
 
 @order_router.patch("/{id}/delivered", response_model=OrderResponseSchema)
 async def delivery_order(id: UUID, 
+                         response: Response,
+                         if_match: str | None = Header(default=None),
                          session: Session = Depends(get_session),
                          user: User = Depends(verify_token)):
-    return OrderService.delivered_order(id, session, user)
\ No newline at end of file
+    order = OrderService.delivered_order(id, session, user, OrderService.expected_version(if_match))
+    response.headers["ETag"] = format_etag(order.version)
+    return order
+
+@order_router.post("/{id}/restore", response_model=OrderResponseSchema)
+async def restore_order(id: UUID,
+                        session: Session = Depends(get_session),
+                        user: User = Depends(verify_token)):
+    return OrderArchiveService.restore_order(id, session, user)
\ No newline at end of file
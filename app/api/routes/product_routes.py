@@ -1,20 +1,56 @@
-from fastapi import APIRouter, Depends, UploadFile, status, Form, File
+from fastapi import APIRouter, Depends, UploadFile, status, Form, File, Response
 from sqlalchemy.orm import Session
-from app.api.deps import get_session, verify_token
+from app.api.deps import get_session, get_read_session, verify_token
 from uuid import UUID
-from app.schemas.product_schemas import ProductResponseSchema, UpdateProductSchema
+from app.schemas.product_schemas import (
+    ProductResponseSchema, ProductLookupSchema, CreateProductSchema, UpdateProductSchema, BulkProductSelectionSchema,
+    BulkProductResultSchema, CacheStatsSchema
+)
+from app.schemas.upload_schemas import UploadedImageSchema
 from app.services.product_service import ProductService
+from app.core.fieldsets import render
 from app.models.user import User
 
 product_router = APIRouter(prefix="/products", tags=["Products"])
 
+@product_router.patch("/bulk/activate", response_model=BulkProductResultSchema)
+async def bulk_activate_products(body: BulkProductSelectionSchema,
+                                 session: Session = Depends(get_session),
+                                 user: User = Depends(verify_token)):
+    return ProductService.bulk_set_active(True, body, session, user)
+
+@product_router.patch("/bulk/deactivate", response_model=BulkProductResultSchema)
+async def bulk_deactivate_products(body: BulkProductSelectionSchema,
+                                   session: Session = Depends(get_session),
+                                   user: User = Depends(verify_token)):
+    return ProductService.bulk_set_active(False, body, session, user)
+
+@product_router.get("", response_model=list[ProductLookupSchema])
+async def get_products(slugs: str | None = None,
+                       ids: str | None = None,
+                       fields: str | None = None,
+                       session: Session = Depends(get_read_session)):
+    slug_list = [slug.strip() for slug in (slugs or "").split(",") if slug.strip()]
+    id_list = [id.strip() for id in (ids or "").split(",") if id.strip()]
+    return Response(ProductService.get_products_response(slug_list, id_list, session, fields), media_type="application/json")
+
+@product_router.get("/cache/stats", response_model=CacheStatsSchema)
+async def get_product_cache_stats(user: User = Depends(verify_token)):
+    return ProductService.get_cache_stats(user)
+
 @product_router.get("/{slug}", response_model=ProductResponseSchema)
-async def get_product(slug: str, session: Session = Depends(get_session)):
-    return ProductService.get_product(slug, session)
+async def get_product(slug: str, fields: str | None = None, session: Session = Depends(get_read_session)):
+    return Response(ProductService.get_product_response(slug, session, fields), media_type="application/json")
 
 @product_router.get("/category/{category_slug}", response_model=list[ProductResponseSchema])
-async def get_products_by_category(category_slug: str, session: Session = Depends(get_session)):
-    return ProductService.get_products_by_category(category_slug, session)
+async def get_products_by_category(category_slug: str,
+                                   fields: str | None = None,
+                                   session: Session = Depends(get_read_session)):
+    products = ProductService.get_products_by_category(category_slug, session, fields)
+    if fields:
+        return Response(render(ProductResponseSchema, ProductService.fieldset(fields), products, many=True),
+                        media_type="application/json")
+    return products
 
 @product_router.post("", response_model=ProductResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_product(name: str = Form(...),
@@ -27,6 +63,12 @@ async def create_product(name: str = Form(...),
                          user: User = Depends(verify_token)):
     return ProductService.create_product(name, slug, description, price, category_id, image, session, user)
 
+@product_router.post("/uploaded", response_model=ProductResponseSchema, status_code=status.HTTP_201_CREATED)
+async def create_product_from_upload(body: CreateProductSchema,
+                                     session: Session = Depends(get_session),
+                                     user: User = Depends(verify_token)):
+    return ProductService.create_product_from_upload(body, session, user)
+
 @product_router.put("/{slug}", response_model=ProductResponseSchema)
 async def update_product(slug: str, 
                          body: UpdateProductSchema,
@@ -41,6 +83,13 @@ async def update_product_image(slug: str,
                                user: User = Depends(verify_token)):
     return ProductService.update_product_image(slug, image, session, user)
 
+@product_router.patch("/{slug}/image", response_model=ProductResponseSchema)
+async def set_product_image(slug: str,
+                            body: UploadedImageSchema,
+                            session: Session = Depends(get_session),
+                            user: User = Depends(verify_token)):
+    return ProductService.set_product_image(slug, body, session, user)
+
 @product_router.delete("/{slug}/deactivate")
 async def deactivate_product(slug: str, session: Session = Depends(get_session), user: User = Depends(verify_token)):
     ProductService.deactivate_product(slug, session, user)
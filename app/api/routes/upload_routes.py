@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Request, status
+from app.api.deps import verify_token
+from app.schemas.upload_schemas import CreateUploadSchema, UploadResponseSchema
+from app.services.upload_service import UploadService
+from app.models.user import User
+
+upload_router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+@upload_router.post("", response_model=UploadResponseSchema, status_code=status.HTTP_201_CREATED)
+async def create_upload(body: CreateUploadSchema, user: User = Depends(verify_token)):
+    return UploadService.create_upload(body, user)
+
+@upload_router.put("/{key}", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+async def receive_local_upload(key: str, expires: int, signature: str, request: Request):
+    content_type = request.headers.get("content-type", "")
+    await UploadService.receive_local_upload(key, content_type, expires, signature, request.stream())
\ No newline at end of file
@@ -0,0 +1,32 @@
+import argparse
+
+
+def main(argv=None):
+    from app.core.vars import ORDER_ARCHIVE_AFTER_DAYS, ORDER_ARCHIVE_BATCH_SIZE, ARCHIVE_DIR
+
+    parser = argparse.ArgumentParser(description="Arquiva pedidos entregues/cancelados antigos em segmentos comprimidos")
+    parser.add_argument("--older-than-days", type=int, default=ORDER_ARCHIVE_AFTER_DAYS,
+                        help="dias sem alteração para um pedido finalizado ser arquivado")
+    parser.add_argument("--batch-size", type=int, default=ORDER_ARCHIVE_BATCH_SIZE,
+                        help="pedidos por segmento e por transação de remoção")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="diretório dos segmentos")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.core.order_archive import OrderArchive
+    from app.services.order_archive_service import OrderArchiveService
+    import app.models
+
+    session = sessionmaker(bind=db)()
+    try:
+        archived = OrderArchiveService.archive_finished_orders(
+            session, args.older_than_days, args.batch_size, OrderArchive(args.archive_dir)
+        )
+    finally:
+        session.close()
+    print(f"{archived} pedidos arquivados")
+
+
+if __name__ == "__main__":
+    main()
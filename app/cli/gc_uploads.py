@@ -0,0 +1,34 @@
+import argparse
+
+
+def main(argv=None):
+    from app.core.vars import UPLOAD_DIR, UPLOAD_GC_GRACE_SECONDS, UPLOAD_GC_BATCH_SIZE
+
+    parser = argparse.ArgumentParser(description="Move para a quarentena e depois apaga uploads sem referência no banco")
+    parser.add_argument("--upload-dir", default=UPLOAD_DIR, help="diretório dos uploads (apenas backend local)")
+    parser.add_argument("--quarantine-dir", default=None,
+                        help="diretório da quarentena (padrão: UPLOAD_QUARANTINE_DIR ou 'quarantine' ao lado do diretório de uploads)")
+    parser.add_argument("--grace-seconds", type=int, default=UPLOAD_GC_GRACE_SECONDS,
+                        help="idade mínima do arquivo e tempo mínimo na quarentena")
+    parser.add_argument("--batch-size", type=int, default=UPLOAD_GC_BATCH_SIZE, help="nomes verificados por consulta")
+    parser.add_argument("--dry-run", action="store_true", help="apenas informa o que seria feito")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.services.upload_gc_service import UploadGCService
+    import app.models
+
+    session = sessionmaker(bind=db)()
+    try:
+        stats = UploadGCService.collect(
+            session, args.upload_dir, args.quarantine_dir, args.grace_seconds, args.batch_size, args.dry_run
+        )
+    finally:
+        session.close()
+    print(f"{stats['scanned']} verificados, {stats['quarantined']} em quarentena, "
+          f"{stats['restored']} restaurados, {stats['deleted']} apagados")
+
+
+if __name__ == "__main__":
+    main()
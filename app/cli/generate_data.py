@@ -0,0 +1,272 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from uuid import uuid4
+import argparse
+import bisect
+import csv
+import enum
+import io
+import os
+import random
+import sys
+import time
+
+
+@dataclass
+class GeneratorConfig:
+    categories: int = 50
+    products: int = 10_000
+    users: int = 5_000
+    orders: int = 50_000
+    max_items_per_order: int = 8
+    product_skew: float = 1.1
+    user_skew: float = 0.8
+    days: int = 365
+    chunk_size: int = 20_000
+    seed: int = 42
+    password: str = "12345678"
+
+
+class ZipfSampler:
+    """Amostra índices 0..n-1 com probabilidade proporcional a 1 / rank^s.
+
+    Os ranks são embaralhados para que os itens populares não fiquem concentrados
+    no início da lista (por exemplo, todos na mesma categoria).
+    """
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+        self.total = self.cumulative[-1]
+        self.rank_to_index = list(range(n))
+        rng.shuffle(self.rank_to_index)
+
+    def sample(self):
+        rank = bisect.bisect_left(self.cumulative, self.rng.random() * self.total)
+        return self.rank_to_index[min(rank, len(self.rank_to_index) - 1)]
+
+
+class _CsvStream(io.RawIOBase):
+    def __init__(self, rows):
+        self._rows = rows
+        self._buffer = b""
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+
+    def readable(self):
+        return True
+
+    def _fill(self, size):
+        while len(self._buffer) < size:
+            batch = list(islice(self._rows, 1000))
+            if not batch:
+                break
+            self._writer.writerows(batch)
+            self._buffer += self._text.getvalue().encode()
+            self._text.seek(0)
+            self._text.truncate()
+
+    def read(self, size=-1):
+        self._fill(size if size and size > 0 else 1 << 20)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _copy_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class CopyLoader:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def load(self, table, columns, rows):
+        cursor = self.connection.connection.driver_connection.cursor()
+        try:
+            stream = _CsvStream([_copy_value(v) for v in row] for row in rows)
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+class ExecuteManyLoader:
+    def __init__(self, connection, batch_size=5_000):
+        self.connection = connection
+        self.batch_size = batch_size
+
+    def load(self, table, columns, rows):
+        statement = table.insert()
+        total = 0
+        while True:
+            batch = [dict(zip(columns, row)) for row in islice(rows, self.batch_size)]
+            if not batch:
+                return total
+            self.connection.execute(statement, batch)
+            total += len(batch)
+
+
+def loader_for(connection):
+    if connection.dialect.name == "postgresql":
+        return CopyLoader(connection)
+    return ExecuteManyLoader(connection)
+
+
+def _progress(label, count, started):
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {count} linhas em {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f}/s)", file=sys.stderr)
+
+
+def generate(engine, config: GeneratorConfig):
+    from app.core.security import bcrypt_context
+    from app.enums.order_status import OrderStatus
+    from app.models import Category, Product, User, Order, OrderItem
+
+    rng = random.Random(config.seed)
+    now = datetime.now(timezone.utc)
+    counts = {}
+
+    with engine.begin() as connection:
+        loader = loader_for(connection)
+
+        category_ids = [uuid4() for _ in range(config.categories)]
+        started = time.perf_counter()
+        counts["categories"] = loader.load(
+            Category.__table__, ["id", "name", "slug", "image_url"],
+            ((cid, f"Categoria {i}", f"categoria-{i}", f"categoria-{i}.png") for i, cid in enumerate(category_ids)),
+        )
+        _progress("categorias", counts["categories"], started)
+
+        category_sampler = ZipfSampler(config.categories, 0.7, rng)
+        product_ids = [uuid4() for _ in range(config.products)]
+        product_prices = [round(min(rng.lognormvariate(3.2, 0.6), 999.0), 2) for _ in range(config.products)]
+
+        def product_rows():
+            for i, pid in enumerate(product_ids):
+                yield (pid, f"Produto {i}", f"produto-{i}", f"Descrição do produto {i}", product_prices[i],
+                       category_ids[category_sampler.sample()], rng.random() > 0.03, f"produto-{i}.png")
+
+        started = time.perf_counter()
+        counts["products"] = loader.load(
+            Product.__table__, ["id", "name", "slug", "description", "price", "category_id", "is_active", "image_url"],
+            product_rows(),
+        )
+        _progress("produtos", counts["products"], started)
+
+        hashed_password = bcrypt_context.hash(config.password)
+        user_ids = [uuid4() for _ in range(config.users)]
+
+        def user_rows():
+            for i, uid in enumerate(user_ids):
+                created_at = now - timedelta(days=config.days * rng.random())
+                yield (uid, f"Usuario {i}", "Gerado", f"usuario{i}@dataset.local", hashed_password, False, created_at)
+
+        started = time.perf_counter()
+        counts["users"] = loader.load(
+            User.__table__, ["id", "first_name", "last_name", "email", "password", "is_admin", "created_at"],
+            user_rows(),
+        )
+        _progress("usuários", counts["users"], started)
+
+    product_sampler = ZipfSampler(config.products, config.product_skew, rng)
+    user_sampler = ZipfSampler(config.users, config.user_skew, rng)
+    item_weights = [1 / k for k in range(1, config.max_items_per_order + 1)]
+    item_counts = list(range(1, config.max_items_per_order + 1))
+
+    def random_status(age):
+        roll = rng.random()
+        if age < timedelta(days=2):
+            return OrderStatus.OPEN if roll < 0.6 else OrderStatus.DELIVERED if roll < 0.9 else OrderStatus.CANCELED
+        return OrderStatus.DELIVERED if roll < 0.9 else OrderStatus.CANCELED if roll < 0.98 else OrderStatus.OPEN
+
+    counts["orders"] = counts["order_items"] = 0
+    started = time.perf_counter()
+    remaining = config.orders
+    while remaining > 0:
+        size = min(config.chunk_size, remaining)
+        remaining -= size
+        order_rows, item_rows = [], []
+        for _ in range(size):
+            order_id = uuid4()
+            age = timedelta(days=config.days * rng.random() ** 1.5)
+            created_at = now - age
+            updated_at = min(now, created_at + timedelta(hours=rng.uniform(0.2, 48)))
+            total = 0
+            for _ in range(rng.choices(item_counts, item_weights)[0]):
+                index = product_sampler.sample()
+                quantity = rng.randint(1, 4)
+                total += quantity * product_prices[index]
+                item_rows.append((uuid4(), order_id, product_ids[index], quantity, product_prices[index], created_at))
+            order_rows.append((order_id, user_ids[user_sampler.sample()], round(total, 2), random_status(age), created_at, updated_at))
+
+        with engine.begin() as connection:
+            loader = loader_for(connection)
+            counts["orders"] += loader.load(Order.__table__, ["id", "user_id", "total", "status", "created_at", "updated_at"], iter(order_rows))
+            counts["order_items"] += loader.load(OrderItem.__table__, ["id", "order_id", "produtc_id", "quantity", "price", "created_at"], iter(item_rows))
+        _progress("pedidos", counts["orders"], started)
+
+    return counts
+
+
+def parse_args(argv=None):
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético para testes de escala")
+    parser.add_argument("--database-url", help="padrão: DB_URL")
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--orders", type=int, default=defaults.orders)
+    parser.add_argument("--max-items-per-order", type=int, default=defaults.max_items_per_order)
+    parser.add_argument("--product-skew", type=float, default=defaults.product_skew,
+                        help="expoente Zipf da popularidade dos produtos")
+    parser.add_argument("--user-skew", type=float, default=defaults.user_skew,
+                        help="expoente Zipf da quantidade de pedidos por usuário")
+    parser.add_argument("--days", type=int, default=defaults.days, help="janela de datas dos pedidos")
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="pedidos por transação")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--create-schema", action="store_true", help="cria as tabelas ausentes antes da carga")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DB_URL"] = args.database_url
+
+    from sqlalchemy import create_engine
+    from app.models.base import Base
+    from app.core.vars import DB_URL
+
+    engine = create_engine(DB_URL)
+    if args.create_schema:
+        Base.metadata.create_all(bind=engine)
+
+    config = GeneratorConfig(
+        categories=args.categories,
+        products=args.products,
+        users=args.users,
+        orders=args.orders,
+        max_items_per_order=args.max_items_per_order,
+        product_skew=args.product_skew,
+        user_skew=args.user_skew,
+        days=args.days,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+    )
+    counts = generate(engine, config)
+    print(", ".join(f"{name}={count}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from datetime import date
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantém as partições mensais de order_db e order_item_db")
+    parser.add_argument("--months-ahead", type=int, default=3, help="meses futuros com partição garantida")
+    parser.add_argument("--detach-before", type=date.fromisoformat,
+                        help="desanexa partições de meses anteriores a esta data (AAAA-MM-DD)")
+    parser.add_argument("--drop", action="store_true", help="remove as partições desanexadas")
+    args = parser.parse_args(argv)
+
+    from app.models.base import db
+    from app.core.partitions import ensure_partitions, detach_partitions_before, is_partitioned
+
+    with db.begin() as connection:
+        if not is_partitioned(connection):
+            print("order_db não é particionada neste banco; nada a fazer")
+            return
+        created = ensure_partitions(connection, args.months_ahead)
+        print(f"partições garantidas: {', '.join(m.strftime('%Y-%m') for m in created)}")
+        if args.detach_before:
+            detached = detach_partitions_before(connection, args.detach_before, args.drop)
+            action = "removidas" if args.drop else "desanexadas"
+            print(f"partições {action}: {', '.join(m.strftime('%Y-%m') for m in detached) or 'nenhuma'}")
+
+
+if __name__ == "__main__":
+    main()
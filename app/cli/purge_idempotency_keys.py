@@ -0,0 +1,22 @@
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove as Idempotency-Keys expiradas")
+    parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.services.idempotency_service import IdempotencyService
+    import app.models
+
+    session = sessionmaker(bind=db)()
+    try:
+        purged = IdempotencyService.purge_expired(session)
+    finally:
+        session.close()
+    print(f"{purged} chaves removidas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói user_order_stats_db a partir de order_db")
+    parser.add_argument("--batch-size", type=int, default=1000, help="usuários por transação")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.services.user_order_stats_service import UserOrderStatsService
+    import app.models
+
+    session = sessionmaker(bind=db)()
+    try:
+        rebuilt = UserOrderStatsService.rebuild(session, args.batch_size)
+    finally:
+        session.close()
+    print(f"{rebuilt} usuários reconciliados")
+
+
+if __name__ == "__main__":
+    main()
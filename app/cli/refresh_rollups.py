@@ -0,0 +1,22 @@
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza incrementalmente as tabelas de rollup de vendas")
+    parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.services.analytics_service import AnalyticsService
+    import app.models
+
+    session = sessionmaker(bind=db)()
+    try:
+        days = AnalyticsService.refresh_rollups(session)
+    finally:
+        session.close()
+    print(f"{days} dias recalculados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa os jobs de job_db fora do processo da API")
+    parser.add_argument("--workers", type=int, default=None, help="workers simultâneos (padrão: JOB_WORKERS)")
+    parser.add_argument("--once", action="store_true", help="executa os jobs prontos e termina")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.orm import sessionmaker
+    from app.models.base import db
+    from app.core.vars import JOB_WORKERS
+    from app.services.job_service import JobService, JobRunner
+    import app.models
+
+    SessionLocal = sessionmaker(bind=db)
+    if args.once:
+        session = SessionLocal()
+        try:
+            ran = JobService.run_pending(session)
+        finally:
+            session.close()
+        print(f"{ran} jobs executados")
+        return
+
+    async def run():
+        runner = JobRunner(SessionLocal, args.workers or JOB_WORKERS)
+        runner.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import base64
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def is_saturated(self):
+        return self.count >= self.capacity
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        bloom = cls(data["capacity"], data["error_rate"])
+        bloom.bits = bytearray(base64.b64decode(data["bits"]))
+        bloom.count = data["count"]
+        return bloom
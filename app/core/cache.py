@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from threading import Lock
+from app.core.metrics import record_cache_access
+import time
+
+MISSING = object()
+
+
+class LRUCache:
+    """Cache LRU limitado a max_size entradas, com expiração por entrada.
+
+    generation é incrementado a cada invalidação: quem lê do banco após um miss
+    guarda o valor com set(..., generation=token) e a escrita é descartada se
+    houve invalidação no meio, evitando repopular o cache com dados antigos.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                value = MISSING
+        record_cache_access(self.name, value is not MISSING)
+        return value
+
+    def set(self, key, value, ttl_seconds: float | None = None, generation: int | None = None):
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+            }
@@ -0,0 +1,20 @@
+# ETags das respostas de pedidos: a versão do registro entre aspas ("3").
+# If-Match aceita a forma forte, a fraca (W/"3"), o número sem aspas e "*".
+
+
+def format_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> int | None:
+    """Versão pedida em If-Match; None sem header ou com "*". Levanta ValueError se inválido."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    if len(tag) >= 2 and tag[0] == tag[-1] == '"':
+        tag = tag[1:-1]
+    if not tag.isdigit():
+        raise ValueError(value)
+    return int(tag)
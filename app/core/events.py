@@ -0,0 +1,40 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from uuid import UUID
+from app.enums.order_status import OrderStatus
+
+# Publicado antes do commit, com a sessão de quem publica: os handlers
+# gravam na mesma transação da mudança de status.
+ORDER_STATUS_CHANGED = "order_status_changed"
+# Publicado depois do commit, para que caches invalidados não sejam
+# repopulados com dados anteriores à alteração.
+PRODUCTS_CHANGED = "products_changed"
+
+_handlers = defaultdict(list)
+
+
+@dataclass(frozen=True)
+class OrderStatusChange:
+    order_id: UUID
+    user_id: UUID
+    total: float
+    old_status: OrderStatus
+    new_status: OrderStatus
+
+
+@dataclass(frozen=True)
+class ProductChange:
+    product_id: UUID
+    slug: str
+    category_id: UUID
+
+
+def subscribe(event: str, handler):
+    if handler not in _handlers[event]:
+        _handlers[event].append(handler)
+
+
+def publish(event: str, **payload):
+    """Chama os handlers de forma síncrona, no mesmo processo e na ordem de inscrição."""
+    for handler in list(_handlers[event]):
+        handler(**payload)
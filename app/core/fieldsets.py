@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import Annotated, get_args, get_origin
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, noload, selectinload
+
+# Quantidade de combinações de fields= (e de modelos projetados) mantidas em cache por processo.
+MAX_FIELDSETS = 256
+
+
+def _nested_model(annotation):
+    """O schema dentro de Schema ou list[Schema]; None para campos simples."""
+    if get_origin(annotation) is list:
+        (annotation,) = get_args(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _freeze(tree: dict):
+    return tuple(sorted((name, None if sub is None else _freeze(sub)) for name, sub in tree.items()))
+
+
+@lru_cache(maxsize=MAX_FIELDSETS)
+def parse_fields(model: type[BaseModel], raw: str | None):
+    """Converte "name,price,items.product.slug" em uma especificação imutável.
+
+    Cada item da especificação é (campo, None) para o campo inteiro ou
+    (campo, subespecificação) para parte de um schema aninhado. Retorna None
+    quando raw está vazio (resposta completa) e levanta ValueError com o
+    caminho desconhecido.
+    """
+    paths = [path.strip() for path in (raw or "").split(",") if path.strip()]
+    if not paths:
+        return None
+
+    tree = {}
+    for path in paths:
+        current, node = model, tree
+        names = path.split(".")
+        for position, name in enumerate(names):
+            field = current.model_fields.get(name)
+            if field is None:
+                raise ValueError(path)
+            if position == len(names) - 1:
+                node[name] = None
+                break
+            current = _nested_model(field.annotation)
+            if current is None:
+                raise ValueError(path)
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {})
+    return _freeze(tree)
+
+
+@lru_cache(maxsize=MAX_FIELDSETS)
+def projected_model(model: type[BaseModel], spec: tuple) -> type[BaseModel]:
+    """Schema com apenas os campos de spec, criado uma vez por combinação."""
+    requested = dict(spec)
+    definitions = {}
+    for name, field in model.model_fields.items():
+        if name not in requested:
+            continue
+        sub = requested[name]
+        annotation = field.annotation
+        if sub is not None:
+            nested = projected_model(_nested_model(annotation), sub)
+            annotation = list[nested] if get_origin(annotation) is list else nested
+        elif field.metadata:
+            # Mantém serializadores e validadores declarados com Annotated (ex.: ImageUrl).
+            annotation = Annotated.__class_getitem__((annotation, *field.metadata))
+        definitions[name] = (annotation, ... if field.is_required() else field.default)
+    return create_model(f"{model.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions)
+
+
+@lru_cache(maxsize=MAX_FIELDSETS)
+def _adapter(model: type[BaseModel], spec: tuple | None, many: bool):
+    projected = model if spec is None else projected_model(model, spec)
+    return TypeAdapter(list[projected] if many else projected)
+
+
+def render(model: type[BaseModel], spec: tuple | None, value, many: bool = False) -> bytes:
+    """JSON de value (objeto ou lista de objetos do ORM) só com os campos de spec (todos se None)."""
+    adapter = _adapter(model, spec, many)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def render_json(model: type[BaseModel], spec: tuple | None, raw: bytes) -> bytes:
+    """Projeta um JSON já serializado com o schema completo (ex.: vindo de cache)."""
+    adapter = _adapter(model, spec, False)
+    return adapter.dump_json(adapter.validate_json(raw))
+
+
+def load_options(entity, spec: tuple, loaders: dict | None = None, always: tuple = ()):
+    """Opções de carregamento que trazem do banco só as colunas e relações de spec.
+
+    Campos do schema são mapeados para atributos de mesmo nome em entity. loaders
+    permite trocar o loader padrão de uma relação (selectinload para coleções,
+    joinedload para as demais), por exemplo para manter um filtro com and_().
+    always lista colunas que o serviço usa mesmo fora da resposta (ex.: user_id
+    na checagem de acesso). Relações fora de spec não são carregadas.
+    """
+    mapper = inspect(entity)
+    requested = dict(spec)
+    columns, options = [], []
+    for name, sub in spec:
+        attribute = getattr(entity, name)
+        if name in mapper.relationships:
+            relationship = mapper.relationships[name]
+            loader = (loaders or {}).get(name)
+            if loader is None:
+                loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+            if sub is not None:
+                loader = loader.options(*load_options(relationship.mapper.class_, sub))
+            options.append(loader)
+        elif name in mapper.column_attrs:
+            columns.append(attribute)
+
+    for relationship in mapper.relationships:
+        if relationship.key not in requested:
+            options.append(noload(getattr(entity, relationship.key)))
+    columns += [getattr(entity, name) for name in always if name not in requested]
+    if not columns:
+        columns = [getattr(entity, mapper.get_property_by_column(column).key) for column in mapper.primary_key]
+    return [load_only(*columns), *options]
@@ -0,0 +1,14 @@
+# Tipos de job. Os handlers recebem o payload como argumentos nomeados e precisam
+# ser idempotentes: um job pode rodar de novo se o worker cair antes de concluí-lo.
+REMOVE_FILE = "remove_file"
+DELETE_OBJECT = "delete_object"
+
+_handlers = {}
+
+
+def register(kind: str, handler):
+    _handlers[kind] = handler
+
+
+def handler_for(kind: str):
+    return _handlers.get(kind)
@@ -0,0 +1,111 @@
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+import os
+import time
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total de requisições HTTP",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Capacidade do pool de conexões (size + max_overflow)",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexões do pool em uso",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Consultas a caches em memória",
+    ["cache", "result"],
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+EXCLUDED_PATHS = {"/metrics", "/health/live", "/health/ready"}
+
+
+def record_cache_access(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_pool(engine):
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    if callable(size):
+        DB_POOL_SIZE.set(size() + max(getattr(pool, "_max_overflow", 0), 0))
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+class PrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            labels = (method, template, str(status))
+            REQUEST_COUNT.labels(*labels).inc()
+            REQUEST_LATENCY.labels(*labels).observe(elapsed)
+
+
+def mark_process_dead():
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def metrics_endpoint(request: Request):
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from threading import Lock
+from uuid import UUID, uuid4
+from app.core.bloom import BloomFilter
+from app.core.ids import uuid7_datetime
+from app.core.vars import ARCHIVE_DIR, ORDER_ARCHIVE_BLOCK_SIZE
+import gzip
+import json
+import os
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".idx.json"
+
+
+def as_utc(value: datetime):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse(value: str):
+    return as_utc(datetime.fromisoformat(value))
+
+
+def _write_durably(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class OrderArchive:
+    """Segmentos append-only com pedidos finalizados, em NDJSON comprimido com gzip.
+
+    Cada segmento é uma sequência de membros gzip independentes (blocos), o que
+    permite descomprimir apenas o bloco necessário. O índice ao lado do segmento
+    guarda, por bloco, o deslocamento, o intervalo de created_at e os usuários
+    presentes, além de um filtro de Bloom com os ids do segmento inteiro.
+    O índice é gravado por último: segmento sem índice é ignorado na leitura.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, block_size=ORDER_ARCHIVE_BLOCK_SIZE):
+        self.directory = directory
+        self.block_size = block_size
+        self._indexes = {}
+        self._lock = Lock()
+
+    def write_segment(self, records: list[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"orders-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid4().hex[:8]}"
+        bloom = BloomFilter(len(records))
+        blocks = []
+        data = bytearray()
+
+        for start in range(0, len(records), self.block_size):
+            chunk = records[start:start + self.block_size]
+            payload = gzip.compress("".join(json.dumps(record) + "\n" for record in chunk).encode())
+            for record in chunk:
+                bloom.add(record["id"])
+            blocks.append({
+                "offset": len(data),
+                "length": len(payload),
+                "count": len(chunk),
+                "min_created_at": min(record["created_at"] for record in chunk),
+                "max_created_at": max(record["created_at"] for record in chunk),
+                "user_ids": sorted({record["user_id"] for record in chunk}),
+            })
+            data += payload
+
+        _write_durably(os.path.join(self.directory, name + SEGMENT_SUFFIX), bytes(data))
+        index = {"segment": name + SEGMENT_SUFFIX, "count": len(records), "blocks": blocks, "bloom": bloom.to_dict()}
+        _write_durably(os.path.join(self.directory, name + INDEX_SUFFIX), json.dumps(index).encode())
+        return name
+
+    def _load_index(self, path: str):
+        with open(path, "rb") as file:
+            index = json.load(file)
+        index["bloom"] = BloomFilter.from_dict(index["bloom"])
+        for block in index["blocks"]:
+            block["min_created_at"] = _parse(block["min_created_at"])
+            block["max_created_at"] = _parse(block["max_created_at"])
+            block["user_ids"] = set(block["user_ids"])
+        return index
+
+    def segments(self):
+        """Índices dos segmentos, do mais recente para o mais antigo."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted((name for name in os.listdir(self.directory) if name.endswith(INDEX_SUFFIX)), reverse=True)
+        with self._lock:
+            for name in names:
+                if name not in self._indexes:
+                    self._indexes[name] = self._load_index(os.path.join(self.directory, name))
+            return [self._indexes[name] for name in names]
+
+    def _read_block(self, index: dict, block: dict):
+        with open(os.path.join(self.directory, index["segment"]), "rb") as file:
+            file.seek(block["offset"])
+            payload = file.read(block["length"])
+        return [json.loads(line) for line in gzip.decompress(payload).splitlines()]
+
+    def find(self, order_id: UUID):
+        key = str(order_id)
+        moment = uuid7_datetime(order_id)
+
+        def distance(block):
+            if moment is None or block["min_created_at"] <= moment <= block["max_created_at"]:
+                return 0
+            return min(abs(moment - block["min_created_at"]), abs(moment - block["max_created_at"])).total_seconds()
+
+        for index in self.segments():
+            if key not in index["bloom"]:
+                continue
+            for block in sorted(index["blocks"], key=distance):
+                for record in self._read_block(index, block):
+                    if record["id"] == key:
+                        return record
+        return None
+
+    def records(self, user_ids=None, since: datetime | None = None, until: datetime | None = None):
+        """Registros arquivados, sem as cópias repetidas, opcionalmente filtrados.
+
+        user_ids limita aos pedidos desses usuários e since/until a created_at em
+        [since, until); os índices de cada bloco evitam ler os blocos que não podem
+        conter registros do filtro.
+        """
+        keys = None if user_ids is None else {str(user_id) for user_id in user_ids}
+        since = as_utc(since) if since else None
+        until = as_utc(until) if until else None
+        seen = set()
+        for index in self.segments():
+            for block in index["blocks"]:
+                if keys is not None and keys.isdisjoint(block["user_ids"]):
+                    continue
+                if since and block["max_created_at"] < since:
+                    continue
+                if until and block["min_created_at"] >= until:
+                    continue
+                for record in self._read_block(index, block):
+                    if (keys is not None and record["user_id"] not in keys) or record["id"] in seen:
+                        continue
+                    created_at = _parse(record["created_at"])
+                    if (since and created_at < since) or (until and created_at >= until):
+                        continue
+                    seen.add(record["id"])
+                    yield record
+
+    def user_orders(self, user_id: UUID, since: datetime | None = None, until: datetime | None = None):
+        records = self.records([user_id], since, until)
+        return sorted(records, key=lambda record: record["created_at"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._indexes = {}
+
+
+order_archive = OrderArchive()
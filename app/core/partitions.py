@@ -0,0 +1,81 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+import re
+
+PARTITIONED_TABLES = ("order_db", "order_item_db")
+PARTITION_NAME = re.compile(r"^(?P<parent>.+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(value: date):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date):
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(connection):
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'order_db')")
+    ).scalar()
+
+
+def create_month_partitions(connection, month: date):
+    start = month_start(month)
+    end = add_months(start, 1)
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+        ))
+
+
+def ensure_partitions(connection, months_ahead: int = 3, today: date | None = None):
+    """Garante partições do mês corrente até months_ahead meses à frente."""
+    if not is_partitioned(connection):
+        return []
+    current = month_start(today or datetime.now(timezone.utc).date())
+    months = [add_months(current, i) for i in range(months_ahead + 1)]
+    for month in months:
+        create_month_partitions(connection, month)
+    return months
+
+
+def list_partitions(connection, table: str = "order_db"):
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table}).scalars()
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match["year"]), int(match["month"]), 1)))
+    return partitions
+
+
+def detach_partitions_before(connection, cutoff: date, drop: bool = False):
+    """Desanexa (e opcionalmente remove) as partições de meses anteriores a cutoff.
+
+    As partições de order_item_db saem primeiro porque referenciam order_db.
+    Substitui DELETEs em massa: desanexar é uma operação de catálogo.
+    """
+    if not is_partitioned(connection):
+        return []
+    months = sorted({month for _, month in list_partitions(connection) if month < month_start(cutoff)})
+    for month in months:
+        for table in reversed(PARTITIONED_TABLES):
+            name = partition_name(table, month)
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if drop:
+                connection.execute(text(f"DROP TABLE {name}"))
+    return months
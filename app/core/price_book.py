@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from threading import Lock
+import time
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.events import PRODUCTS_CHANGED, ProductChange, subscribe
+from app.core.metrics import record_cache_access
+from app.core.vars import PRICE_BOOK_TTL_SECONDS
+from app.models.product import Product
+
+
+@dataclass(frozen=True)
+class PriceEntry:
+    id: UUID
+    name: str
+    price: float
+    is_active: bool
+    version: int
+
+
+class PriceBook:
+    """Espelho em memória de preço, disponibilidade e nome dos produtos.
+
+    Cada entrada guarda a versão do produto lida do banco. Quem usa o livro precisa
+    conferir essa versão na própria escrita (ver OrderService.create_order): os eventos
+    de alteração só chegam a este processo, então alterações feitas por outros workers
+    aparecem aqui quando a entrada vence (ttl_seconds) ou quando ela é relida.
+    """
+
+    def __init__(self, ttl_seconds: float = PRICE_BOOK_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = Lock()
+
+    def _fetch(self, session: Session, ids=None):
+        query = select(Product.id, Product.name, Product.price, Product.is_active, Product.version)
+        if ids is not None:
+            query = query.where(Product.id.in_(ids))
+        return {row.id: PriceEntry(*row) for row in session.execute(query)}
+
+    def load(self, session: Session, ids=None):
+        """Recarrega do banco os produtos em ids (ou todos); ids inexistentes saem do livro."""
+        if ids is not None:
+            ids = set(ids)
+        entries = self._fetch(session, ids)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if ids is None:
+                self._entries = {id: (expires_at, entry) for id, entry in entries.items()}
+            else:
+                for id in ids - entries.keys():
+                    self._entries.pop(id, None)
+                self._entries.update((id, (expires_at, entry)) for id, entry in entries.items())
+        return entries
+
+    def get_many(self, ids, session: Session):
+        """Retorna {id: PriceEntry} para os ids existentes, buscando no banco só os que faltam.
+
+        Faltam os ausentes do livro, os vencidos e os inativos: um produto reativado
+        por outro worker é relido antes de o pedido ser recusado. Os lidos de uma
+        réplica (session.info["replica"]) não entram no livro: uma réplica atrasada
+        traria de volta um preço já invalidado.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = {id: self._entries.get(id) for id in ids}
+        found = {
+            id: cached_entry[1] for id, cached_entry in cached.items()
+            if cached_entry is not None and cached_entry[0] > now and cached_entry[1].is_active
+        }
+        missing = set(ids) - found.keys()
+        record_cache_access("price_book", not missing)
+        if missing and session.info.get("replica", False):
+            found.update(self._fetch(session, missing))
+        elif missing:
+            found.update(self.load(session, missing))
+        return found
+
+    def discard(self, *ids):
+        with self._lock:
+            for id in ids:
+                self._entries.pop(id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+price_book = PriceBook()
+
+
+def _discard_products(changes: list[ProductChange]):
+    price_book.discard(*{change.product_id for change in changes})
+
+
+subscribe(PRODUCTS_CHANGED, _discard_products)
@@ -0,0 +1,105 @@
+from itertools import count
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+import json
+import logging
+import time
+
+# Depois de uma escrita o cliente recebe este cookie e, até o horário gravado nele,
+# suas leituras vão para o primário (read-your-writes entre todos os workers).
+PRIMARY_PIN_COOKIE = "db_primary_until"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+logger = logging.getLogger("app.replicas")
+
+# Réplica sem WAL pendente está em dia mesmo que o primário esteja ocioso há muito tempo.
+_POSTGRES_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Escolhe réplicas em round-robin, pulando as que estão fora do ar ou atrasadas.
+
+    O estado de cada réplica é verificado no máximo uma vez a cada check_interval_seconds;
+    sem réplica saudável, pick() retorna None e a leitura vai para o primário.
+    """
+
+    def __init__(self, engines: list, max_lag_seconds: float, check_interval_seconds: float):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._status = {}
+        self._counter = count()
+
+    def _lag(self, engine):
+        with engine.connect() as connection:
+            if engine.dialect.name == "postgresql":
+                return float(connection.execute(_POSTGRES_LAG).scalar())
+            connection.execute(text("SELECT 1"))
+            return 0.0
+
+    def is_healthy(self, engine):
+        now = time.monotonic()
+        checked = self._status.get(engine)
+        if checked and now - checked[0] < self.check_interval_seconds:
+            return checked[1]
+
+        try:
+            lag = self._lag(engine)
+            healthy = lag <= self.max_lag_seconds
+        except SQLAlchemyError as exc:
+            lag = None
+            healthy = False
+            logger.warning(json.dumps({"event": "replica_unreachable", "replica": repr(engine.url), "error": str(exc)}))
+        if not healthy and lag is not None:
+            logger.warning(json.dumps({"event": "replica_lagging", "replica": repr(engine.url), "lag_seconds": lag}))
+        self._status[engine] = (now, healthy)
+        return healthy
+
+    def pick(self):
+        if not self.engines:
+            return None
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+
+def pinned_to_primary(cookies) -> bool:
+    try:
+        return float(cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Marca com PRIMARY_PIN_COOKIE o cliente que acabou de escrever com sucesso.
+
+    read_only_paths lista rotas com método de escrita que não gravam nada (ex.:
+    POST /order/quote) e por isso não prendem o cliente ao primário.
+    """
+
+    def __init__(self, app, window_seconds: float, read_only_paths=()):
+        self.app = app
+        self.window_seconds = window_seconds
+        self.read_only_paths = frozenset(read_only_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS or scope["path"] in self.read_only_paths:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.window_seconds
+                cookie = f"{PRIMARY_PIN_COOKIE}={until:.3f}; Max-Age={int(self.window_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from threading import Lock
+from sqlalchemy.orm import Session
+from app.core.bloom import BloomFilter
+from app.core.metrics import record_cache_access
+from app.core.vars import TOKEN_REVOCATION_REFRESH_SECONDS, TOKEN_REVOCATION_FILTER_CAPACITY
+from app.models.revoked_token import RevokedToken
+import time
+
+
+class RevocationList:
+    """Espelho em memória de revoked_token_db.
+
+    Um token não revogado é respondido pelo filtro de Bloom sem acessar o banco;
+    apenas acertos do filtro (revogados de fato ou falsos positivos) consultam a tabela.
+    O filtro é reconstruído a cada TOKEN_REVOCATION_REFRESH_SECONDS para incorporar
+    revogações feitas por outros workers.
+    """
+
+    def __init__(self, refresh_seconds=TOKEN_REVOCATION_REFRESH_SECONDS, capacity=TOKEN_REVOCATION_FILTER_CAPACITY):
+        self.refresh_seconds = refresh_seconds
+        self.capacity = capacity
+        self._filter = BloomFilter(capacity)
+        self._loaded_at = None
+        self._lock = Lock()
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def refresh(self, session: Session):
+        now = datetime.now(timezone.utc)
+        jtis = [jti for (jti,) in session.query(RevokedToken.jti).filter(RevokedToken.expires_at > now)]
+        new_filter = BloomFilter(max(self.capacity, len(jtis) * 2))
+        for jti in jtis:
+            new_filter.add(jti)
+        with self._lock:
+            self._filter = new_filter
+            self._loaded_at = time.monotonic()
+
+    def add(self, jti: str):
+        with self._lock:
+            self._filter.add(jti)
+            saturated = self._filter.is_saturated()
+        if saturated:
+            self._loaded_at = None
+
+    def is_revoked(self, jti: str, session: Session):
+        if self._is_stale():
+            self.refresh(session)
+        if jti not in self._filter:
+            record_cache_access("token_revocation_filter", True)
+            return False
+        record_cache_access("token_revocation_filter", False)
+        return session.query(RevokedToken.jti).filter(RevokedToken.jti == jti).first() is not None
+
+    def clear(self):
+        with self._lock:
+            self._filter = BloomFilter(self.capacity)
+            self._loaded_at = None
+
+
+revocation_list = RevocationList()
@@ -1,5 +1,11 @@
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/login-docs")
\ No newline at end of file
+oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/login-docs")
+
+def __getattr__(name):
+    # passlib só é importado quando o hash de senhas é usado pela primeira vez.
+    if name == "bcrypt_context":
+        from passlib.context import CryptContext
+        globals()["bcrypt_context"] = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        return globals()["bcrypt_context"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
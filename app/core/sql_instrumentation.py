@@ -0,0 +1,118 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.core.vars import SLOW_QUERY_THRESHOLD_MS, N_PLUS_ONE_THRESHOLD, SQL_SLOWEST_STATEMENTS
+import heapq
+import json
+import logging
+import time
+
+logger = logging.getLogger("app.sql")
+
+_current_stats: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    def __init__(self, label=None):
+        self.label = label
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+        self._slowest = []
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+        item = (duration, self.count, statement)
+        if len(self._slowest) < SQL_SLOWEST_STATEMENTS:
+            heapq.heappush(self._slowest, item)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self):
+        return [(statement, duration) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+    def n_plus_one_candidates(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(label=None):
+    stats = QueryStats(label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _log(level, event_name, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps({"event": event_name, **fields}, default=str))
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if duration * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+            _log(
+                logging.WARNING,
+                "slow_query",
+                duration_ms=round(duration * 1000, 2),
+                statement=statement,
+                executemany=executemany,
+                request=stats.label if stats else None,
+            )
+
+
+class QueryTrackingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    timing = f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries"'
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                candidates = stats.n_plus_one_candidates()
+                if candidates:
+                    _log(
+                        logging.WARNING,
+                        "n_plus_one_candidate",
+                        request=stats.label,
+                        total_queries=stats.count,
+                        statements=[{"statement": s, "count": c} for s, c in candidates],
+                    )
+                _log(
+                    logging.DEBUG,
+                    "request_queries",
+                    request=stats.label,
+                    total_queries=stats.count,
+                    db_time_ms=round(stats.total_time * 1000, 2),
+                    slowest=[{"statement": s, "duration_ms": round(d * 1000, 2)} for s, d in stats.slowest],
+                )
@@ -0,0 +1,292 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+from uuid import uuid4
+import hashlib
+import hmac
+import os
+import re
+import shutil
+
+# Chaves geradas pela API: uuid4 + extensão. Nada de "/" ou "..", então a chave
+# pode virar nome de arquivo no disco ou caminho no bucket sem tratamento extra.
+KEY_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.[a-z0-9]{1,10}$")
+SIGV4_ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    size: int
+    content_type: str
+
+
+@dataclass(frozen=True)
+class PresignedUpload:
+    key: str
+    method: str
+    url: str
+    headers: dict
+    expires_at: datetime
+
+
+def new_key(filename: str, content_type: str | None = None) -> str:
+    import mimetypes
+
+    ext = re.sub(r"[^a-z0-9]", "", filename.rsplit(".", 1)[-1].lower())[:10] if "." in (filename or "") else ""
+    if not ext and content_type:
+        ext = (mimetypes.guess_extension(content_type) or "").lstrip(".")
+    return f"{uuid4()}.{ext or 'bin'}"
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(KEY_PATTERN.match(key or ""))
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _encode(value: str) -> str:
+    return quote(value, safe="-_.~")
+
+
+def presign_url(method: str,
+                url: str,
+                access_key: str,
+                secret_key: str,
+                region: str,
+                expires_seconds: int,
+                now: datetime,
+                headers: dict | None = None,
+                service: str = "s3") -> str:
+    """Assina a URL com AWS Signature V4 na query string (X-Amz-*).
+
+    headers entram na assinatura: quem usar a URL precisa enviá-los com os mesmos
+    valores (ex.: Content-Type no PUT). Parâmetros que já estão na query de url
+    (ex.: list-type=2) também são assinados. O corpo não é assinado (UNSIGNED-PAYLOAD).
+    """
+    parts = urlsplit(url)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{now:%Y%m%d}/{region}/{service}/aws4_request"
+    signed_headers = {"host": parts.netloc}
+    signed_headers.update({name.lower(): str(value).strip() for name, value in (headers or {}).items()})
+    names = sorted(signed_headers)
+
+    params = {
+        **dict(parse_qsl(parts.query, keep_blank_values=True)),
+        "X-Amz-Algorithm": SIGV4_ALGORITHM,
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(int(expires_seconds)),
+        "X-Amz-SignedHeaders": ";".join(names),
+    }
+    query = "&".join(f"{_encode(name)}={_encode(value)}" for name, value in sorted(params.items()))
+    path = quote(parts.path or "/", safe="/-_.~")
+    canonical_request = "\n".join([
+        method.upper(),
+        path,
+        query,
+        "".join(f"{name}:{signed_headers[name]}\n" for name in names),
+        ";".join(names),
+        UNSIGNED_PAYLOAD,
+    ])
+    string_to_sign = "\n".join([
+        SIGV4_ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+
+    signing_key = ("AWS4" + secret_key).encode()
+    for part in (f"{now:%Y%m%d}", region, service, "aws4_request"):
+        signing_key = _hmac_sha256(signing_key, part)
+    signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return f"{parts.scheme}://{parts.netloc}{path}?{query}&X-Amz-Signature={signature}"
+
+
+class LocalStorage:
+    """Arquivos em um diretório local (UPLOAD_DIR), servidos pela API em /images.
+
+    O upload direto aponta para PUT /uploads/{key} da própria API, autorizado por
+    um HMAC da chave, do Content-Type e da expiração em vez do token do admin.
+    """
+
+    def __init__(self, directory: str, secret_key: str, upload_path: str = "/uploads", public_path: str = "/images"):
+        self.directory = str(directory)
+        self.secret_key = secret_key
+        self.upload_path = upload_path
+        self.public_path = public_path
+
+    def url(self, key: str) -> str:
+        return f"{self.public_path}/{key}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def save(self, key: str, fileobj, content_type: str):
+        os.makedirs(self.directory, exist_ok=True)
+        partial = self.path(key) + ".part"
+        try:
+            with open(partial, "wb") as buffer:
+                shutil.copyfileobj(fileobj, buffer)
+            os.replace(partial, self.path(key))
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def stat(self, key: str) -> ObjectInfo | None:
+        import mimetypes
+
+        try:
+            size = os.stat(self.path(key)).st_size
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(size, mimetypes.guess_type(key)[0] or "application/octet-stream")
+
+    def delete(self, key: str):
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def _signature(self, key: str, content_type: str, expires: int) -> str:
+        message = f"PUT\n{key}\n{content_type}\n{expires}"
+        return hmac.new(self.secret_key.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    def presign_put(self, key: str, content_type: str, expires_seconds: int) -> PresignedUpload:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_seconds)
+        expires = int(expires_at.timestamp())
+        query = urlencode({"expires": expires, "signature": self._signature(key, content_type, expires)})
+        return PresignedUpload(key, "PUT", f"{self.upload_path}/{key}?{query}", {"Content-Type": content_type}, expires_at)
+
+    def verify_put(self, key: str, content_type: str, expires: int, signature: str) -> bool:
+        if expires < datetime.now(timezone.utc).timestamp():
+            return False
+        return hmac.compare_digest(self._signature(key, content_type, expires), signature)
+
+
+class S3Storage:
+    """Bucket compatível com S3 (AWS, MinIO, ...) acessado em path-style: {endpoint}/{bucket}/{key}.
+
+    Todas as chamadas usam URLs pré-assinadas, então o mesmo código de assinatura
+    serve para a API e para os uploads diretos dos clientes. Para leitura, as
+    imagens ficam em public_url/{key} quando o bucket é público (ou está atrás de
+    uma CDN); caso contrário cada resposta leva uma URL GET pré-assinada.
+    """
+
+    def __init__(self,
+                 endpoint_url: str,
+                 bucket: str,
+                 access_key: str,
+                 secret_key: str,
+                 region: str = "us-east-1",
+                 timeout: float = 10,
+                 transport=None,
+                 public_url: str | None = None,
+                 read_url_expires_seconds: int = 3600):
+        import httpx
+
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.read_url_expires_seconds = read_url_expires_seconds
+        self.client = httpx.Client(timeout=timeout, transport=transport)
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return self.presign("GET", key, self.read_url_expires_seconds)
+
+    def presign(self, method: str, key: str, expires_seconds: int, headers: dict | None = None, now: datetime | None = None) -> str:
+        return presign_url(
+            method, f"{self.endpoint_url}/{self.bucket}/{key}", self.access_key, self.secret_key,
+            self.region, expires_seconds, now or datetime.now(timezone.utc), headers,
+        )
+
+    def save(self, key: str, fileobj, content_type: str):
+        headers = {"Content-Type": content_type}
+        response = self.client.put(self.presign("PUT", key, 60, headers), content=fileobj.read(), headers=headers)
+        response.raise_for_status()
+
+    def stat(self, key: str) -> ObjectInfo | None:
+        response = self.client.head(self.presign("HEAD", key, 60))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return ObjectInfo(int(response.headers.get("content-length", 0)),
+                          response.headers.get("content-type", "application/octet-stream"))
+
+    def delete(self, key: str):
+        response = self.client.delete(self.presign("DELETE", key, 60))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    def list_objects(self, modified_before: datetime):
+        """Chaves do bucket modificadas antes de modified_before, página a página (ListObjectsV2)."""
+        from xml.etree import ElementTree
+
+        namespace = {"s3": "http://s3.amazonaws.com/doc/2006-03-01/"}
+        token = None
+        while True:
+            query = {"list-type": "2", **({"continuation-token": token} if token else {})}
+            url = presign_url("GET", f"{self.endpoint_url}/{self.bucket}?{urlencode(query)}", self.access_key,
+                              self.secret_key, self.region, 60, datetime.now(timezone.utc))
+            response = self.client.get(url)
+            response.raise_for_status()
+            root = ElementTree.fromstring(response.content)
+            for item in root.findall("s3:Contents", namespace):
+                modified = datetime.fromisoformat(item.findtext("s3:LastModified", namespaces=namespace).replace("Z", "+00:00"))
+                if modified < modified_before:
+                    yield item.findtext("s3:Key", namespaces=namespace)
+            token = root.findtext("s3:NextContinuationToken", namespaces=namespace)
+            if root.findtext("s3:IsTruncated", namespaces=namespace) != "true" or not token:
+                return
+
+    def presign_put(self, key: str, content_type: str, expires_seconds: int) -> PresignedUpload:
+        now = datetime.now(timezone.utc)
+        headers = {"Content-Type": content_type}
+        url = self.presign("PUT", key, expires_seconds, headers, now)
+        return PresignedUpload(key, "PUT", url, headers, now + timedelta(seconds=expires_seconds))
+
+
+def discard(storage, key: str):
+    """Remove um objeto recém-gravado cujo registro falhou, sem mascarar o erro original."""
+    try:
+        storage.delete(key)
+    except Exception:
+        pass
+
+
+def image_url(key: str) -> str:
+    """URL pública da imagem guardada em key.
+
+    Valores que já são URLs (com "/") passam sem alteração: assim uma resposta já
+    serializada, como as do cache de produtos, pode ser projetada de novo.
+    """
+    if not key or "/" in key:
+        return key
+    return get_storage().url(key)
+
+
+_storage = None
+
+
+def create_storage():
+    from app.core.vars import (
+        STORAGE_BACKEND, UPLOAD_DIR, SECRET_KEY, S3_ENDPOINT_URL, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY, S3_REGION,
+        S3_PUBLIC_URL, S3_READ_URL_EXPIRES_SECONDS
+    )
+
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_ENDPOINT_URL, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY, S3_REGION,
+                         public_url=S3_PUBLIC_URL, read_url_expires_seconds=S3_READ_URL_EXPIRES_SECONDS)
+    if STORAGE_BACKEND != "local":
+        raise ValueError(f"STORAGE_BACKEND desconhecido: {STORAGE_BACKEND!r}")
+    return LocalStorage(UPLOAD_DIR, SECRET_KEY)
+
+
+def get_storage():
+    """Backend configurado em STORAGE_BACKEND, criado no primeiro uso."""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
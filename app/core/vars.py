@@ -1,10 +1,75 @@
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+# .env na raiz do projeto; python-dotenv só é importado quando o arquivo existe.
+DOTENV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env")
+if os.path.exists(DOTENV_PATH):
+    from dotenv import load_dotenv
+    load_dotenv(DOTENV_PATH)
 
 DB_URL = os.getenv("DB_URL")
 UPLOAD_DIR = os.getenv("UPLOAD_DIR")
 JWT_EXPIRATION_TIME = os.getenv("JWT_EXPIRATION_TIME")
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
\ No newline at end of file
+ALGORITHM = os.getenv("ALGORITHM")
+TOKEN_REVOCATION_REFRESH_SECONDS = int(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "30"))
+TOKEN_REVOCATION_FILTER_CAPACITY = int(os.getenv("TOKEN_REVOCATION_FILTER_CAPACITY", "100000"))
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+SQL_SLOWEST_STATEMENTS = int(os.getenv("SQL_SLOWEST_STATEMENTS", "5"))
+
+ROLLUP_OVERLAP_SECONDS = int(os.getenv("ROLLUP_OVERLAP_SECONDS", "300"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "5000"))
+ORDER_ARCHIVE_BLOCK_SIZE = int(os.getenv("ORDER_ARCHIVE_BLOCK_SIZE", "256"))
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_POLL_SECONDS = float(os.getenv("IDEMPOTENCY_POLL_SECONDS", "0.05"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+
+CATEGORY_PAGE_SIZE = int(os.getenv("CATEGORY_PAGE_SIZE", "50"))
+CATEGORY_PAGE_MAX_SIZE = int(os.getenv("CATEGORY_PAGE_MAX_SIZE", "200"))
+
+BULK_ORDER_STATUS_LIMIT = int(os.getenv("BULK_ORDER_STATUS_LIMIT", "1000"))
+
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300"))
+PRICE_BOOK_TTL_SECONDS = float(os.getenv("PRICE_BOOK_TTL_SECONDS", "60"))
+PRODUCT_NEGATIVE_CACHE_SECONDS = float(os.getenv("PRODUCT_NEGATIVE_CACHE_SECONDS", "30"))
+PRODUCT_MULTI_GET_LIMIT = int(os.getenv("PRODUCT_MULTI_GET_LIMIT", "100"))
+
+# URLs das réplicas de leitura separadas por vírgula; vazio mantém tudo no primário.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", "5"))
+WARMUP_PRODUCT_CACHE_SIZE = int(os.getenv("WARMUP_PRODUCT_CACHE_SIZE", "1000"))
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+
+UPLOAD_GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", "86400"))
+UPLOAD_GC_BATCH_SIZE = int(os.getenv("UPLOAD_GC_BATCH_SIZE", "1000"))
+# Precisa estar no mesmo sistema de arquivos de UPLOAD_DIR e fora do diretório servido em /images.
+UPLOAD_QUARANTINE_DIR = os.getenv("UPLOAD_QUARANTINE_DIR")
+
+# "local" grava em UPLOAD_DIR; "s3" usa um bucket compatível com S3 (AWS, MinIO, ...).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "https://s3.amazonaws.com")
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+# Base pública das imagens (bucket público ou CDN); sem ela as respostas levam URLs GET pré-assinadas.
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+# Precisa ser maior que PRODUCT_CACHE_TTL_SECONDS: a URL pré-assinada fica guardada no cache de produtos.
+S3_READ_URL_EXPIRES_SECONDS = int(os.getenv("S3_READ_URL_EXPIRES_SECONDS", "3600"))
+UPLOAD_URL_EXPIRES_SECONDS = int(os.getenv("UPLOAD_URL_EXPIRES_SECONDS", "900"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
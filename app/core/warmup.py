@@ -0,0 +1,55 @@
+from uuid import uuid4
+from sqlalchemy.orm import sessionmaker
+import json
+import logging
+import time
+
+logger = logging.getLogger("app.warmup")
+
+
+def warm_pool(engine, connections: int):
+    """Abre até `connections` conexões ao mesmo tempo e as devolve ao pool já estabelecidas.
+
+    O limite é o tamanho fixo do pool: conexões de overflow seriam fechadas na devolução.
+    """
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        connections = min(connections, size())
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def warm_up(engine, replicas: list, pool_connections: int, product_cache_size: int):
+    """Prepara o worker antes de receber tráfego: pools, bcrypt, JWT, cache de produtos e livro de preços."""
+    from app.core.security import bcrypt_context
+    from app.core.price_book import price_book
+    from app.services.auth_service import AuthService
+    from app.services.product_service import ProductService
+
+    started = time.perf_counter()
+    connections = warm_pool(engine, pool_connections)
+    for replica in replicas:
+        warm_pool(replica, pool_connections)
+    bcrypt_context.hash("warmup")
+    AuthService.decode_token(AuthService.generate_token(uuid4()))
+
+    session = sessionmaker(bind=engine)()
+    try:
+        products = ProductService.warm_cache(session, product_cache_size)
+        priced = len(price_book.load(session))
+    finally:
+        session.close()
+
+    logger.info(json.dumps({
+        "event": "warmup_finished",
+        "pool_connections": connections,
+        "cached_products": products,
+        "price_book_products": priced,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }))
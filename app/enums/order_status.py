@@ -3,4 +3,14 @@ from enum import Enum
 class OrderStatus(str, Enum):
     OPEN = "aberto",
     DELIVERED = "entregue",
-    CANCELED = "cancelado"
\ No newline at end of file
+    CANCELED = "cancelado"
+
+# Estado atual -> estados para os quais o pedido pode ir
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.OPEN: (OrderStatus.DELIVERED, OrderStatus.CANCELED),
+    OrderStatus.DELIVERED: (),
+    OrderStatus.CANCELED: (),
+}
+
+def allowed_sources(target: OrderStatus):
+    return tuple(source for source, targets in ORDER_STATUS_TRANSITIONS.items() if target in targets)
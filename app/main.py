@@ -1,20 +1,79 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import JSONResponse
+from app.core.metrics import PrometheusMiddleware, instrument_pool, mark_process_dead, metrics_endpoint
+from app.core.sql_instrumentation import QueryTrackingMiddleware
+from app.core.replicas import ReadYourWritesMiddleware
+from app.core.warmup import warm_up
+from app.core.vars import STORAGE_BACKEND, READ_YOUR_WRITES_SECONDS, WARMUP_POOL_CONNECTIONS, WARMUP_PRODUCT_CACHE_SIZE, JOB_WORKERS
+from app.models.base import db, replicas
+from app.core.partitions import ensure_partitions
+from app.services.job_service import JobRunner
 import os
 
-os.makedirs("app/uploads/images", exist_ok=True)
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with db.begin() as connection:
+        ensure_partitions(connection)
+    warm_up(db, replicas, WARMUP_POOL_CONNECTIONS, WARMUP_PRODUCT_CACHE_SIZE)
+    job_runner = JobRunner(sessionmaker(bind=db), JOB_WORKERS)
+    if JOB_WORKERS > 0:
+        job_runner.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await job_runner.stop()
+    mark_process_dead()
 
-app.mount("/images", StaticFiles(directory="app/uploads/images"), name="images")
+async def liveness(request):
+    return JSONResponse({"status": "ok"})
 
-from app.api.routes.auth_routes import auth_router
-from app.api.routes.user_routes import user_router
-from app.api.routes.category_routes import category_router
-from app.api.routes.product_routes import product_router
-from app.api.routes.order_routes import order_router
+async def readiness(request):
+    """Só responde 200 depois do warmup, para o balanceador não enviar tráfego a um worker frio."""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "warming"}, status_code=503)
+    return JSONResponse({"status": "ready"})
 
-app.include_router(auth_router)
-app.include_router(user_router)
-app.include_router(category_router)
-app.include_router(product_router)
-app.include_router(order_router)
\ No newline at end of file
+def create_app() -> FastAPI:
+    from app.api.routes.auth_routes import auth_router
+    from app.api.routes.user_routes import user_router
+    from app.api.routes.category_routes import category_router
+    from app.api.routes.product_routes import product_router
+    from app.api.routes.order_routes import order_router
+    from app.api.routes.analytics_routes import analytics_router
+    from app.api.routes.upload_routes import upload_router
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+
+    app.add_middleware(QueryTrackingMiddleware)
+    if replicas:
+        app.add_middleware(ReadYourWritesMiddleware, window_seconds=READ_YOUR_WRITES_SECONDS, read_only_paths={"/order/quote"})
+    app.add_middleware(PrometheusMiddleware)
+    instrument_pool(db)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+    app.add_route("/health/live", liveness, include_in_schema=False)
+    app.add_route("/health/ready", readiness, include_in_schema=False)
+
+    if STORAGE_BACKEND == "local":
+        # Com S3 as respostas apontam direto para o bucket (ver S3Storage.url).
+        os.makedirs("app/uploads/images", exist_ok=True)
+        app.mount("/images", StaticFiles(directory="app/uploads/images"), name="images")
+
+    app.include_router(auth_router)
+    app.include_router(user_router)
+    app.include_router(category_router)
+    app.include_router(product_router)
+    app.include_router(order_router)
+    app.include_router(analytics_router)
+    app.include_router(upload_router)
+    return app
+
+def __getattr__(name):
+    # Mantém `uvicorn app.main:app` funcionando sem montar a aplicação no import do módulo.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -2,4 +2,9 @@ from app.models.category import Category
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.product import Product
-from app.models.user import User
\ No newline at end of file
+from app.models.user import User
+from app.models.revoked_token import RevokedToken
+from app.models.user_order_stats import UserOrderStats
+from app.models.sales_rollup import SalesRollup, RollupWatermark
+from app.models.idempotency_key import IdempotencyKey
+from app.models.job import Job
\ No newline at end of file
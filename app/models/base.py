@@ -1,6 +1,24 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import create_engine
-from app.core.vars import DB_URL
 
-db = create_engine(DB_URL)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def _create_engines():
+    from sqlalchemy import create_engine
+    from app.core.vars import DB_URL, DB_REPLICA_URLS, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_SECONDS
+    from app.core.sql_instrumentation import instrument_engine
+    from app.core.replicas import ReplicaRouter
+
+    db = create_engine(DB_URL)
+    instrument_engine(db)
+    replicas = [create_engine(url, pool_pre_ping=True) for url in DB_REPLICA_URLS]
+    for replica in replicas:
+        instrument_engine(replica)
+    globals().update(db=db, replicas=replicas, replica_router=ReplicaRouter(replicas, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_SECONDS))
+
+def __getattr__(name):
+    # Os engines (e o driver do banco) só são criados no primeiro uso: importar
+    # app.models, como faz o env.py do Alembic, não abre nem configura conexões.
+    if name in ("db", "replicas", "replica_router"):
+        _create_engines()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,9 +1,13 @@
 from app.models.base import Base
-from sqlalchemy import Column, String, UUID
+from sqlalchemy import Column, String, UUID, Index
 import uuid
 
 class Category(Base):
     __tablename__ = "category_db"
+    __table_args__ = (
+        # No Postgres a migração cria o índice sobre name COLLATE "C" (ver CategoryService.get_all_categories).
+        Index("ix_category_db_name_id", "name", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column("name", String, nullable=False)
@@ -0,0 +1,22 @@
+from app.models.base import Base
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Integer, Text
+from sqlalchemy.sql import func
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key_db"
+
+    user_id = Column("user_id", UUID(as_uuid=True), ForeignKey("user_db.id", ondelete="CASCADE"), primary_key=True)
+    key = Column("key", String(255), primary_key=True)
+    request_hash = Column("request_hash", String(64), nullable=False)
+    status_code = Column("status_code", Integer)
+    response_body = Column("response_body", Text)
+    locked_until = Column("locked_until", DateTime(timezone=True))
+    created_at = Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column("expires_at", DateTime(timezone=True), nullable=False, index=True)
+
+    def __init__(self, user_id, key, request_hash, expires_at, locked_until=None):
+        self.user_id = user_id
+        self.key = key
+        self.request_hash = request_hash
+        self.expires_at = expires_at
+        self.locked_until = locked_until
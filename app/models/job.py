@@ -0,0 +1,29 @@
+from app.models.base import Base
+from sqlalchemy import Column, String, UUID, DateTime, Integer, Text, Index
+from sqlalchemy.sql import func
+from datetime import datetime, timezone
+import uuid
+
+class Job(Base):
+    __tablename__ = "job_db"
+    __table_args__ = (
+        Index("ix_job_db_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column("kind", String, nullable=False)
+    payload = Column("payload", Text, nullable=False)
+    status = Column("status", String, nullable=False, default="pending", server_default="pending")
+    attempts = Column("attempts", Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column("max_attempts", Integer, nullable=False)
+    run_at = Column("run_at", DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_at = Column("locked_at", DateTime(timezone=True))
+    last_error = Column("last_error", Text)
+    created_at = Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __init__(self, kind, payload, max_attempts, run_at=None):
+        self.kind = kind
+        self.payload = payload
+        self.max_attempts = max_attempts
+        if run_at is not None:
+            self.run_at = run_at
\ No newline at end of file
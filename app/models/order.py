@@ -1,20 +1,24 @@
 from app.models.base import Base
-from sqlalchemy import Column, Enum, UUID, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Enum, UUID, Float, ForeignKey, DateTime, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.enums.order_status import OrderStatus
-import uuid
+from app.core.ids import uuid7
+from datetime import datetime, timezone
 
 class Order(Base):
     __tablename__ = "order_db"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column("user_id", ForeignKey("user_db.id"), nullable=False)
     total = Column("total", Float, default=0, nullable=False)
     status = Column(Enum(OrderStatus, name="status"), nullable=False, default=OrderStatus.OPEN)
     items = relationship("OrderItem", cascade="all, delete")
-    created_at = Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+    version = Column("version", Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __init__(self, user_id, status=OrderStatus.OPEN):
         self.user_id = user_id
@@ -1,10 +1,15 @@
 from app.models.base import Base
-from sqlalchemy import Column, UUID, ForeignKey, Integer, Float
+from sqlalchemy import Column, UUID, ForeignKey, Integer, Float, DateTime, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 
 class OrderItem(Base):
     __tablename__ = "order_item_db"
+    __table_args__ = (
+        Index("ix_order_item_db_order_id_created_at", "order_id", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     order_id = Column("order_id", ForeignKey("order_db.id"), nullable=False)
@@ -12,10 +17,13 @@ class OrderItem(Base):
     product = relationship("Product", lazy="joined")
     quantity = Column("quantity", Integer, nullable=False)
     price = Column("price", Float, nullable=False)
+    created_at = Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now(), nullable=False)
     
-    def __init__(self, order_id, product_id, quantity, price):
+    def __init__(self, order_id, product_id, quantity, price, created_at=None):
         self.order_id = order_id
         self.product_id = product_id
         self.quantity = quantity
         self.price = price
+        if created_at is not None:
+            self.created_at = created_at
 
@@ -1,5 +1,5 @@
 from app.models.base import Base
-from sqlalchemy import Column, UUID, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, UUID, String, Float, Boolean, ForeignKey, Integer
 import uuid
 
 class Product(Base):
@@ -13,6 +13,7 @@ class Product(Base):
     category_id = Column("category_id", ForeignKey("category_db.id"), nullable=False)
     is_active = Column("is_active", Boolean, default=True)
     image_url = Column("image_url", String)
+    version = Column("version", Integer, nullable=False, default=1, server_default="1")
 
     def __init__(self, name, slug, description, price, category_id, image_url, is_active=True):
         self.name = name
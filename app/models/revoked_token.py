@@ -0,0 +1,16 @@
+from app.models.base import Base
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime
+from sqlalchemy.sql import func
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token_db"
+
+    jti = Column("jti", String, primary_key=True)
+    user_id = Column("user_id", UUID(as_uuid=True), ForeignKey("user_db.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column("expires_at", DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column("revoked_at", DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __init__(self, jti, user_id, expires_at):
+        self.jti = jti
+        self.user_id = user_id
+        self.expires_at = expires_at
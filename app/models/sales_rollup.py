@@ -0,0 +1,36 @@
+from app.models.base import Base
+from sqlalchemy import Column, UUID, String, Integer, Float, DateTime, Index
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollup_db"
+    __table_args__ = (
+        Index("ix_sales_rollup_db_granularity_bucket", "granularity", "bucket_start"),
+        Index("ix_sales_rollup_db_granularity_category_bucket", "granularity", "category_id", "bucket_start"),
+    )
+
+    granularity = Column("granularity", String, primary_key=True)
+    bucket_start = Column("bucket_start", DateTime(timezone=True), primary_key=True)
+    product_id = Column("product_id", UUID(as_uuid=True), primary_key=True)
+    category_id = Column("category_id", UUID(as_uuid=True), nullable=False)
+    orders_count = Column("orders_count", Integer, nullable=False)
+    quantity = Column("quantity", Integer, nullable=False)
+    revenue = Column("revenue", Float, nullable=False)
+
+    def __init__(self, granularity, bucket_start, product_id, category_id, orders_count, quantity, revenue):
+        self.granularity = granularity
+        self.bucket_start = bucket_start
+        self.product_id = product_id
+        self.category_id = category_id
+        self.orders_count = orders_count
+        self.quantity = quantity
+        self.revenue = revenue
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermark_db"
+
+    name = Column("name", String, primary_key=True)
+    value = Column("value", DateTime(timezone=True), nullable=False)
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
@@ -0,0 +1,22 @@
+from app.models.base import Base
+from sqlalchemy import Column, UUID, ForeignKey, Integer, Float, DateTime
+from sqlalchemy.sql import func
+
+class UserOrderStats(Base):
+    __tablename__ = "user_order_stats_db"
+
+    user_id = Column("user_id", UUID(as_uuid=True), ForeignKey("user_db.id", ondelete="CASCADE"), primary_key=True)
+    orders_count = Column("orders_count", Integer, default=0, nullable=False)
+    delivered_count = Column("delivered_count", Integer, default=0, nullable=False)
+    canceled_count = Column("canceled_count", Integer, default=0, nullable=False)
+    total_spent = Column("total_spent", Float, default=0, nullable=False)
+    last_order_at = Column("last_order_at", DateTime(timezone=True))
+    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __init__(self, user_id, orders_count=0, delivered_count=0, canceled_count=0, total_spent=0, last_order_at=None):
+        self.user_id = user_id
+        self.orders_count = orders_count
+        self.delivered_count = delivered_count
+        self.canceled_count = canceled_count
+        self.total_spent = total_spent
+        self.last_order_at = last_order_at
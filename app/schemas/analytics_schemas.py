@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+
+class RevenueBucketSchema(BaseModel):
+    bucket_start: datetime
+    quantity: int
+    revenue: float
+
+class ProductRevenueSchema(BaseModel):
+    product_id: UUID
+    category_id: UUID
+    orders_count: int
+    quantity: int
+    revenue: float
+
+class CategoryRevenueSchema(BaseModel):
+    category_id: UUID
+    quantity: int
+    revenue: float
\ No newline at end of file
@@ -16,6 +16,9 @@ class LoginSchema(BaseModel):
     class Config:
         from_attributes = True
 
+class LogoutSchema(BaseModel):
+    refresh_token: str | None = None
+
 class AuthResponseSchema:
     access_token: str
     refresh_token: str
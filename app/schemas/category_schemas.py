@@ -1,15 +1,21 @@
 from pydantic import BaseModel
 from uuid import UUID
+from app.schemas.upload_schemas import ImageUrl
 
 class CategoryResponseSchema(BaseModel):
     id: UUID
     name: str
     slug: str
-    image_url: str
+    image_url: ImageUrl
 
     class Config:
         from_attributes = True
 
+class CreateCategorySchema(BaseModel):
+    name: str
+    slug: str
+    image_key: str
+
 class UpdateCategoryNameAndSlugSchema(BaseModel):
     name: str
     slug: str
@@ -19,6 +19,20 @@ class CreateOrderSchema(BaseModel):
     class Config:
         from_attributes = True
 
+class QuoteOrderSchema(BaseModel):
+    items: list[ItemSchema]
+
+class QuoteItemSchema(BaseModel):
+    id: UUID
+    name: str
+    quantity: float
+    price: float
+    total: float
+
+class OrderQuoteSchema(BaseModel):
+    items: list[QuoteItemSchema]
+    total: float
+
 class OrderItemSchema(BaseModel):
     id: UUID
     quantity: int
@@ -32,7 +46,38 @@ class OrderResponseSchema(BaseModel):
     status: OrderStatus
     created_at: datetime
     updated_at: datetime
+    version: int
     items: list[OrderItemSchema]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserOrderStatsSchema(BaseModel):
+    user_id: UUID
+    orders_count: int
+    delivered_count: int
+    canceled_count: int
+    total_spent: float
+    last_order_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+class BulkOrderFilterSchema(BaseModel):
+    user_id: UUID | None = None
+    created_from: datetime | None = None
+    created_until: datetime | None = None
+
+class BulkOrderStatusSchema(BaseModel):
+    ids: list[UUID] | None = None
+    filter: BulkOrderFilterSchema | None = None
+
+class BulkOrderFailureSchema(BaseModel):
+    id: UUID
+    status: OrderStatus | None
+    detail: str
+
+class BulkOrderStatusResultSchema(BaseModel):
+    updated: list[UUID]
+    unchanged: list[UUID]
+    failed: list[BulkOrderFailureSchema]
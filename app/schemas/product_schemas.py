@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from uuid import UUID
+from app.schemas.upload_schemas import ImageUrl
 
 class ProductResponseSchema(BaseModel):
     id: UUID
@@ -7,13 +8,26 @@ class ProductResponseSchema(BaseModel):
     slug: str
     description: str
     price: float
-    image_url: str
+    image_url: ImageUrl
     category_id: UUID
     is_active: bool
 
     class Config:
         from_attributes = True
 
+class CreateProductSchema(BaseModel):
+    name: str
+    slug: str
+    description: str
+    price: float
+    category_id: UUID
+    image_key: str
+
+class ProductLookupSchema(BaseModel):
+    key: str
+    found: bool
+    product: ProductResponseSchema | None
+
 class UpdateProductSchema(BaseModel):
     name: str
     slug: str
@@ -22,4 +36,28 @@ class UpdateProductSchema(BaseModel):
     category_id: UUID
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductFilterSchema(BaseModel):
+    name: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+
+class BulkProductSelectionSchema(BaseModel):
+    slugs: list[str] | None = None
+    category_slug: str | None = None
+    filter: ProductFilterSchema | None = None
+
+class BulkProductResultSchema(BaseModel):
+    updated: list[str]
+    unchanged: list[str]
+    not_found: list[str]
+
+class CacheStatsSchema(BaseModel):
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
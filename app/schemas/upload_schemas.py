@@ -0,0 +1,24 @@
+from pydantic import BaseModel, PlainSerializer
+from datetime import datetime
+from typing import Annotated
+from app.core.storage import image_url
+
+# Chave da imagem no banco; nas respostas vira a URL de leitura do storage configurado.
+ImageUrl = Annotated[str, PlainSerializer(image_url, return_type=str)]
+
+class CreateUploadSchema(BaseModel):
+    filename: str
+    content_type: str
+
+class UploadResponseSchema(BaseModel):
+    key: str
+    method: str
+    url: str
+    headers: dict[str, str]
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class UploadedImageSchema(BaseModel):
+    image_key: str
\ No newline at end of file
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete, func, desc
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.models.sales_rollup import SalesRollup, RollupWatermark
+from app.enums.order_status import OrderStatus
+from app.core.vars import ROLLUP_OVERLAP_SECONDS
+from app.core.order_archive import OrderArchive, order_archive
+from app.services.order_archive_service import OrderArchiveService
+
+WATERMARK_NAME = "sales_rollup"
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = (HOUR, DAY)
+
+
+def _as_utc(value: datetime):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _day_start(value: datetime):
+    return _as_utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class AnalyticsService:
+    def _check_admin(auth_user: User):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+
+    def _archived_rows(session: Session, day: datetime, next_day: datetime, archive: OrderArchive):
+        """Linhas no formato de _rebuild_day para os pedidos do dia que já foram arquivados."""
+        records = [
+            record for record in OrderArchiveService.archived_records(session, since=day, until=next_day, archive=archive)
+            if record["status"] != OrderStatus.CANCELED.value
+        ]
+        product_ids = {UUID(item["product_id"]) for record in records for item in record["items"]}
+        categories = {}
+        if product_ids:
+            categories = dict(session.execute(select(Product.id, Product.category_id).where(Product.id.in_(product_ids))).all())
+
+        rows = []
+        for record in records:
+            for item in record["items"]:
+                product_id = UUID(item["product_id"])
+                if product_id in categories:
+                    rows.append((UUID(record["id"]), datetime.fromisoformat(record["created_at"]), product_id,
+                                 categories[product_id], item["quantity"], item["price"]))
+        return rows
+
+    def _rebuild_day(session: Session, day: datetime, archive: OrderArchive = order_archive):
+        next_day = day + timedelta(days=1)
+        rows = session.execute(
+            select(Order.id, Order.created_at, OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.price)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(Order.created_at >= day, Order.created_at < next_day)
+            .where(Order.status != OrderStatus.CANCELED)
+        ).all()
+        # Dias com pedidos arquivados seriam recalculados só com o que restou em order_db.
+        rows += AnalyticsService._archived_rows(session, day, next_day, archive)
+
+        buckets = defaultdict(lambda: [None, set(), 0, 0.0])
+        for order_id, created_at, product_id, category_id, quantity, price in rows:
+            hour = _as_utc(created_at).replace(minute=0, second=0, microsecond=0)
+            for key in ((HOUR, hour, product_id), (DAY, day, product_id)):
+                bucket = buckets[key]
+                bucket[0] = category_id
+                bucket[1].add(order_id)
+                bucket[2] += quantity
+                bucket[3] += quantity * price
+
+        session.execute(
+            delete(SalesRollup)
+            .where(SalesRollup.bucket_start >= day, SalesRollup.bucket_start < next_day)
+        )
+        session.add_all(
+            SalesRollup(granularity, bucket_start, product_id, category_id, len(order_ids), quantity, revenue)
+            for (granularity, bucket_start, product_id), (category_id, order_ids, quantity, revenue) in buckets.items()
+        )
+
+    def refresh_rollups(session: Session, archive: OrderArchive = order_archive):
+        """Recalcula apenas os dias com pedidos alterados desde o último watermark.
+
+        O watermark recua ROLLUP_OVERLAP_SECONDS para incluir transações que
+        confirmaram depois da última execução com updated_at anterior a ela;
+        como cada dia é recalculado por inteiro, reprocessar é idempotente.
+        """
+        watermark = session.get(RollupWatermark, WATERMARK_NAME)
+        query = select(Order.created_at, Order.updated_at)
+        if watermark:
+            query = query.where(Order.updated_at > _as_utc(watermark.value) - timedelta(seconds=ROLLUP_OVERLAP_SECONDS))
+
+        days = set()
+        new_value = _as_utc(watermark.value) if watermark else None
+        for created_at, updated_at in session.execute(query.execution_options(yield_per=5000)):
+            days.add(_day_start(created_at))
+            updated_at = _as_utc(updated_at)
+            if new_value is None or updated_at > new_value:
+                new_value = updated_at
+
+        for day in sorted(days):
+            AnalyticsService._rebuild_day(session, day, archive)
+            session.commit()
+
+        if new_value is not None:
+            watermark = session.get(RollupWatermark, WATERMARK_NAME)
+            if watermark:
+                watermark.value = new_value
+            else:
+                session.add(RollupWatermark(WATERMARK_NAME, new_value))
+            session.commit()
+        return len(days)
+
+    def _range(query, start: datetime, end: datetime, granularity: str):
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail="Granularidade inválida")
+        if start and end and start >= end:
+            raise HTTPException(status_code=400, detail="Intervalo de datas inválido")
+        query = query.where(SalesRollup.granularity == granularity)
+        if start:
+            query = query.where(SalesRollup.bucket_start >= start)
+        if end:
+            query = query.where(SalesRollup.bucket_start < end)
+        return query
+
+    def revenue_over_time(start: datetime, end: datetime, granularity: str, session: Session, auth_user: User):
+        AnalyticsService._check_admin(auth_user)
+        query = AnalyticsService._range(
+            select(SalesRollup.bucket_start, func.sum(SalesRollup.quantity), func.sum(SalesRollup.revenue)),
+            start, end, granularity,
+        ).group_by(SalesRollup.bucket_start).order_by(SalesRollup.bucket_start)
+        return [
+            {"bucket_start": _as_utc(bucket_start), "quantity": quantity, "revenue": revenue}
+            for bucket_start, quantity, revenue in session.execute(query)
+        ]
+
+    def revenue_by_product(start: datetime, end: datetime, limit: int, session: Session, auth_user: User):
+        AnalyticsService._check_admin(auth_user)
+        revenue = func.sum(SalesRollup.revenue).label("revenue")
+        query = AnalyticsService._range(
+            select(SalesRollup.product_id, SalesRollup.category_id, func.sum(SalesRollup.orders_count),
+                   func.sum(SalesRollup.quantity), revenue),
+            start, end, DAY,
+        ).group_by(SalesRollup.product_id, SalesRollup.category_id).order_by(desc(revenue)).limit(limit)
+        return [
+            {"product_id": product_id, "category_id": category_id, "orders_count": orders_count,
+             "quantity": quantity, "revenue": revenue}
+            for product_id, category_id, orders_count, quantity, revenue in session.execute(query)
+        ]
+
+    def revenue_by_category(start: datetime, end: datetime, session: Session, auth_user: User):
+        AnalyticsService._check_admin(auth_user)
+        revenue = func.sum(SalesRollup.revenue).label("revenue")
+        query = AnalyticsService._range(
+            select(SalesRollup.category_id, func.sum(SalesRollup.quantity), revenue),
+            start, end, DAY,
+        ).group_by(SalesRollup.category_id).order_by(desc(revenue))
+        return [
+            {"category_id": category_id, "quantity": quantity, "revenue": revenue}
+            for category_id, quantity, revenue in session.execute(query)
+        ]
@@ -1,22 +1,52 @@
 from sqlalchemy.orm import Session
-from app.schemas.auth_schemas import RegisterSchema, LoginSchema, AuthResponseSchema
+from app.schemas.auth_schemas import RegisterSchema, LoginSchema, AuthResponseSchema, LogoutSchema
 from fastapi import HTTPException
 from app.models.user import User
-from app.core.security import bcrypt_context
+from app.models.revoked_token import RevokedToken
+from app.core import security
+from app.core.revocation import revocation_list
 from datetime import timedelta, datetime, timezone
 from app.core.vars import JWT_EXPIRATION_TIME, SECRET_KEY, ALGORITHM
-from jose import jwt
 from fastapi.security import OAuth2PasswordRequestForm
+from uuid import UUID, uuid4
 
 
 class AuthService:
 
     @staticmethod
     def generate_token(user_id, duration=timedelta(minutes=int(JWT_EXPIRATION_TIME))):
+        from jose import jwt
+
         expiration_date = datetime.now(timezone.utc) + duration
-        dic_info = {"sub": str(user_id), "exp": expiration_date}
+        dic_info = {"sub": str(user_id), "exp": expiration_date, "jti": str(uuid4())}
         token = jwt.encode(dic_info, SECRET_KEY, ALGORITHM)
         return token
+
+    @staticmethod
+    def decode_token(token: str):
+        from jose import jwt, JWTError
+
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Acesso negado")
+
+    @staticmethod
+    def is_token_revoked(dic_info: dict, session: Session):
+        jti = dic_info.get("jti")
+        if not jti:
+            return False
+        return revocation_list.is_revoked(jti, session)
+
+    @staticmethod
+    def revoke_token(dic_info: dict, session: Session):
+        jti = dic_info.get("jti")
+        if not jti:
+            return
+        if session.query(RevokedToken.jti).filter(RevokedToken.jti == jti).first():
+            return
+        expires_at = datetime.fromtimestamp(dic_info["exp"], timezone.utc)
+        session.add(RevokedToken(jti, UUID(dic_info.get("sub")), expires_at))
     
     @staticmethod
     def register(body: RegisterSchema, session: Session):
@@ -29,7 +59,7 @@ class AuthService:
         if len(body.password) < 8:
             raise HTTPException(status_code=400, detail="Campo senha precisa conter 8 ou mais caracteres")
         
-        hashed_password = bcrypt_context.hash(body.password)
+        hashed_password = security.bcrypt_context.hash(body.password)
         user = User(body.first_name, body.last_name, body.email, hashed_password)
         session.add(user)
         session.commit()
@@ -47,7 +77,7 @@ class AuthService:
         if not user:
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
         
-        if not bcrypt_context.verify(body.password, user.password):
+        if not security.bcrypt_context.verify(body.password, user.password):
             raise HTTPException(status_code=400, detail="Email ou senha incorretos")
         
         token = AuthService.generate_token(user.id)
@@ -62,13 +92,34 @@ class AuthService:
 
         return AuthResponseSchema(token, refresh_token)
     
+    @staticmethod
+    def logout(token: str, body: LogoutSchema, session: Session, auth_user: User):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Acesso negado")
+
+        tokens = [AuthService.decode_token(token)]
+        if body and body.refresh_token:
+            refresh_info = AuthService.decode_token(body.refresh_token)
+            if refresh_info.get("sub") != str(auth_user.id):
+                raise HTTPException(status_code=403, detail="Operação não autorizada")
+            tokens.append(refresh_info)
+
+        for dic_info in tokens:
+            AuthService.revoke_token(dic_info, session)
+        session.commit()
+
+        for dic_info in tokens:
+            if dic_info.get("jti"):
+                revocation_list.add(dic_info["jti"])
+        return {"message": "Sessão encerrada com sucesso"}
+
     def login_docs(body: OAuth2PasswordRequestForm, session: Session):
         user = session.query(User).filter(User.email == body.username).first()
 
         if not user:
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
         
-        if not bcrypt_context.verify(body.password, user.password):
+        if not security.bcrypt_context.verify(body.password, user.password):
             raise HTTPException(status_code=400, detail="Email ou senha incorretos")
     
         token = AuthService.generate_token(user.id)
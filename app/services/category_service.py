@@ -1,17 +1,61 @@
 from uuid import UUID, uuid4
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.category import Category
-from app.schemas.category_schemas import UpdateCategoryNameAndSlugSchema
+from app.schemas.category_schemas import CreateCategorySchema, UpdateCategoryNameAndSlugSchema
+from app.schemas.upload_schemas import UploadedImageSchema
 from fastapi import UploadFile, HTTPException
-from app.core.vars import UPLOAD_DIR
 from app.models.user import User
-import os
-import shutil
+from app.core.jobs import DELETE_OBJECT
+from app.core.storage import discard, get_storage, new_key
+from app.services.job_service import JobService
+from app.services.upload_service import UploadService
+import base64
+import json
+
+
+def _name_key(session: Session):
+    # Ordem por bytes, igual à do índice ix_category_db_name_id: no Postgres é
+    # preciso COLLATE "C" para que o LIKE 'prefixo%' também use o índice.
+    if session.get_bind().dialect.name == "postgresql":
+        return Category.name.collate("C")
+    return Category.name
+
+
+def encode_cursor(category: Category) -> str:
+    raw = json.dumps([category.name, str(category.id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(decoded, list) and len(decoded) == 2 and all(isinstance(value, str) for value in decoded):
+            return decoded[0], UUID(decoded[1])
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail="Cursor inválido")
+
 
 class CategoryService:
-    def get_all_categories(session: Session):
-        categories = session.query(Category).all()
-        return categories
+    def get_all_categories(session: Session, limit: int, cursor: str | None = None, prefix: str | None = None):
+        """Uma página de categorias em ordem de (name, id) e o cursor da próxima, ou None na última.
+
+        Paginação por keyset: cada página é uma busca no índice a partir do último
+        (name, id) visto, com custo independente da posição na listagem.
+        """
+        name_key = _name_key(session)
+        query = session.query(Category)
+        if prefix:
+            escaped = prefix.replace("/", "//").replace("%", "/%").replace("_", "/_")
+            query = query.filter(name_key.like(escaped + "%", escape="/"))
+        if cursor:
+            query = query.filter(tuple_(name_key, Category.id) > tuple_(*decode_cursor(cursor)))
+
+        categories = query.order_by(name_key, Category.id).limit(limit + 1).all()
+        if len(categories) <= limit:
+            return categories, None
+        return categories[:limit], encode_cursor(categories[limit - 1])
     
     def get_category(slug: str, session: Session):
         category = session.query(Category).filter(Category.slug==slug).first()
@@ -39,27 +83,42 @@ class CategoryService:
         if exist_category:
             raise HTTPException(status_code=400, detail="Slug já existente")
         
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-        ext = image.filename.split(".")[-1]
-        filename = f"{uuid4()}.{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-
+        storage = get_storage()
+        key = new_key(image.filename, image.content_type)
 
         try:
-            with open(filepath, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            storage.save(key, image.file, image.content_type)
 
-            category = Category(name, slug, filename)
+            category = Category(name, slug, key)
             session.add(category)
             session.commit()
             return category
         except Exception as e:
             session.rollback()
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            discard(storage, key)
             raise HTTPException(status_code=500, detail="Erro do servidor")
 
+    def create_category_from_upload(body: CreateCategorySchema, session: Session, auth_user: User):
+        """Registra uma categoria cuja imagem já foi enviada por URL pré-assinada."""
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+        if not body.name:
+            raise HTTPException(status_code=400, detail="Nome do produto inválido")
+        if not body.slug:
+            raise HTTPException(status_code=400, detail="Slug do produto inválido")
+
+        exist_category = session.query(Category).filter(Category.slug==body.slug).first()
+        if exist_category:
+            raise HTTPException(status_code=400, detail="Slug já existente")
+        UploadService.check_uploaded(body.image_key, session)
+
+        category = Category(body.name, body.slug, body.image_key)
+        session.add(category)
+        session.commit()
+        return category
+
     def update_category(slug: str,
                         body: UpdateCategoryNameAndSlugSchema, 
                         session: Session,
@@ -96,26 +155,38 @@ class CategoryService:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
         
 
+        storage = get_storage()
+        key = new_key(image.filename, image.content_type)
+
         try:
-            filepath = os.path.join(UPLOAD_DIR, category.image_url)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-
-            ext = image.filename.split(".")[-1]
-            filename = f"{uuid4()}.{ext}"
-            filepath = os.path.join(UPLOAD_DIR, filename)
-            with open(filepath, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-                
-            category.image_url = filename
+            storage.save(key, image.file, image.content_type)
+
+            JobService.enqueue(session, DELETE_OBJECT, key=category.image_url)
+            category.image_url = key
             session.commit()
             return category
         except Exception as e:
             session.rollback()
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            discard(storage, key)
             raise HTTPException(status_code=500, detail="Erro do servidor")
 
+    def set_category_image(slug: str, body: UploadedImageSchema, session: Session, auth_user: User):
+        """Troca a imagem por um upload direto já concluído; a antiga é apagada por um job."""
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+
+        category = session.query(Category).filter(Category.slug==slug).first()
+        if not category:
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
+        UploadService.check_uploaded(body.image_key, session)
+
+        JobService.enqueue(session, DELETE_OBJECT, key=category.image_url)
+        category.image_url = body.image_key
+        session.commit()
+        return category
+
     def delete_category(slug: str, session: Session, auth_user: User):
         if not auth_user:
             raise HTTPException(status_code=401, detail="Não autenticado")
@@ -127,13 +198,9 @@ class CategoryService:
             raise HTTPException(status_code=404, detail="Falha ao deletar. Categoria não encontrada")
     
         try:
-            filepath = os.path.join(UPLOAD_DIR, category.image_url)
-
             session.delete(category)
+            JobService.enqueue(session, DELETE_OBJECT, key=category.image_url)
             session.commit()
-
-            if os.path.exists(filepath):
-                os.remove(filepath)
         except:
             session.rollback()
             raise HTTPException(status_code=500, detail="Erro do servidor")
\ No newline at end of file
@@ -0,0 +1,141 @@
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app.models.user import User
+from app.models.idempotency_key import IdempotencyKey
+from app.core.vars import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_WAIT_SECONDS, IDEMPOTENCY_POLL_SECONDS, IDEMPOTENCY_LOCK_SECONDS
+import asyncio
+import hashlib
+import json
+import time
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def _as_utc(value: datetime):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class IdempotencyService:
+    def fingerprint(method: str, path: str, payload) -> str:
+        canonical = json.dumps({"method": method, "path": path, "body": payload}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _claim(session: Session, user_id: UUID, key: str, request_hash: str):
+        """Registra a chave como em andamento até locked_until.
+
+        Retorna (locked_until, None) se conseguiu ou (None, registro) com o registro que
+        já existe. A chave primária (user_id, key) garante que apenas uma requisição vence
+        a corrida, mesmo entre workers diferentes. Uma chave ainda em andamento depois
+        de locked_until (processo que caiu antes de responder) é retomada por um UPDATE
+        condicional, que também só uma requisição vence.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            locked_until = now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+            expires_at = now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+            try:
+                session.execute(
+                    insert(IdempotencyKey).values(user_id=user_id, key=key, request_hash=request_hash,
+                                                  expires_at=expires_at, locked_until=locked_until)
+                )
+                session.commit()
+                return locked_until, None
+            except IntegrityError:
+                session.rollback()
+
+            record = session.get(IdempotencyKey, (user_id, key), populate_existing=True)
+            if record is None:
+                continue
+            if _as_utc(record.expires_at) <= now:
+                session.delete(record)
+                session.commit()
+                continue
+            abandoned = (
+                record.status_code is None
+                and record.request_hash == request_hash
+                and record.locked_until is not None
+                and _as_utc(record.locked_until) <= now
+            )
+            if not abandoned:
+                return None, record
+
+            result = session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key,
+                       IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until == record.locked_until)
+                .values(locked_until=locked_until, expires_at=expires_at)
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return locked_until, None
+
+    def _replay(record: IdempotencyKey):
+        return JSONResponse(
+            content=json.loads(record.response_body),
+            status_code=record.status_code,
+            headers={REPLAY_HEADER: "true"},
+        )
+
+    async def execute(key: str, request_hash: str, session: Session, auth_user: User, handler: Callable[[], dict]):
+        """Executa handler uma única vez por (usuário, Idempotency-Key).
+
+        Repetições recebem a resposta armazenada sem executar handler; duplicatas
+        concorrentes aguardam a requisição em andamento por até IDEMPOTENCY_WAIT_SECONDS.
+        handler não deve fazer commit: a resposta é gravada na mesma transação do que
+        ele escreveu, então todo pedido confirmado tem a resposta para repetição. Se o
+        processo cair antes do commit, nada foi gravado e a chave pode ser retomada
+        depois de IDEMPOTENCY_LOCK_SECONDS.
+        """
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key inválida")
+
+        user_id = auth_user.id
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            locked_until, record = IdempotencyService._claim(session, user_id, key, request_hash)
+            if record is None:
+                break
+            if record.request_hash != request_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key já utilizada com outra requisição")
+            if record.status_code is not None:
+                return IdempotencyService._replay(record)
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key ainda em andamento")
+            session.rollback()
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        owned = (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.locked_until == locked_until)
+        try:
+            body = handler()
+            # Se outra requisição retomou a chave (esta passou de locked_until), o
+            # UPDATE não encontra a linha e o que handler escreveu é desfeito.
+            result = session.execute(
+                update(IdempotencyKey)
+                .where(*owned, IdempotencyKey.status_code.is_(None))
+                .values(status_code=200, response_body=json.dumps(body), locked_until=None)
+            )
+            if result.rowcount != 1:
+                raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key ainda em andamento")
+            session.commit()
+        except:
+            session.rollback()
+            session.execute(delete(IdempotencyKey).where(*owned))
+            session.commit()
+            raise
+        return JSONResponse(content=body, status_code=200)
+
+    def purge_expired(session: Session):
+        result = session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc)))
+        session.commit()
+        return result.rowcount
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, select, update, delete, and_, or_
+from sqlalchemy.orm import Session
+from app.models.job import Job
+from app.core.jobs import REMOVE_FILE, DELETE_OBJECT, handler_for, register
+from app.core.storage import get_storage
+from app.core.vars import (
+    JOB_MAX_ATTEMPTS, JOB_BACKOFF_SECONDS, JOB_BACKOFF_MAX_SECONDS, JOB_LOCK_TIMEOUT_SECONDS, JOB_POLL_SECONDS
+)
+import asyncio
+import json
+import logging
+import os
+import traceback
+
+PENDING = "pending"
+RUNNING = "running"
+FAILED = "failed"
+
+logger = logging.getLogger("app.jobs")
+
+_runners = set()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_runners(session):
+    if session.info.pop("jobs_enqueued", False):
+        for runner in list(_runners):
+            runner.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("jobs_enqueued", None)
+
+
+class JobService:
+    def enqueue(session: Session, kind: str, delay_seconds: float = 0, **payload):
+        """Adiciona o job à transação da sessão: ele só existe (e só roda) se o commit acontecer."""
+        run_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        job = Job(kind, json.dumps(payload), JOB_MAX_ATTEMPTS, run_at)
+        session.add(job)
+        session.info["jobs_enqueued"] = True
+        return job
+
+    def claim(session: Session):
+        """Reserva o próximo job vencido (ou abandonado por um worker que caiu).
+
+        Um job abandonado já gastou a tentativa em que o worker caiu; se era a última,
+        ele é marcado como falho em vez de rodar de novo.
+        """
+        now = datetime.now(timezone.utc)
+        stale = and_(Job.status == RUNNING, Job.locked_at < now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS))
+        session.execute(
+            update(Job)
+            .where(stale, Job.attempts >= Job.max_attempts)
+            .values(status=FAILED, last_error="Worker abandonou o job na última tentativa")
+        )
+        candidate = (
+            select(Job.id)
+            .where(or_(
+                and_(Job.status == PENDING, Job.run_at <= now),
+                and_(stale, Job.attempts < Job.max_attempts),
+            ))
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = session.execute(
+            update(Job)
+            .where(Job.id == candidate)
+            .values(status=RUNNING, locked_at=now, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        ).first()
+        session.commit()
+        return row
+
+    def backoff(attempts: int):
+        return min(JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), JOB_BACKOFF_MAX_SECONDS)
+
+    def run_next(session: Session):
+        """Executa um job; retorna False se não havia nenhum pronto."""
+        job = JobService.claim(session)
+        if job is None:
+            return False
+
+        handler = handler_for(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"Nenhum handler para o job {job.kind}")
+            handler(**json.loads(job.payload))
+        except Exception:
+            error = traceback.format_exc()
+            values = {"status": FAILED, "last_error": error}
+            if job.attempts < job.max_attempts:
+                values = {
+                    "status": PENDING,
+                    "last_error": error,
+                    "run_at": datetime.now(timezone.utc) + timedelta(seconds=JobService.backoff(job.attempts)),
+                }
+            session.execute(update(Job).where(Job.id == job.id).values(**values))
+            session.commit()
+            logger.warning(json.dumps({"event": "job_failed", "job_id": str(job.id), "kind": job.kind,
+                                       "attempts": job.attempts, "status": values["status"]}))
+            return True
+
+        session.execute(delete(Job).where(Job.id == job.id))
+        session.commit()
+        return True
+
+    def run_pending(session: Session):
+        """Executa todos os jobs prontos, em sequência; retorna quantos rodaram."""
+        count = 0
+        while JobService.run_next(session):
+            count += 1
+        return count
+
+
+class JobRunner:
+    """Pool de workers asyncio que consome job_db.
+
+    Cada worker roda um job por vez em uma thread (os handlers e o acesso ao banco são
+    síncronos), espera JOB_POLL_SECONDS quando a fila está vazia e é acordado logo após
+    o commit de um enqueue feito neste processo.
+    """
+
+    def __init__(self, session_factory, workers: int, poll_seconds: float = JOB_POLL_SECONDS):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._tasks = []
+        self._stopping = False
+        self._loop = None
+        self._wake = None
+
+    def _run_next(self):
+        session = self.session_factory()
+        try:
+            return JobService.run_next(session)
+        finally:
+            session.close()
+
+    async def _work(self):
+        while not self._stopping:
+            try:
+                ran = await asyncio.to_thread(self._run_next)
+            except Exception:
+                logger.exception(json.dumps({"event": "job_runner_error"}))
+                ran = False
+            if ran:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def wake(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        _runners.add(self)
+
+    async def stop(self):
+        """Para de reservar jobs e espera os que estão em execução terminarem."""
+        _runners.discard(self)
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _delete_object(key: str):
+    get_storage().delete(key)
+
+
+register(REMOVE_FILE, _remove_file)
+register(DELETE_OBJECT, _delete_object)
@@ -0,0 +1,176 @@
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, selectinload
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.enums.order_status import OrderStatus
+from app.core.order_archive import OrderArchive, order_archive, as_utc
+from app.core.vars import ORDER_ARCHIVE_AFTER_DAYS, ORDER_ARCHIVE_BATCH_SIZE
+
+FINISHED_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELED)
+RESTORED_CHECK_BATCH_SIZE = 1000
+
+
+def _timestamp(value: datetime):
+    return as_utc(value).isoformat(timespec="microseconds")
+
+
+def _serialize(order: Order):
+    return {
+        "id": str(order.id),
+        "user_id": str(order.user_id),
+        "status": order.status.value,
+        "total": order.total,
+        "version": order.version,
+        "created_at": _timestamp(order.created_at),
+        "updated_at": _timestamp(order.updated_at),
+        "items": [
+            {
+                "id": str(item.id),
+                "product_id": str(item.product_id),
+                "quantity": item.quantity,
+                "price": item.price,
+                "created_at": _timestamp(item.created_at),
+            }
+            for item in order.items
+        ],
+    }
+
+
+def _to_orders(records: list[dict], session: Session):
+    """Reconstrói pedidos transitórios (fora da sessão) a partir dos registros arquivados."""
+    product_ids = {UUID(item["product_id"]) for record in records for item in record["items"]}
+    products = {}
+    if product_ids:
+        products = {product.id: product for product in session.query(Product).filter(Product.id.in_(product_ids))}
+
+    orders = []
+    for record in records:
+        order = Order(UUID(record["user_id"]), OrderStatus(record["status"]))
+        order.id = UUID(record["id"])
+        order.total = record["total"]
+        order.version = record.get("version", 1)
+        order.created_at = datetime.fromisoformat(record["created_at"])
+        order.updated_at = datetime.fromisoformat(record["updated_at"])
+        for item in record["items"]:
+            product_id = UUID(item["product_id"])
+            order_item = OrderItem(order.id, product_id, item["quantity"], item["price"],
+                                   datetime.fromisoformat(item["created_at"]))
+            order_item.id = UUID(item["id"])
+            order_item.product = products.get(product_id)
+            order.items.append(order_item)
+        orders.append(order)
+    return orders
+
+
+class OrderArchiveService:
+    def archive_finished_orders(session: Session,
+                                older_than_days: int = ORDER_ARCHIVE_AFTER_DAYS,
+                                batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+                                archive: OrderArchive = order_archive):
+        """Move pedidos entregues/cancelados sem alteração há older_than_days dias para o arquivo.
+
+        Cada lote vira um segmento gravado em disco antes do DELETE; se o processo
+        cair entre os dois passos, o lote é arquivado de novo na próxima execução
+        e a leitura do arquivo descarta a cópia repetida.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        archived = 0
+        while True:
+            orders = (
+                session.query(Order)
+                .filter(Order.status.in_(FINISHED_STATUSES), Order.updated_at < cutoff)
+                .options(selectinload(Order.items).lazyload(OrderItem.product))
+                .order_by(Order.created_at, Order.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not orders:
+                return archived
+
+            archive.write_segment([_serialize(order) for order in orders])
+
+            order_ids = [order.id for order in orders]
+            moments = [order.created_at for order in orders] + [item.created_at for order in orders for item in order.items]
+            lower, upper = min(moments), max(moments)
+            for order in orders:
+                session.expunge(order)
+
+            # Os limites em created_at permitem ao Postgres tocar apenas as partições do lote.
+            session.execute(
+                delete(OrderItem)
+                .where(OrderItem.order_id.in_(order_ids), OrderItem.created_at >= lower, OrderItem.created_at <= upper)
+                .execution_options(synchronize_session=False)
+            )
+            session.execute(
+                delete(Order)
+                .where(Order.id.in_(order_ids), Order.created_at >= lower, Order.created_at <= upper)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            archived += len(orders)
+
+    def archived_records(session: Session,
+                         user_ids=None,
+                         since: datetime | None = None,
+                         until: datetime | None = None,
+                         archive: OrderArchive = order_archive):
+        """Registros do arquivo que não estão em order_db, para os modelos de leitura.
+
+        Pedidos restaurados continuam no arquivo, mas quem vale é a linha do banco
+        (que pode ter mudado depois da restauração).
+        """
+        records = list(archive.records(user_ids, since, until))
+        ids = [UUID(record["id"]) for record in records]
+        restored = set()
+        for start in range(0, len(ids), RESTORED_CHECK_BATCH_SIZE):
+            batch = ids[start:start + RESTORED_CHECK_BATCH_SIZE]
+            restored.update(str(id) for id in session.scalars(select(Order.id).where(Order.id.in_(batch))))
+        return [record for record in records if record["id"] not in restored]
+
+    def find_archived_order(id: UUID, session: Session, archive: OrderArchive = order_archive):
+        record = archive.find(id)
+        if record is None:
+            return None
+        return _to_orders([record], session)[0]
+
+    def list_archived_user_orders(user_id: UUID,
+                                  session: Session,
+                                  since: datetime | None = None,
+                                  until: datetime | None = None,
+                                  archive: OrderArchive = order_archive):
+        return _to_orders(archive.user_orders(user_id, since, until), session)
+
+    def restore_order(id: UUID, session: Session, auth_user: User, archive: OrderArchive = order_archive):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+
+        if session.query(Order.id).filter(Order.id == id).first():
+            raise HTTPException(status_code=400, detail="Pedido não está arquivado")
+
+        order = OrderArchiveService.find_archived_order(id, session, archive)
+        if not order:
+            raise HTTPException(status_code=404, detail="Pedido não encontrado")
+
+        # Volta a contar o prazo de arquivamento a partir da restauração.
+        order.updated_at = datetime.now(timezone.utc)
+        archived_version = order.version
+        session.add(order)
+        try:
+            # O INSERT do ORM sempre grava a versão inicial (version_id_col); a restauração
+            # conta como uma alteração, então a versão segue depois da arquivada e o ETag
+            # nunca volta para um valor já entregue.
+            session.flush()
+            session.execute(update(Order.__table__).where(Order.__table__.c.id == order.id)
+                            .values(version=archived_version + 1))
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        return order
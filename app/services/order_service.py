@@ -1,15 +1,96 @@
-from uuid import UUID
-from sqlalchemy.orm import Session
-from app.schemas.order_schemas import CreateOrderSchema
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+from sqlalchemy import update, select, func, insert, literal, union_all
+from sqlalchemy.orm import Session, selectinload
+from app.schemas.order_schemas import CreateOrderSchema, QuoteOrderSchema, BulkOrderStatusSchema, OrderResponseSchema
 from app.models.product import Product
 from app.models.user import User
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from fastapi import HTTPException
-from app.enums.order_status import OrderStatus
+from app.enums.order_status import OrderStatus, allowed_sources
+from app.services.user_order_stats_service import UserOrderStatsService
+from app.services.order_archive_service import OrderArchiveService
+from app.core.ids import uuid7_datetime
+from app.core.order_archive import as_utc
+from app.core.events import ORDER_STATUS_CHANGED, OrderStatusChange, publish
+from app.core.vars import BULK_ORDER_STATUS_LIMIT
+from app.core.price_book import price_book
+from app.core.fieldsets import parse_fields, load_options
+from app.core.etags import parse_if_match
+
+ID_TIME_MARGIN = timedelta(days=1)
+PRICE_BOOK_ATTEMPTS = 2
+
+
+def _check_items(items, entries):
+    """Valida os itens de um pedido contra as entradas do livro de preços."""
+    for item in items:
+        entry = entries.get(item.id)
+        if not entry:
+            raise HTTPException(status_code=400, detail=f"Produto {item.id} não encontrado")
+        if not entry.is_active:
+            raise HTTPException(status_code=400, detail=f"Produto {entry.name} não está disponível")
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail=f"Produto {entry.name} precisa conter uma ou mais unidades")
+
+
+def _ids_window(ids: list[UUID]):
+    """Limita created_at pelos timestamps embutidos nos ids (UUIDv7).
+
+    Com order_db particionada por mês isso permite ao Postgres descartar as demais
+    partições. Se algum id não tiver timestamp, não há limite.
+    """
+    moments = [uuid7_datetime(id) for id in ids]
+    if not moments or None in moments:
+        return []
+    return [Order.created_at >= min(moments) - ID_TIME_MARGIN, Order.created_at < max(moments) + ID_TIME_MARGIN]
+
+
+def _id_window(id: UUID):
+    return _ids_window([id])
+
+
+def _status_change(order: Order, old_status: OrderStatus, new_status: OrderStatus):
+    return OrderStatusChange(order.id, order.user_id, order.total, old_status, new_status)
+
+
+def _find_order(session: Session, id: UUID, options: list = ()):
+    """Busca o pedido dentro da janela do id; pedidos cujo created_at foi definido
+    manualmente caem na busca sem limite."""
+    window = _id_window(id)
+    if window:
+        order = session.query(Order).options(*options).filter(Order.id == id, *window).first()
+        if order:
+            return order
+    return session.query(Order).options(*options).filter(Order.id == id).first()
+
+def _insert_priced_items(session: Session, order: Order, items: list, entries: dict):
+    """Insere os itens com o preço do livro em um único INSERT ... SELECT.
+
+    Cada item só é inserido se o produto ainda estiver ativo e na versão lida para o
+    livro; retorna False se alguma linha ficou de fora.
+    """
+    columns = OrderItem.__mapper__.columns
+    rows = [
+        select(
+            literal(uuid4(), columns.id.type),
+            literal(order.id, columns.order_id.type),
+            Product.id,
+            literal(item.quantity, columns.quantity.type),
+            literal(entries[item.id].price, columns.price.type),
+            literal(order.created_at, columns.created_at.type),
+        ).where(Product.id == item.id, Product.version == entries[item.id].version, Product.is_active == True)
+        for item in items
+    ]
+    statement = insert(OrderItem.__table__).from_select(
+        [columns.id, columns.order_id, columns.product_id, columns.quantity, columns.price, columns.created_at],
+        union_all(*rows) if len(rows) > 1 else rows[0],
+    )
+    return session.execute(statement).rowcount == len(items)
 
 class OrderService:
-    def create_order(body: CreateOrderSchema, session: Session, auth_user: User):
+    def create_order(body: CreateOrderSchema, session: Session, auth_user: User, commit: bool = True):
         if not auth_user:
             raise HTTPException(status_code=401, detail="É preciso estar logado para fazer um pedido")
         
@@ -24,26 +105,31 @@ class OrderService:
         if auth_user.id != user.id:
             raise HTTPException(status_code=403, detail="Operação não autorizada")
         
-        order = Order(user.id, OrderStatus.OPEN)
-        session.add(order)
-        session.flush()
-        
-        product_ids = [item.id for item in body.items]
-        products = session.query(Product).filter(Product.id.in_(product_ids)).all()
-        products_dict = {product.id: product for product in products}
-
-        for item in body.items:
-            product = products_dict[item.id]
-            if not product:
-                raise HTTPException(status_code=400, detail=f"Produto {item.id} não encontrado")
-            if not product.is_active:
-                raise HTTPException(status_code=400, detail=f"Produto {product.name} não está disponível")
-            if item.quantity <= 0:
-                raise HTTPException(status_code=400, detail=f"Produto {product.name} precisa conter uma ou mais unidades")
-            order_item = OrderItem(order.id, item.id, item.quantity, product.price)
-            session.add(order_item)
-        
-        order.calculate_price()
+        for _ in range(PRICE_BOOK_ATTEMPTS):
+            entries = price_book.get_many({item.id for item in body.items}, session)
+            _check_items(body.items, entries)
+
+            order = Order(user.id, OrderStatus.OPEN)
+            order.total = sum(item.quantity * entries[item.id].price for item in body.items)
+            session.add(order)
+            session.flush()
+
+            if _insert_priced_items(session, order, body.items, entries):
+                break
+            # Algum produto mudou desde que foi lido para o livro: descarta o pedido
+            # e valida de novo com os dados atuais.
+            session.rollback()
+            price_book.load(session, entries.keys())
+        else:
+            raise HTTPException(status_code=409, detail="Produtos alterados durante o pedido. Tente novamente")
+
+        UserOrderStatsService.order_created(session, order)
+
+        if not commit:
+            # Quem chamou confirma a transação (ex.: junto com a resposta de Idempotency-Key).
+            session.flush()
+            session.expire(order, ["items"])
+            return order
 
         try:
             session.commit()
@@ -53,20 +139,83 @@ class OrderService:
         
         return order
 
-    def list_user_orders(id: UUID, session: Session, auth_user: User):
+    def quote_order(body: QuoteOrderSchema, session: Session, auth_user: User):
+        """Preço de um carrinho calculado como em create_order, sem gravar nada.
+
+        Os preços vêm do livro de preços (no máximo uma consulta para os produtos
+        ausentes dele). Alterações feitas por outros workers podem ainda não ter
+        chegado ao livro; o valor cobrado é o confirmado por create_order.
+        """
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para fazer um pedido")
+        if not body.items:
+            raise HTTPException(status_code=400, detail="Pedido inválido. Precisa conter ao menos um produto")
+
+        entries = price_book.get_many({item.id for item in body.items}, session)
+        _check_items(body.items, entries)
+
+        items = [
+            {"id": item.id, "name": entries[item.id].name, "quantity": item.quantity,
+             "price": entries[item.id].price, "total": item.quantity * entries[item.id].price}
+            for item in body.items
+        ]
+        return {"items": items, "total": sum(item["total"] for item in items)}
+
+    def expected_version(if_match: str | None) -> int | None:
+        try:
+            return parse_if_match(if_match)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="If-Match inválido")
+
+    def fieldset(fields: str | None):
+        try:
+            return parse_fields(OrderResponseSchema, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Campo inválido em fields: {e}")
+
+    def list_user_orders(id: UUID,
+                         session: Session,
+                         auth_user: User,
+                         since: datetime | None = None,
+                         until: datetime | None = None,
+                         include_archived: bool = False,
+                         fields: str | None = None):
         if not auth_user:
             raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
         if not auth_user.is_admin and auth_user.id != id:
             raise HTTPException(status_code=403, detail="Acesso não permitido as informações")
-        
-        orders = session.query(Order).filter(Order.user_id == id).all()
+        if since and until and since >= until:
+            raise HTTPException(status_code=400, detail="Intervalo de datas inválido")
+
+        query = session.query(Order).filter(Order.user_id == id)
+        items = Order.items
+        if since:
+            query = query.filter(Order.created_at >= since)
+            items = items.and_(OrderItem.created_at >= since)
+        if until:
+            query = query.filter(Order.created_at < until)
+            items = items.and_(OrderItem.created_at < until)
+
+        spec = OrderService.fieldset(fields)
+        if spec is None:
+            options = [selectinload(items)]
+        else:
+            options = load_options(Order, spec, {"items": selectinload(items)}, always=("created_at",))
+        orders = query.options(*options).order_by(Order.created_at.desc()).all()
+        if include_archived:
+            hot_ids = {order.id for order in orders}
+            archived = OrderArchiveService.list_archived_user_orders(id, session, since, until)
+            orders += [order for order in archived if order.id not in hot_ids]
+            orders.sort(key=lambda order: as_utc(order.created_at), reverse=True)
         return orders
 
-    def get_order_by_id(id: UUID, session: Session, auth_user: User):
+    def get_order_by_id(id: UUID, session: Session, auth_user: User, fields: str | None = None):
         if not auth_user:
             raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
         
-        order = session.query(Order).filter(Order.id == id).first()
+        spec = OrderService.fieldset(fields)
+        options = [] if spec is None else load_options(Order, spec, always=("user_id",))
+        order = _find_order(session, id, options) or OrderArchiveService.find_archived_order(id, session)
         if not order:
             raise HTTPException(status_code=404, detail="Pedido não encontrado")
         
@@ -75,30 +224,132 @@ class OrderService:
         
         return order
 
-    def cancel_order(id: UUID, session: Session, auth_user: User):
-        if not auth_user:
-            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
-        order = session.query(Order).filter(Order.id == id).first()
-        if not order:
-            raise HTTPException(status_code=404, detail="Pedido não encontrado")
-        
-        if auth_user.is_admin == False and auth_user.id != order.user_id:
-            raise HTTPException(status_code=403, detail="Operação não autorizada")
-        
-        if order.status == OrderStatus.DELIVERED:
-            raise HTTPException(status_code=400, detail="Não é permitido cancelar um pedido já entregue")
-        order.status = OrderStatus.CANCELED
+    def _transition(id: UUID, target: OrderStatus, session: Session, auth_user: User, expected_version: int | None = None):
+        """Aplica a transição de status com um único UPDATE condicional.
+
+        O WHERE só aceita estados de origem permitidos por ORDER_STATUS_TRANSITIONS
+        (e a versão esperada, se informada), então entre duas requisições concorrentes
+        apenas uma altera a linha. O diagnóstico do motivo da falha só lê o pedido
+        quando o UPDATE não encontra linha.
+        """
+        # Todas as transições partem de um único estado, então o estado anterior
+        # é conhecido sem ler a linha antes do UPDATE.
+        previous, = allowed_sources(target)
+        conditions = [Order.id == id, Order.status == previous]
+        if not auth_user.is_admin:
+            conditions.append(Order.user_id == auth_user.id)
+        if expected_version is not None:
+            conditions.append(Order.version == expected_version)
+        window = _id_window(id)
+
+        order = next(iter(OrderService._conditional_update(session, target, conditions + window)), None)
+        if order is None:
+            current = _find_order(session, id)
+            if not current:
+                raise HTTPException(status_code=404, detail="Pedido não encontrado")
+            if not auth_user.is_admin and auth_user.id != current.user_id:
+                raise HTTPException(status_code=403, detail="Operação não autorizada")
+            if expected_version is not None and current.version != expected_version:
+                raise HTTPException(status_code=409, detail="Pedido foi alterado por outra requisição")
+            if current.status == target:
+                return current
+            if current.status != previous:
+                raise HTTPException(status_code=409, detail=f"Não é permitido alterar um pedido {current.status.value} para {target.value}")
+            # created_at fora da janela derivada do id: repete sem o limite.
+            order = next(iter(OrderService._conditional_update(session, target, conditions)), None)
+            if order is None:
+                raise HTTPException(status_code=409, detail="Pedido foi alterado por outra requisição")
+
+        publish(ORDER_STATUS_CHANGED, session=session, changes=[_status_change(order, previous, target)])
         session.commit()
         return order
 
-    def delivered_order(id: UUID, session: Session, auth_user: User):
+    def bulk_transition(target: OrderStatus, body: BulkOrderStatusSchema, session: Session, auth_user: User):
+        """Aplica a mesma transição a vários pedidos com um UPDATE por conjunto.
+
+        Com lista de ids, os pedidos que não puderam mudar são lidos numa única
+        consulta para montar o resultado por pedido. Com filtro, apenas pedidos no
+        estado de origem são selecionados, até BULK_ORDER_STATUS_LIMIT por chamada.
+        """
         if not auth_user:
             raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
         if not auth_user.is_admin:
             raise HTTPException(status_code=403, detail="Apenas admins podem realizar a operação")
-        order = session.query(Order).filter(Order.id == id).first()
-        if not order:
-            raise HTTPException(status_code=404, detail="Pedido não encontrado")
-        order.status = OrderStatus.DELIVERED
+        if bool(body.ids) == (body.filter is not None):
+            raise HTTPException(status_code=400, detail="Informe a lista de ids ou um filtro")
+
+        previous, = allowed_sources(target)
+        unchanged = []
+        failed = []
+
+        if body.ids:
+            ids = list(dict.fromkeys(body.ids))
+            if len(ids) > BULK_ORDER_STATUS_LIMIT:
+                raise HTTPException(status_code=400, detail=f"No máximo {BULK_ORDER_STATUS_LIMIT} pedidos por requisição")
+            conditions = [Order.id.in_(ids), Order.status == previous]
+            window = _ids_window(ids)
+            orders = OrderService._conditional_update(session, target, conditions + window)
+
+            updated_ids = {order.id for order in orders}
+            missing = [id for id in ids if id not in updated_ids]
+            current = {}
+            if missing:
+                current = dict(session.query(Order.id, Order.status).filter(Order.id.in_(missing)).all())
+                # created_at fora da janela derivada dos ids: repete sem o limite.
+                retry = [id for id in missing if current.get(id) == previous]
+                if retry and window:
+                    orders += OrderService._conditional_update(session, target, [Order.id.in_(retry), Order.status == previous])
+                    updated_ids = {order.id for order in orders}
+
+            for id in missing:
+                if id in updated_ids:
+                    continue
+                status = current.get(id)
+                if status is None:
+                    failed.append({"id": id, "status": None, "detail": "Pedido não encontrado"})
+                elif status == target:
+                    unchanged.append(id)
+                else:
+                    detail = f"Não é permitido alterar um pedido {status.value} para {target.value}"
+                    if status == previous:
+                        detail = "Pedido foi alterado por outra requisição"
+                    failed.append({"id": id, "status": status, "detail": detail})
+        else:
+            filters = [Order.status == previous]
+            if body.filter.user_id:
+                filters.append(Order.user_id == body.filter.user_id)
+            if body.filter.created_from:
+                filters.append(Order.created_at >= body.filter.created_from)
+            if body.filter.created_until:
+                filters.append(Order.created_at < body.filter.created_until)
+            if len(filters) == 1:
+                raise HTTPException(status_code=400, detail="Informe ao menos um critério no filtro")
+            selected = select(Order.id).where(*filters).order_by(Order.created_at).limit(BULK_ORDER_STATUS_LIMIT)
+            orders = OrderService._conditional_update(session, target, [Order.id.in_(selected), *filters])
+
+        publish(ORDER_STATUS_CHANGED, session=session, changes=[_status_change(order, previous, target) for order in orders])
+        updated = [order.id for order in orders]
         session.commit()
-        return order
\ No newline at end of file
+        return {"updated": updated, "unchanged": unchanged, "failed": failed}
+
+    def _conditional_update(session: Session, target: OrderStatus, conditions: list):
+        statement = (
+            update(Order)
+            .where(*conditions)
+            .values(status=target, version=Order.version + 1, updated_at=func.now())
+            .returning(Order)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return session.scalars(statement).all()
+
+    def cancel_order(id: UUID, session: Session, auth_user: User, expected_version: int | None = None):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
+        return OrderService._transition(id, OrderStatus.CANCELED, session, auth_user, expected_version)
+
+    def delivered_order(id: UUID, session: Session, auth_user: User, expected_version: int | None = None):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
+        if not auth_user.is_admin:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar a operação")
+        return OrderService._transition(id, OrderStatus.DELIVERED, session, auth_user, expected_version)
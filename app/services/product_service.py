@@ -1,13 +1,46 @@
 from uuid import UUID, uuid4
 from fastapi import Depends, UploadFile, HTTPException
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update, select, or_, func, desc
 from sqlalchemy.orm import Session
 from app.models.product import Product
 from app.models.category import Category
-from app.core.vars import UPLOAD_DIR
-from app.schemas.product_schemas import UpdateProductSchema
+from app.models.sales_rollup import SalesRollup
+from app.services.analytics_service import DAY
+from app.core.vars import PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL_SECONDS, PRODUCT_NEGATIVE_CACHE_SECONDS, PRODUCT_MULTI_GET_LIMIT
+from app.core.cache import LRUCache, MISSING
+from app.core.fieldsets import parse_fields, render_json, load_options
+from app.schemas.product_schemas import CreateProductSchema, UpdateProductSchema, BulkProductSelectionSchema, ProductResponseSchema
+from app.core.events import PRODUCTS_CHANGED, ProductChange, publish, subscribe
 from app.models.user import User
-import os
-import shutil
+from app.schemas.upload_schemas import UploadedImageSchema
+from app.core.jobs import DELETE_OBJECT
+from app.core.storage import discard, get_storage, new_key
+from app.services.job_service import JobService
+from app.services.upload_service import UploadService
+import json
+
+product_cache = LRUCache("product_detail", PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL_SECONDS)
+HOT_PRODUCTS_WINDOW = timedelta(days=7)
+
+
+def _serialize(product: Product) -> bytes:
+    return ProductResponseSchema.model_validate(product).model_dump_json().encode()
+
+
+def _invalidate_products(changes: list[ProductChange]):
+    # O cache guarda o mesmo JSON por slug (str) e, no multi-get, também por id (UUID).
+    product_cache.delete(*{change.slug for change in changes}, *{change.product_id for change in changes})
+
+
+subscribe(PRODUCTS_CHANGED, _invalidate_products)
+
+
+def _fills_cache(session: Session) -> bool:
+    # Uma réplica atrasada devolveria a linha anterior a uma invalidação e o cache
+    # a serviria a todos (inclusive a quem escreveu) até expirar.
+    return not session.info.get("replica", False)
+
 
 class ProductService:
     def get_product(slug: str, session: Session):
@@ -18,14 +51,126 @@ class ProductService:
         
         return product
 
-    def get_products_by_category(category_slug: str, session: Session):
-        products = (
+    def fieldset(fields: str | None):
+        try:
+            return parse_fields(ProductResponseSchema, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Campo inválido em fields: {e}")
+
+    def get_product_response(slug: str, session: Session, fields: str | None = None) -> bytes:
+        """JSON de /products/{slug} servido do cache de produtos quentes.
+
+        Slugs inexistentes também são guardados, por PRODUCT_NEGATIVE_CACHE_SECONDS,
+        para que 404 repetidos não consultem o banco. A expiração das entradas
+        limita por quanto tempo outros workers servem um produto já alterado.
+        Leituras feitas em réplica usam o cache mas não o preenchem.
+        Com fields, a resposta completa do cache é projetada nos campos pedidos.
+        """
+        spec = ProductService.fieldset(fields)
+        body = ProductService._cached_response(slug, session)
+        return body if spec is None else render_json(ProductResponseSchema, spec, body)
+
+    def _cached_response(slug: str, session: Session) -> bytes:
+        cached = product_cache.get(slug)
+        if cached is None:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+        if cached is not MISSING:
+            return cached
+
+        generation = product_cache.generation
+        product = session.query(Product).filter(Product.slug==slug).first()
+        if not product:
+            if _fills_cache(session):
+                product_cache.set(slug, None, PRODUCT_NEGATIVE_CACHE_SECONDS, generation=generation)
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+
+        body = _serialize(product)
+        if _fills_cache(session):
+            product_cache.set(slug, body, generation=generation)
+        return body
+
+    def get_products_response(slugs: list[str], ids: list[str], session: Session, fields: str | None = None) -> bytes:
+        """JSON de GET /products: um item por slug e depois por id, na ordem pedida.
+
+        Os acertos vêm do cache de produtos; os demais são lidos em uma única
+        consulta com IN e guardados no cache, inclusive os inexistentes (exceto
+        quando a consulta foi feita em uma réplica).
+        """
+        spec = ProductService.fieldset(fields)
+        if not slugs and not ids:
+            raise HTTPException(status_code=400, detail="Informe slugs ou ids")
+        if len(slugs) + len(ids) > PRODUCT_MULTI_GET_LIMIT:
+            raise HTTPException(status_code=400, detail=f"Máximo de {PRODUCT_MULTI_GET_LIMIT} produtos por requisição")
+        try:
+            keys = [*slugs, *(UUID(id) for id in ids)]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Id de produto inválido")
+
+        generation = product_cache.generation
+        bodies = {}
+        for key in dict.fromkeys(keys):
+            cached = product_cache.get(key)
+            if cached is not MISSING:
+                bodies[key] = cached
+
+        misses = [key for key in dict.fromkeys(keys) if key not in bodies]
+        if misses:
+            products = session.query(Product).filter(or_(
+                Product.slug.in_([key for key in misses if isinstance(key, str)]),
+                Product.id.in_([key for key in misses if isinstance(key, UUID)]),
+            )).all()
+            found = {**{product.slug: product for product in products}, **{product.id: product for product in products}}
+            for key in misses:
+                product = found.get(key)
+                bodies[key] = _serialize(product) if product else None
+                if _fills_cache(session):
+                    product_cache.set(key, bodies[key], None if product else PRODUCT_NEGATIVE_CACHE_SECONDS, generation=generation)
+
+        entries = []
+        for key in keys:
+            body = bodies[key]
+            if body is not None and spec is not None:
+                body = render_json(ProductResponseSchema, spec, body)
+            entries.append(b'{"key":%s,"found":%s,"product":%s}' % (
+                json.dumps(str(key)).encode(), b"false" if body is None else b"true", body or b"null"
+            ))
+        return b"[" + b",".join(entries) + b"]"
+
+    def warm_cache(session: Session, limit: int):
+        """Carrega no cache os produtos mais vendidos em HOT_PRODUCTS_WINDOW, segundo os rollups diários."""
+        since = datetime.now(timezone.utc) - HOT_PRODUCTS_WINDOW
+        quantity = func.sum(SalesRollup.quantity).label("quantity")
+        hot = (
+            select(SalesRollup.product_id, quantity)
+            .where(SalesRollup.granularity == DAY, SalesRollup.bucket_start >= since)
+            .group_by(SalesRollup.product_id)
+            .order_by(desc(quantity))
+            .limit(limit)
+            .subquery()
+        )
+        products = session.scalars(select(Product).join(hot, hot.c.product_id == Product.id)).all()
+        for product in products:
+            product_cache.set(product.slug, _serialize(product))
+        return len(products)
+
+    def get_cache_stats(auth_user: User):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+        return product_cache.stats()
+
+    def get_products_by_category(category_slug: str, session: Session, fields: str | None = None):
+        query = (
             session.query(Product)
             .join(Category, Product.category_id == Category.id)
             .filter(Category.slug == category_slug)
             .filter(Product.is_active == True)
-            .all()
         )
+        spec = ProductService.fieldset(fields)
+        if spec is not None:
+            query = query.options(*load_options(Product, spec))
+        products = query.all()
         return products
 
     def create_product(name: str,
@@ -62,27 +207,54 @@ class ProductService:
         if not exist_category:
             raise HTTPException(status_code=400, detail="Categoria do produto não encontrada")
 
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-        ext = image.filename.split(".")[-1]
-        filename = f"{uuid4()}.{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-
+        storage = get_storage()
+        key = new_key(image.filename, image.content_type)
 
         try:
-            with open(filepath, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            storage.save(key, image.file, image.content_type)
 
-            product = Product(name, slug, description, price, category_id, filename)
+            product = Product(name, slug, description, price, category_id, key)
             session.add(product)
             session.commit()
+            publish(PRODUCTS_CHANGED, changes=[ProductChange(product.id, product.slug, product.category_id)])
             return product
         except Exception as e:
             print(e)
             session.rollback()
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            discard(storage, key)
             raise HTTPException(status_code=500, detail="Erro do servidor")
+
+    def create_product_from_upload(body: CreateProductSchema, session: Session, auth_user: User):
+        """Registra um produto cuja imagem já foi enviada por URL pré-assinada."""
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+        if not body.name:
+            raise HTTPException(status_code=400, detail="Nome do produto inválido")
+        if not body.slug:
+            raise HTTPException(status_code=400, detail="Novo slug do produto inválido")
+        if not body.description:
+            raise HTTPException(status_code=400, detail="Descrição do produto inválida")
+        if not body.category_id:
+            raise HTTPException(status_code=400, detail="Categoria do produto inválida")
+        if body.price <= 0:
+            raise HTTPException(status_code=400, detail="Preço do produto precisa ser maior que 0")
+
+        exist_product = session.query(Product).filter(Product.slug == body.slug).first()
+        if exist_product:
+            raise HTTPException(status_code=400, detail="Já existe produto cadastrado com esse")
+
+        exist_category = session.query(Category).filter(Category.id == body.category_id).first()
+        if not exist_category:
+            raise HTTPException(status_code=400, detail="Categoria do produto não encontrada")
+        UploadService.check_uploaded(body.image_key, session)
+
+        product = Product(body.name, body.slug, body.description, body.price, body.category_id, body.image_key)
+        session.add(product)
+        session.commit()
+        publish(PRODUCTS_CHANGED, changes=[ProductChange(product.id, product.slug, product.category_id)])
+        return product
         
 
 
@@ -120,13 +292,17 @@ class ProductService:
         if exist_product and exist_product.id != product.id:
             raise HTTPException(status_code=400, detail="Já existe produto cadastrado com o novo slug") 
 
+        changes = [ProductChange(product.id, product.slug, product.category_id)]
         product.slug = body.slug
         product.name = body.name
         product.price = body.price
         product.description = body.description
         product.category_id = body.category_id
+        product.version = Product.version + 1
 
         session.commit()
+        changes.append(ProductChange(product.id, product.slug, product.category_id))
+        publish(PRODUCTS_CHANGED, changes=changes)
         return product
 
     def update_product_image(slug: str,
@@ -144,50 +320,116 @@ class ProductService:
         if not product:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         
+        storage = get_storage()
+        key = new_key(image.filename, image.content_type)
+
         try:
-            filepath = os.path.join(UPLOAD_DIR, product.image_url)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-
-            ext = image.filename.split(".")[-1]
-            filename = f"{uuid4()}.{ext}"
-            filepath = os.path.join(UPLOAD_DIR, filename)
-            with open(filepath, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-                
-            product.image_url = filename
+            storage.save(key, image.file, image.content_type)
+
+            if product.image_url:
+                JobService.enqueue(session, DELETE_OBJECT, key=product.image_url)
+            product.image_url = key
             session.commit()
+            publish(PRODUCTS_CHANGED, changes=[ProductChange(product.id, product.slug, product.category_id)])
             return product
         except Exception as e:
             session.rollback()
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            discard(storage, key)
             raise HTTPException(status_code=500, detail="Erro do servidor")
 
-    def deactivate_product(slug: str, session: Session, auth_user: User):
+    def set_product_image(slug: str, body: UploadedImageSchema, session: Session, auth_user: User):
+        """Troca a imagem por um upload direto já concluído; a antiga é apagada por um job."""
         if not auth_user:
             raise HTTPException(status_code=401, detail="Não autenticado")
         if auth_user.is_admin == False:
             raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
-        
-        product = session.query(Product).filter(Product.slug==slug).first()
 
+        product = session.query(Product).filter(Product.slug==slug).first()
         if not product:
-            raise HTTPException(status_code=404, detail="Falha ao desativar. Produto não encontrado")
-        
-        product.is_active = False
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+        UploadService.check_uploaded(body.image_key, session)
+
+        if product.image_url:
+            JobService.enqueue(session, DELETE_OBJECT, key=product.image_url)
+        product.image_url = body.image_key
+        session.commit()
+        publish(PRODUCTS_CHANGED, changes=[ProductChange(product.id, product.slug, product.category_id)])
+        return product
+
+    def _set_active(session: Session, conditions: list, active: bool):
+        """UPDATE ... RETURNING apenas das linhas que de fato mudam de estado."""
+        statement = (
+            update(Product)
+            .where(*conditions, or_(Product.is_active != active, Product.is_active.is_(None)))
+            .values(is_active=active, version=Product.version + 1)
+            .returning(Product.id, Product.slug, Product.category_id)
+        )
+        return [ProductChange(*row) for row in session.execute(statement).all()]
+
+    def _toggle_product(slug: str, active: bool, not_found_detail: str, session: Session, auth_user: User):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+
+        changes = ProductService._set_active(session, [Product.slug == slug], active)
+        if not changes and not session.query(Product.id).filter(Product.slug == slug).first():
+            raise HTTPException(status_code=404, detail=not_found_detail)
+
         session.commit()
+        publish(PRODUCTS_CHANGED, changes=changes)
+
+    def deactivate_product(slug: str, session: Session, auth_user: User):
+        ProductService._toggle_product(slug, False, "Falha ao desativar. Produto não encontrado", session, auth_user)
 
     def activate_product(slug: str, session: Session, auth_user: User):
+        ProductService._toggle_product(slug, True, "Falha ao ativar. Produto não encontrado", session, auth_user)
+
+    def bulk_set_active(active: bool, body: BulkProductSelectionSchema, session: Session, auth_user: User):
+        """Ativa ou desativa todos os produtos selecionados com um único UPDATE.
+
+        Os critérios (slugs, categoria e filtro) são combinados com AND. Os
+        caches são notificados pelo evento PRODUCTS_CHANGED com as linhas
+        devolvidas pelo RETURNING, sem nova consulta.
+        """
         if not auth_user:
             raise HTTPException(status_code=401, detail="Não autenticado")
         if auth_user.is_admin == False:
             raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
-        
-        product = session.query(Product).filter(Product.slug==slug).first()
 
-        if not product:
-            raise HTTPException(status_code=404, detail="Falha ao ativar. Produto não encontrado")
-        
-        product.is_active = True
-        session.commit()
\ No newline at end of file
+        conditions = []
+        if body.slugs:
+            conditions.append(Product.slug.in_(body.slugs))
+        if body.category_slug:
+            conditions.append(Product.category_id.in_(select(Category.id).where(Category.slug == body.category_slug)))
+        if body.filter:
+            if body.filter.name:
+                escaped = body.filter.name.replace("/", "//").replace("%", "/%").replace("_", "/_")
+                conditions.append(Product.name.ilike(f"%{escaped}%", escape="/"))
+            if body.filter.min_price is not None:
+                conditions.append(Product.price >= body.filter.min_price)
+            if body.filter.max_price is not None:
+                conditions.append(Product.price <= body.filter.max_price)
+        if not conditions:
+            raise HTTPException(status_code=400, detail="Informe slugs, categoria ou filtro")
+
+        changes = ProductService._set_active(session, conditions, active)
+        updated = [change.slug for change in changes]
+
+        if not changes and body.category_slug and not session.query(Category.id).filter(Category.slug == body.category_slug).first():
+            session.rollback()
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
+
+        unchanged = []
+        not_found = []
+        if body.slugs:
+            updated_slugs = set(updated)
+            missing = [slug for slug in dict.fromkeys(body.slugs) if slug not in updated_slugs]
+            if missing:
+                existing = set(session.scalars(select(Product.slug).where(Product.slug.in_(missing))))
+                unchanged = [slug for slug in missing if slug in existing]
+                not_found = [slug for slug in missing if slug not in existing]
+
+        session.commit()
+        publish(PRODUCTS_CHANGED, changes=changes)
+        return {"updated": updated, "unchanged": unchanged, "not_found": not_found}
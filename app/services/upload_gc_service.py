@@ -0,0 +1,140 @@
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+from app.models.product import Product
+from app.models.category import Category
+from app.core.vars import UPLOAD_DIR, UPLOAD_GC_GRACE_SECONDS, UPLOAD_GC_BATCH_SIZE, UPLOAD_QUARANTINE_DIR
+from app.core.storage import LocalStorage, get_storage, is_valid_key
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("app.uploads")
+
+
+def default_quarantine_dir(directory: str):
+    return UPLOAD_QUARANTINE_DIR or os.path.join(os.path.dirname(os.path.abspath(directory)), "quarantine")
+
+
+def _old_files(directory: str, cutoff: float):
+    """Percorre o diretório com os.scandir, sem montar a listagem inteira em memória."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                yield entry.name
+
+
+def _batches(names, batch_size: int):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _referenced(session: Session, names: list[str]):
+    query = union(
+        select(Product.image_url).where(Product.image_url.in_(names)),
+        select(Category.image_url).where(Category.image_url.in_(names)),
+    )
+    return set(session.scalars(query))
+
+
+class UploadGCService:
+    def collect(session: Session,
+                directory: str = UPLOAD_DIR,
+                quarantine_dir: str | None = None,
+                grace_seconds: int = UPLOAD_GC_GRACE_SECONDS,
+                batch_size: int = UPLOAD_GC_BATCH_SIZE,
+                dry_run: bool = False,
+                storage=None):
+        """Remove uploads sem referência em product_db/category_db do storage configurado.
+
+        No backend local percorre directory (ver _collect_files); nos demais, lista os
+        objetos pelo próprio storage (ver _collect_objects).
+        """
+        storage = storage or get_storage()
+        if not isinstance(storage, LocalStorage):
+            return UploadGCService._collect_objects(session, storage, grace_seconds, batch_size, dry_run)
+        return UploadGCService._collect_files(session, directory, quarantine_dir, grace_seconds, batch_size, dry_run)
+
+    def _collect_objects(session: Session, storage, grace_seconds: int, batch_size: int, dry_run: bool):
+        """Apaga objetos do bucket sem referência e mais antigos que grace_seconds.
+
+        Só chaves geradas pela API (KEY_PATTERN) são consideradas, então outros
+        objetos do bucket ficam intactos. Não há quarentena: um objeto passa da
+        carência muito depois de a URL de upload expirar (UPLOAD_URL_EXPIRES_SECONDS).
+        """
+        stats = {"scanned": 0, "quarantined": 0, "restored": 0, "deleted": 0}
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        keys = (key for key in storage.list_objects(cutoff) if is_valid_key(key))
+        for batch in _batches(keys, batch_size):
+            stats["scanned"] += len(batch)
+            referenced = _referenced(session, batch)
+            session.rollback()
+            for key in batch:
+                if key in referenced:
+                    continue
+                stats["deleted"] += 1
+                if not dry_run:
+                    storage.delete(key)
+
+        logger.info(json.dumps({"event": "upload_gc_finished", "dry_run": dry_run, **stats}))
+        return stats
+
+    def _collect_files(session: Session,
+                       directory: str,
+                       quarantine_dir: str | None,
+                       grace_seconds: int,
+                       batch_size: int,
+                       dry_run: bool):
+        """Remove arquivos de upload sem referência de um diretório local.
+
+        Em duas etapas: arquivos sem referência e mais antigos que grace_seconds vão
+        para a quarentena; na execução seguinte, os que seguem sem referência e estão
+        na quarentena há mais de grace_seconds são apagados, e os que voltaram a ser
+        referenciados são devolvidos. A carência protege uploads cujo commit ainda não
+        aconteceu. Só um lote de nomes por vez fica em memória.
+        """
+        quarantine_dir = quarantine_dir or default_quarantine_dir(directory)
+        stats = {"scanned": 0, "quarantined": 0, "restored": 0, "deleted": 0}
+        cutoff = time.time() - grace_seconds
+
+        if os.path.isdir(quarantine_dir):
+            for batch in _batches(_old_files(quarantine_dir, float("inf")), batch_size):
+                referenced = _referenced(session, batch)
+                session.rollback()
+                for name in batch:
+                    path = os.path.join(quarantine_dir, name)
+                    if name in referenced:
+                        stats["restored"] += 1
+                        if not dry_run:
+                            os.replace(path, os.path.join(directory, name))
+                    elif os.stat(path).st_mtime < cutoff:
+                        stats["deleted"] += 1
+                        if not dry_run:
+                            os.remove(path)
+
+        if not os.path.isdir(directory):
+            return stats
+        os.makedirs(quarantine_dir, exist_ok=True)
+        for batch in _batches(_old_files(directory, cutoff), batch_size):
+            stats["scanned"] += len(batch)
+            referenced = _referenced(session, batch)
+            session.rollback()
+            for name in batch:
+                if name in referenced:
+                    continue
+                stats["quarantined"] += 1
+                if not dry_run:
+                    target = os.path.join(quarantine_dir, name)
+                    os.replace(os.path.join(directory, name), target)
+                    # A idade na quarentena conta a partir de agora.
+                    os.utime(target)
+
+        logger.info(json.dumps({"event": "upload_gc_finished", "dry_run": dry_run, **stats}))
+        return stats
@@ -0,0 +1,70 @@
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from tempfile import SpooledTemporaryFile
+from app.models.user import User
+from app.models.product import Product
+from app.models.category import Category
+from app.schemas.upload_schemas import CreateUploadSchema
+from app.core.storage import LocalStorage, get_storage, is_valid_key, new_key
+from app.core.vars import UPLOAD_URL_EXPIRES_SECONDS, UPLOAD_MAX_BYTES
+
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+class UploadService:
+    def create_upload(body: CreateUploadSchema, auth_user: User):
+        """URL pré-assinada para o admin enviar a imagem direto ao storage.
+
+        O objeto só passa a valer quando uma categoria ou produto é registrado com a
+        chave; uploads nunca registrados são apagados pelo coletor de uploads órfãos
+        (UploadGCService.collect), no diretório local ou no bucket S3.
+        """
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="Não autenticado")
+        if auth_user.is_admin == False:
+            raise HTTPException(status_code=403, detail="Apenas admins podem realizar essa operação")
+        if not body.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="Arquivo precisa ser uma imagem")
+
+        key = new_key(body.filename, body.content_type)
+        return get_storage().presign_put(key, body.content_type, UPLOAD_URL_EXPIRES_SECONDS)
+
+    async def receive_local_upload(key: str, content_type: str, expires: int, signature: str, chunks):
+        """Destino das URLs pré-assinadas do LocalStorage (em S3 o cliente envia direto ao bucket)."""
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            raise HTTPException(status_code=404, detail="Upload direto não disponível")
+        if not is_valid_key(key) or not storage.verify_put(key, content_type, expires, signature):
+            raise HTTPException(status_code=403, detail="URL de upload inválida ou expirada")
+
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as buffer:
+            size = 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Arquivo maior que o permitido")
+                buffer.write(chunk)
+            buffer.seek(0)
+            storage.save(key, buffer, content_type)
+
+    def check_uploaded(key: str, session: Session):
+        """Valida a chave de um upload direto antes de registrá-la em uma categoria ou produto."""
+        if not is_valid_key(key):
+            raise HTTPException(status_code=400, detail="Chave de upload inválida")
+        info = get_storage().stat(key)
+        if info is None:
+            raise HTTPException(status_code=400, detail="Upload não encontrado")
+        if not info.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="Arquivo precisa ser uma imagem")
+        if info.size > UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=400, detail="Arquivo maior que o permitido")
+
+        # Uma imagem compartilhada seria apagada quando o outro dono trocasse a dele.
+        referenced = union_all(
+            select(Product.id).where(Product.image_url == key),
+            select(Category.id).where(Category.image_url == key),
+        )
+        if session.execute(referenced.limit(1)).first():
+            raise HTTPException(status_code=400, detail="Upload já registrado")
+        return key
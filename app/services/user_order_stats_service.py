@@ -0,0 +1,149 @@
+from collections import defaultdict
+from uuid import UUID
+from datetime import datetime, timezone
+from sqlalchemy import func, case, update, delete, select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.order import Order
+from app.models.user_order_stats import UserOrderStats
+from app.enums.order_status import OrderStatus
+from app.core.events import ORDER_STATUS_CHANGED, OrderStatusChange, subscribe
+from app.core.order_archive import OrderArchive, order_archive, as_utc
+from app.services.order_archive_service import OrderArchiveService
+
+COUNTERS = ("orders_count", "delivered_count", "canceled_count", "total_spent")
+
+
+def _insert_for(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+class UserOrderStatsService:
+    def _apply(session: Session, user_id: UUID, deltas: dict, last_order_at=None):
+        values = {name: deltas.get(name, 0) for name in COUNTERS}
+        insert = _insert_for(session)
+
+        if insert is not None:
+            stmt = insert(UserOrderStats).values(user_id=user_id, last_order_at=last_order_at, **values)
+            set_ = {name: getattr(UserOrderStats, name) + stmt.excluded[name] for name in COUNTERS}
+            set_["updated_at"] = func.now()
+            if last_order_at is not None:
+                set_["last_order_at"] = stmt.excluded.last_order_at
+            session.execute(stmt.on_conflict_do_update(index_elements=[UserOrderStats.user_id], set_=set_))
+            return
+
+        set_ = {name: getattr(UserOrderStats, name) + value for name, value in values.items()}
+        if last_order_at is not None:
+            set_["last_order_at"] = last_order_at
+        result = session.execute(update(UserOrderStats).where(UserOrderStats.user_id == user_id).values(**set_))
+        if result.rowcount == 0:
+            session.add(UserOrderStats(user_id, last_order_at=last_order_at, **values))
+            session.flush()
+
+    def order_created(session: Session, order: Order):
+        UserOrderStatsService._apply(
+            session,
+            order.user_id,
+            {"orders_count": 1, "total_spent": order.total},
+            last_order_at=datetime.now(timezone.utc),
+        )
+
+    def _status_deltas(total: float, old_status: OrderStatus, new_status: OrderStatus):
+        deltas = {}
+        if old_status == new_status:
+            return deltas
+        if old_status == OrderStatus.DELIVERED:
+            deltas["delivered_count"] = -1
+        if new_status == OrderStatus.DELIVERED:
+            deltas["delivered_count"] = 1
+        if old_status == OrderStatus.CANCELED:
+            deltas["canceled_count"] = -1
+            deltas["total_spent"] = total
+        if new_status == OrderStatus.CANCELED:
+            deltas["canceled_count"] = 1
+            deltas["total_spent"] = -total
+        return deltas
+
+    def status_changed(session: Session, user_id: UUID, total: float, old_status: OrderStatus, new_status: OrderStatus):
+        if old_status == new_status:
+            return
+        UserOrderStatsService._apply(session, user_id, UserOrderStatsService._status_deltas(total, old_status, new_status))
+
+    def orders_status_changed(session: Session, changes: list[OrderStatusChange]):
+        """Handler de ORDER_STATUS_CHANGED: soma as variações por usuário e aplica um upsert por usuário."""
+        per_user = defaultdict(lambda: defaultdict(int))
+        for change in changes:
+            deltas = UserOrderStatsService._status_deltas(change.total, change.old_status, change.new_status)
+            for name, value in deltas.items():
+                per_user[change.user_id][name] += value
+        for user_id, deltas in per_user.items():
+            UserOrderStatsService._apply(session, user_id, deltas)
+
+    def get_user_stats(id: UUID, session: Session, auth_user: User):
+        if not auth_user:
+            raise HTTPException(status_code=401, detail="É preciso estar logado para acessar as informações")
+        if not auth_user.is_admin and auth_user.id != id:
+            raise HTTPException(status_code=403, detail="Acesso não permitido as informações")
+
+        stats = session.get(UserOrderStats, id)
+        if not stats:
+            return UserOrderStats(id)
+        return stats
+
+    def rebuild(session: Session, batch_size: int = 1000, archive: OrderArchive = order_archive):
+        """Reconstrói user_order_stats_db a partir de order_db e do arquivo, um lote de usuários por transação."""
+        rebuilt = 0
+        last_id = None
+        while True:
+            query = select(User.id).order_by(User.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            user_ids = session.scalars(query).all()
+            if not user_ids:
+                return rebuilt
+
+            rows = session.execute(
+                select(
+                    Order.user_id,
+                    func.count(Order.id),
+                    func.sum(case((Order.status == OrderStatus.DELIVERED, 1), else_=0)),
+                    func.sum(case((Order.status == OrderStatus.CANCELED, 1), else_=0)),
+                    func.sum(case((Order.status != OrderStatus.CANCELED, Order.total), else_=0)),
+                    func.max(Order.created_at),
+                )
+                .where(Order.user_id.in_(user_ids))
+                .group_by(Order.user_id)
+            ).all()
+            stats = {
+                user_id: [orders_count, delivered_count, canceled_count, total_spent or 0, as_utc(last_order_at)]
+                for user_id, orders_count, delivered_count, canceled_count, total_spent, last_order_at in rows
+            }
+
+            # Pedidos arquivados saíram de order_db, mas continuam contando no resumo.
+            for record in OrderArchiveService.archived_records(session, user_ids, archive=archive):
+                status = OrderStatus(record["status"])
+                created_at = as_utc(datetime.fromisoformat(record["created_at"]))
+                values = stats.setdefault(UUID(record["user_id"]), [0, 0, 0, 0, created_at])
+                values[0] += 1
+                values[1] += status == OrderStatus.DELIVERED
+                values[2] += status == OrderStatus.CANCELED
+                values[3] += 0 if status == OrderStatus.CANCELED else record["total"]
+                values[4] = max(values[4], created_at)
+
+            session.execute(delete(UserOrderStats).where(UserOrderStats.user_id.in_(user_ids)))
+            for user_id, values in stats.items():
+                session.add(UserOrderStats(user_id, *values))
+            session.commit()
+
+            rebuilt += len(stats)
+            last_id = user_ids[-1]
+
+subscribe(ORDER_STATUS_CHANGED, UserOrderStatsService.orders_status_changed)
@@ -0,0 +1,85 @@
+from benchmarks.seed import SeededData
+import random
+
+
+def service_cases(session_factory, data: SeededData, rng: random.Random):
+    from app.services.product_service import ProductService
+    from app.services.order_service import OrderService
+    from app.schemas.order_schemas import CreateOrderSchema, ItemSchema
+    from app.models.user import User
+
+    def with_session(fn):
+        def run():
+            session = session_factory()
+            try:
+                fn(session)
+            finally:
+                session.close()
+        return run
+
+    def get_product(session):
+        ProductService.get_product(rng.choice(data.product_slugs), session)
+
+    def get_products_by_category(session):
+        ProductService.get_products_by_category(rng.choice(data.category_slugs), session)
+
+    def create_order(session):
+        user = session.get(User, rng.choice(data.user_ids))
+        items = [ItemSchema(id=product_id, quantity=rng.randint(1, 3)) for product_id in rng.sample(data.product_ids, 3)]
+        OrderService.create_order(CreateOrderSchema(user_id=user.id, items=items), session, user)
+
+    def list_user_orders(session):
+        user = session.get(User, rng.choice(data.user_ids))
+        for order in OrderService.list_user_orders(user.id, session, user):
+            order.items
+
+    def get_order_by_id(session):
+        admin = session.get(User, data.user_ids[0])
+        OrderService.get_order_by_id(rng.choice(data.order_ids), session, admin)
+
+    return {
+        "service.product.get_product": with_session(get_product),
+        "service.product.get_products_by_category": with_session(get_products_by_category),
+        "service.order.create_order": with_session(create_order),
+        "service.order.list_user_orders": with_session(list_user_orders),
+        "service.order.get_order_by_id": with_session(get_order_by_id),
+    }
+
+
+def http_cases(client, data: SeededData, rng: random.Random):
+    from app.services.auth_service import AuthService
+
+    tokens = {user_id: AuthService.generate_token(user_id) for user_id in data.user_ids}
+
+    def auth(user_id):
+        return {"Authorization": f"Bearer {tokens[user_id]}"}
+
+    def check(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text}")
+
+    def get_product():
+        check(client.get(f"/products/{rng.choice(data.product_slugs)}"))
+
+    def get_products_by_category():
+        check(client.get(f"/products/category/{rng.choice(data.category_slugs)}"))
+
+    def get_all_categories():
+        check(client.get("/category/all"))
+
+    def create_order():
+        user_id = rng.choice(data.user_ids)
+        items = [{"id": str(product_id), "quantity": rng.randint(1, 3)} for product_id in rng.sample(data.product_ids, 3)]
+        check(client.post("/order", json={"user_id": str(user_id), "items": items}, headers=auth(user_id)))
+
+    def list_user_orders():
+        user_id = rng.choice(data.user_ids)
+        check(client.get(f"/order/user/{user_id}", headers=auth(user_id)))
+
+    return {
+        "http.GET /products/{slug}": get_product,
+        "http.GET /products/category/{slug}": get_products_by_category,
+        "http.GET /category/all": get_all_categories,
+        "http.POST /order": create_order,
+        "http.GET /order/user/{id}": list_user_orders,
+    }
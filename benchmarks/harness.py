@@ -0,0 +1,90 @@
+from dataclasses import dataclass, asdict
+import json
+import math
+import time
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    ops_per_sec: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_benchmark(name, fn, iterations=200, warmup=20):
+    for _ in range(warmup):
+        fn()
+
+    durations = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn()
+        durations.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - started
+
+    durations.sort()
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=round(percentile(durations, 50), 4),
+        p95_ms=round(percentile(durations, 95), 4),
+        p99_ms=round(percentile(durations, 99), 4),
+        mean_ms=round(sum(durations) / len(durations), 4),
+        ops_per_sec=round(iterations / elapsed, 2),
+    )
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline):
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance):
+    """Retorna (nome, métrica, baseline, atual) para cada regressão acima da tolerância."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["name"])
+        if not reference:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append((result["name"], "p95_ms", reference["p95_ms"], result["p95_ms"]))
+        if result["ops_per_sec"] < reference["ops_per_sec"] * (1 - tolerance):
+            regressions.append((result["name"], "ops_per_sec", reference["ops_per_sec"], result["ops_per_sec"]))
+    return regressions
+
+
+def format_table(results, baseline=None):
+    baseline = baseline or {}
+    header = f"{'benchmark':<40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10} {'Δp95':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        reference = baseline.get(r["name"])
+        delta = ""
+        if reference and reference["p95_ms"]:
+            delta = f"{(r['p95_ms'] / reference['p95_ms'] - 1) * 100:+.1f}%"
+        lines.append(f"{r['name']:<40} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['ops_per_sec']:>10.1f} {delta:>8}")
+    return "\n".join(lines)
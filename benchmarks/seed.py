@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from uuid import uuid4
+import random
+
+
+@dataclass
+class SeededData:
+    category_slugs: list = field(default_factory=list)
+    product_ids: list = field(default_factory=list)
+    product_slugs: list = field(default_factory=list)
+    user_ids: list = field(default_factory=list)
+    order_ids: list = field(default_factory=list)
+    password: str = "benchmark-password"
+
+
+def seed(session: Session, categories=20, products_per_category=100, users=200, orders_per_user=10, seed_value=42):
+    from app.core.security import bcrypt_context
+    from app.enums.order_status import OrderStatus
+    from app.models import Category, Product, User, Order, OrderItem
+
+    rng = random.Random(seed_value)
+    data = SeededData()
+
+    category_rows = []
+    for i in range(categories):
+        slug = f"categoria-{i}"
+        category_rows.append({"id": uuid4(), "name": f"Categoria {i}", "slug": slug, "image_url": f"{slug}.png"})
+        data.category_slugs.append(slug)
+    session.execute(insert(Category), category_rows)
+
+    product_rows = []
+    for category in category_rows:
+        for j in range(products_per_category):
+            slug = f"{category['slug']}-produto-{j}"
+            product_id = uuid4()
+            product_rows.append({
+                "id": product_id,
+                "name": f"Produto {j} {category['name']}",
+                "slug": slug,
+                "description": "Descrição de produto para benchmark " * 4,
+                "price": round(rng.uniform(5, 150), 2),
+                "category_id": category["id"],
+                "is_active": rng.random() > 0.05,
+                "image_url": f"{slug}.png",
+            })
+            data.product_ids.append(product_id)
+            data.product_slugs.append(slug)
+    session.execute(insert(Product), product_rows)
+
+    hashed_password = bcrypt_context.hash(data.password)
+    user_rows = []
+    for i in range(users):
+        user_id = uuid4()
+        user_rows.append({
+            "id": user_id,
+            "first_name": f"Usuario {i}",
+            "last_name": "Benchmark",
+            "email": f"usuario{i}@benchmark.com",
+            "password": hashed_password,
+            "is_admin": i == 0,
+        })
+        data.user_ids.append(user_id)
+    session.execute(insert(User), user_rows)
+
+    prices = {row["id"]: row["price"] for row in product_rows}
+    order_rows, item_rows = [], []
+    statuses = [OrderStatus.OPEN, OrderStatus.DELIVERED, OrderStatus.DELIVERED, OrderStatus.CANCELED]
+    now = datetime.now(timezone.utc)
+    for user_id in data.user_ids:
+        for _ in range(orders_per_user):
+            order_id = uuid4()
+            created_at = now - timedelta(days=rng.uniform(0, 90))
+            total = 0
+            for product_id in rng.sample(data.product_ids, rng.randint(1, 5)):
+                quantity = rng.randint(1, 4)
+                total += quantity * prices[product_id]
+                item_rows.append({"id": uuid4(), "order_id": order_id, "product_id": product_id, "quantity": quantity, "price": prices[product_id], "created_at": created_at})
+            order_rows.append({"id": order_id, "user_id": user_id, "total": total, "status": rng.choice(statuses),
+                               "created_at": created_at, "updated_at": created_at})
+            data.order_ids.append(order_id)
+    session.execute(insert(Order), order_rows)
+    session.execute(insert(OrderItem), item_rows)
+    session.commit()
+
+    data.product_ids = [row["id"] for row in product_rows if row["is_active"]]
+    return data
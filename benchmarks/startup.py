@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from benchmarks.harness import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGET = "app.main:app"
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Executado em um interpretador novo a cada medição: importa o módulo e resolve o
+# atributo (app.main:app monta a aplicação via create_app()).
+BOOT_SNIPPET = """
+import importlib, time
+started = time.perf_counter()
+module_name, _, attribute = {target!r}.partition(":")
+module = importlib.import_module(module_name)
+if attribute:
+    getattr(module, attribute)
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de inicialização da API e relatório de imports (-X importtime)")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="módulo:atributo a carregar")
+    parser.add_argument("--runs", type=int, default=5, help="quantidade de inicializações medidas")
+    parser.add_argument("--top", type=int, default=15, help="quantidade de módulos e pacotes no relatório")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="orçamento para a mediana da inicialização (padrão: STARTUP_BUDGET_MS ou 1500)")
+    parser.add_argument("--check", action="store_true", help="falha se a mediana passar do orçamento")
+    parser.add_argument("--output", help="grava o relatório em JSON")
+    return parser.parse_args(argv)
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("DB_URL", "sqlite://")
+    env.setdefault("SECRET_KEY", "startup-secret")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("JWT_EXPIRATION_TIME", "30")
+    env.setdefault("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "startup-uploads"))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def run_python(args, env):
+    proc = subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=ROOT, env=env)
+    if proc.returncode != 0:
+        raise SystemExit(f"Falha ao carregar a aplicação:\n{proc.stderr}")
+    return proc
+
+
+def measure_boot(target, runs, env):
+    snippet = BOOT_SNIPPET.format(target=target)
+    return [float(run_python(["-c", snippet], env).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def parse_importtime(output):
+    """Converte a saída de -X importtime em [{module, self_ms, cumulative_ms}]."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        try:
+            modules.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+        except ValueError:
+            continue
+    return modules
+
+
+def by_package(modules):
+    totals = defaultdict(float)
+    for module in modules:
+        totals[module["module"].split(".")[0]] += module["self_ms"]
+    return sorted(({"package": name, "self_ms": round(total, 3)} for name, total in totals.items()),
+                  key=lambda item: item["self_ms"], reverse=True)
+
+
+def format_report(boot_ms, modules, top, budget_ms):
+    ordered = sorted(boot_ms)
+    lines = [
+        f"inicialização: mediana {statistics.median(ordered):.1f} ms, p95 {percentile(ordered, 95):.1f} ms, "
+        f"mín {ordered[0]:.1f} ms ({len(ordered)} execuções, orçamento {budget_ms:.0f} ms)",
+        "",
+        f"{'pacote':<40} {'self ms':>10}",
+    ]
+    lines += [f"{item['package']:<40} {item['self_ms']:>10.1f}" for item in by_package(modules)[:top]]
+    lines += ["", f"{'módulo':<60} {'self ms':>10} {'acum. ms':>10}"]
+    slowest = sorted(modules, key=lambda item: item["self_ms"], reverse=True)[:top]
+    lines += [f"{item['module']:<60} {item['self_ms']:>10.1f} {item['cumulative_ms']:>10.1f}" for item in slowest]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = child_env()
+
+    boot_ms = measure_boot(args.target, args.runs, env)
+    importtime = run_python(["-X", "importtime", "-c", BOOT_SNIPPET.format(target=args.target)], env)
+    modules = parse_importtime(importtime.stderr)
+    print(format_report(boot_ms, modules, args.top, args.budget_ms))
+
+    median = statistics.median(boot_ms)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"target": args.target, "boot_ms": boot_ms, "median_ms": median,
+                       "budget_ms": args.budget_ms, "packages": by_package(modules), "modules": modules}, f, indent=2)
+
+    if median > args.budget_ms:
+        print(f"REGRESSÃO inicialização de {args.target}: mediana {median:.1f} ms > orçamento {args.budget_ms:.0f} ms")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
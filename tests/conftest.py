@@ -1,6 +1,12 @@
 import pytest
 from app.models.user import User
 from app.models.base import Base
+from app.core.revocation import revocation_list
+from app.core.order_archive import order_archive
+from app.services.product_service import product_cache
+from app.core.price_book import price_book
+from app.core.storage import LocalStorage
+from app.core.sql_instrumentation import track_queries
 from tests.test_database import engine, TestingSessionLocal
 from uuid import uuid4
 
@@ -15,6 +21,29 @@ def db_session():
         session.close()
         Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    revocation_list.clear()
+    order_archive.clear()
+    product_cache.clear()
+    price_book.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path, "test-secret")
+    monkeypatch.setattr("app.core.storage._storage", storage)
+    return storage
+
+@pytest.fixture(autouse=True)
+def isolated_order_archive(tmp_path, monkeypatch):
+    # Estatísticas e rollups também leem o arquivo; nenhum teste deve ver o ARCHIVE_DIR real.
+    monkeypatch.setattr(order_archive, "directory", str(tmp_path / "archive"))
+
+@pytest.fixture
+def query_counter():
+    return track_queries
+
 @pytest.fixture
 def create_user():
     def _create_user(session):
@@ -29,4 +58,13 @@ def create_user():
         session.commit()
         session.refresh(user)
         return user
-    return _create_user
\ No newline at end of file
+    return _create_user
+
+@pytest.fixture
+def create_admin(create_user):
+    def _create_admin(session):
+        admin = create_user(session)
+        admin.is_admin = True
+        session.commit()
+        return admin
+    return _create_admin
\ No newline at end of file
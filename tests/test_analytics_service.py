@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.category import Category
+from app.models.sales_rollup import SalesRollup
+from app.enums.order_status import OrderStatus
+from app.services.analytics_service import AnalyticsService
+
+DAY_ONE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+DAY_TWO = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+def create_catalog(session):
+    category = Category("Test", "test", "test.png")
+    session.add(category)
+    session.flush()
+    burger = Product("Burger", "burger", "description", 20, category.id, "burger.png", True)
+    soda = Product("Soda", "soda", "description", 5, category.id, "soda.png", True)
+    session.add_all([burger, soda])
+    session.commit()
+    return category, burger, soda
+
+def create_order(session, user, created_at, items, status=OrderStatus.OPEN):
+    order = Order(user.id, status)
+    order.created_at = created_at
+    order.updated_at = created_at
+    session.add(order)
+    session.flush()
+    for product, quantity in items:
+        order.items.append(OrderItem(order.id, product.id, quantity, product.price))
+    order.calculate_price()
+    session.commit()
+    return order
+
+def test_refresh_rollups_aggregates_revenue_by_product_and_day(db_session, create_admin):
+    admin = create_admin(db_session)
+    category, burger, soda = create_catalog(db_session)
+    create_order(db_session, admin, DAY_ONE + timedelta(hours=10), [(burger, 2), (soda, 1)])
+    create_order(db_session, admin, DAY_ONE + timedelta(hours=12), [(burger, 1)])
+    create_order(db_session, admin, DAY_TWO + timedelta(hours=9), [(soda, 3)])
+    create_order(db_session, admin, DAY_TWO + timedelta(hours=9), [(burger, 5)], OrderStatus.CANCELED)
+
+    assert AnalyticsService.refresh_rollups(db_session) == 2
+
+    products = AnalyticsService.revenue_by_product(None, None, 10, db_session, admin)
+    assert [(p["product_id"], p["quantity"], p["revenue"], p["orders_count"]) for p in products] == [
+        (burger.id, 3, 60, 2),
+        (soda.id, 4, 20, 2),
+    ]
+    daily = AnalyticsService.revenue_over_time(None, None, "day", db_session, admin)
+    assert [(d["bucket_start"], d["revenue"]) for d in daily] == [(DAY_ONE, 65), (DAY_TWO, 15)]
+    hourly = AnalyticsService.revenue_over_time(DAY_ONE, DAY_TWO, "hour", db_session, admin)
+    assert [d["revenue"] for d in hourly] == [45, 20]
+    categories = AnalyticsService.revenue_by_category(None, None, db_session, admin)
+    assert categories == [{"category_id": category.id, "quantity": 7, "revenue": 80}]
+
+def test_refresh_rollups_only_recomputes_changed_days(db_session, create_admin, monkeypatch):
+    monkeypatch.setattr("app.services.analytics_service.ROLLUP_OVERLAP_SECONDS", 0)
+    admin = create_admin(db_session)
+    _, burger, soda = create_catalog(db_session)
+    create_order(db_session, admin, DAY_ONE + timedelta(hours=10), [(soda, 1)])
+    order = create_order(db_session, admin, DAY_TWO + timedelta(hours=10), [(burger, 1)])
+    AnalyticsService.refresh_rollups(db_session)
+
+    order.status = OrderStatus.CANCELED
+    order.updated_at = datetime.now(timezone.utc)
+    db_session.commit()
+
+    assert AnalyticsService.refresh_rollups(db_session) == 1
+    daily = AnalyticsService.revenue_over_time(None, None, "day", db_session, admin)
+    assert [(d["bucket_start"], d["revenue"]) for d in daily] == [(DAY_ONE, 5)]
+    assert db_session.query(SalesRollup).filter(SalesRollup.product_id == burger.id).count() == 0
+
+def test_refresh_rollups_without_changes_is_noop(db_session, create_admin, monkeypatch):
+    monkeypatch.setattr("app.services.analytics_service.ROLLUP_OVERLAP_SECONDS", 0)
+    admin = create_admin(db_session)
+    _, burger, _ = create_catalog(db_session)
+    create_order(db_session, admin, datetime.now(timezone.utc) - timedelta(days=2), [(burger, 1)])
+    AnalyticsService.refresh_rollups(db_session)
+
+    assert AnalyticsService.refresh_rollups(db_session) == 0
+
+def test_revenue_fail_with_not_admin_user(db_session, create_user):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        AnalyticsService.revenue_by_product(None, None, 10, db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_revenue_fail_with_invalid_granularity(db_session, create_admin):
+    admin = create_admin(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        AnalyticsService.revenue_over_time(None, None, "week", db_session, admin)
+
+    assert exc.value.status_code == 400
+
+def test_refresh_rollups_reprocesses_overlap_window(db_session, create_admin):
+    admin = create_admin(db_session)
+    _, burger, _ = create_catalog(db_session)
+    create_order(db_session, admin, datetime.now(timezone.utc) - timedelta(days=2), [(burger, 1)])
+    AnalyticsService.refresh_rollups(db_session)
+
+    assert AnalyticsService.refresh_rollups(db_session) == 1
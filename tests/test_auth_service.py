@@ -1,5 +1,7 @@
 import pytest
-from app.schemas.auth_schemas import RegisterSchema, LoginSchema, AuthResponseSchema
+from app.schemas.auth_schemas import RegisterSchema, LoginSchema, AuthResponseSchema, LogoutSchema
+from app.core.revocation import RevocationList
+from app.api.deps import verify_token
 from app.services.auth_service import AuthService
 from app.core.security import bcrypt_context
 from fastapi import HTTPException
@@ -118,3 +120,51 @@ def test_login_fail_with_incorrect_password(db_session, create_user):
 
     assert exc.value.status_code == 400
 
+def test_generate_token_contains_unique_jti(db_session, create_user):
+    user = create_user(db_session)
+
+    first = AuthService.decode_token(AuthService.generate_token(user.id))
+    second = AuthService.decode_token(AuthService.generate_token(user.id))
+
+    assert first["jti"] != second["jti"]
+
+def test_logout_revokes_access_and_refresh_tokens(db_session, create_user):
+    user = create_user(db_session)
+    response = AuthService.refresh_token(user)
+
+    AuthService.logout(response.access_token, LogoutSchema(refresh_token=response.refresh_token), db_session, user)
+
+    for token in (response.access_token, response.refresh_token):
+        with pytest.raises(HTTPException) as exc:
+            verify_token(token, db_session)
+        assert exc.value.status_code == 401
+
+def test_logout_fail_with_refresh_token_from_another_user(db_session, create_user):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    token = AuthService.generate_token(user.id)
+    other_refresh = AuthService.generate_token(other.id)
+
+    with pytest.raises(HTTPException) as exc:
+        AuthService.logout(token, LogoutSchema(refresh_token=other_refresh), db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_verify_token_accepts_not_revoked_token(db_session, create_user):
+    user = create_user(db_session)
+    token = AuthService.generate_token(user.id)
+
+    assert verify_token(token, db_session).id == user.id
+
+def test_revocation_list_picks_up_revocations_from_other_workers(db_session, create_user):
+    user = create_user(db_session)
+    token = AuthService.generate_token(user.id)
+    dic_info = AuthService.decode_token(token)
+    worker = RevocationList(refresh_seconds=0)
+
+    assert worker.is_revoked(dic_info["jti"], db_session) is False
+
+    AuthService.revoke_token(dic_info, db_session)
+    db_session.commit()
+
+    assert worker.is_revoked(dic_info["jti"], db_session) is True
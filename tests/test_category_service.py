@@ -1,7 +1,9 @@
 from app.services.category_service import CategoryService
+from app.services.job_service import JobService
 from fastapi import UploadFile, HTTPException
 from starlette.datastructures import Headers
 from io import BytesIO
+import base64
 import pytest
 from app.models.category import Category
 from app.schemas.category_schemas import UpdateCategoryNameAndSlugSchema
@@ -19,13 +21,11 @@ def create_fake_image():
         headers=headers
     )
 
-def test_create_category_success(db_session, create_user, tmp_path, monkeypatch):
+def test_create_category_success(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     category = CategoryService.create_category("Lançamentos", "lancamentos", image, db_session, admin)
@@ -33,13 +33,11 @@ def test_create_category_success(db_session, create_user, tmp_path, monkeypatch)
     assert category.name == "Lançamentos"
     assert category.slug == "lancamentos"
 
-def test_create_category_fail_with_invalid_name(db_session, create_user, tmp_path, monkeypatch):
+def test_create_category_fail_with_invalid_name(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -47,13 +45,11 @@ def test_create_category_fail_with_invalid_name(db_session, create_user, tmp_pat
 
     assert exc.value.status_code == 400
 
-def test_create_category_fail_with_invalid_slug(db_session, create_user, tmp_path, monkeypatch):
+def test_create_category_fail_with_invalid_slug(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -61,11 +57,9 @@ def test_create_category_fail_with_invalid_slug(db_session, create_user, tmp_pat
 
     assert exc.value.status_code == 400
 
-def test_create_category_fail_because_user_is_not_admin(db_session, create_user, tmp_path, monkeypatch):
+def test_create_category_fail_because_user_is_not_admin(db_session, create_user):
     user = create_user(db_session)
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -73,9 +67,7 @@ def test_create_category_fail_because_user_is_not_admin(db_session, create_user,
 
     assert exc.value.status_code == 403
 
-def test_create_category_fail_because_user_not_authenticated(db_session, tmp_path, monkeypatch):
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
+def test_create_category_fail_because_user_not_authenticated(db_session):
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -83,15 +75,13 @@ def test_create_category_fail_because_user_not_authenticated(db_session, tmp_pat
 
     assert exc.value.status_code == 401
 
-def test_create_category_fail_with_invalid_name(db_session, create_user, tmp_path, monkeypatch):
+def test_create_category_fail_with_invalid_name(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     category = Category("Lançamentos", "lancamentos", "image_url")
     db_session.add(category)
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -106,9 +96,68 @@ def test_get_all_categories(db_session):
     db_session.add(category2)
     db_session.commit()
 
-    categories = CategoryService.get_all_categories(db_session)
+    categories, next_cursor = CategoryService.get_all_categories(db_session, 50)
 
-    assert len(categories) == 2
+    assert [category.slug for category in categories] == ["bebidas", "lancamentos"]
+    assert next_cursor is None
+
+def test_get_all_categories_pages_with_cursor(db_session):
+    names = ["Bebidas", "Doces", "Lanches", "Pizzas", "Sucos"]
+    db_session.add_all(Category(name, name.lower(), "image_url") for name in reversed(names))
+    db_session.add(Category("Doces", "doces-2", "image_url"))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = CategoryService.get_all_categories(db_session, 2, cursor)
+        seen.append([category.slug for category in page])
+        if cursor is None:
+            break
+
+    expected = sorted(db_session.query(Category).all(), key=lambda category: (category.name, category.id.hex))
+    assert seen == [["bebidas", expected[1].slug], [expected[2].slug, "lanches"], ["pizzas", "sucos"]]
+
+def test_get_all_categories_page_costs_one_query(db_session, query_counter):
+    db_session.add_all(Category(f"Categoria {i:03}", f"categoria-{i}", "image_url") for i in range(100))
+    db_session.commit()
+    _, cursor = CategoryService.get_all_categories(db_session, 10)
+
+    with query_counter() as stats:
+        page, _ = CategoryService.get_all_categories(db_session, 10, cursor)
+
+    assert stats.count == 1
+    assert [category.name for category in page] == [f"Categoria {i:03}" for i in range(10, 20)]
+
+def test_get_all_categories_filters_by_name_prefix(db_session):
+    db_session.add_all([
+        Category("Bebidas", "bebidas", "image_url"),
+        Category("Bebidas quentes", "bebidas-quentes", "image_url"),
+        Category("Bolos", "bolos", "image_url"),
+        Category("100% natural", "natural", "image_url"),
+        Category("100 calorias", "calorias", "image_url"),
+    ])
+    db_session.commit()
+
+    categories, _ = CategoryService.get_all_categories(db_session, 50, prefix="Beb")
+    percent, _ = CategoryService.get_all_categories(db_session, 50, prefix="100%")
+
+    assert [category.slug for category in categories] == ["bebidas", "bebidas-quentes"]
+    assert [category.slug for category in percent] == ["natural"]
+
+def test_get_all_categories_fail_with_invalid_cursor(db_session):
+    with pytest.raises(HTTPException) as exc:
+        CategoryService.get_all_categories(db_session, 10, "não-é-um-cursor")
+
+    assert exc.value.status_code == 400
+
+def test_get_all_categories_fail_with_malformed_cursor(db_session):
+    encoded = [base64.urlsafe_b64encode(raw).decode().rstrip("=")
+               for raw in (b"5", b"null", b'"ab"', b'["a"]', b'["a","b","c"]', b'{"a":"b","c":"d"}', b'[1,2]')]
+
+    for cursor in ["NQ", *encoded]:
+        with pytest.raises(HTTPException) as exc:
+            CategoryService.get_all_categories(db_session, 10, cursor)
+        assert exc.value.status_code == 400
 
 def test_get_category_with_success(db_session):
     new_category = Category("Lançamentos", "lancamentos", "image_url")
@@ -126,13 +175,11 @@ def test_get_category_fail_because_slug_not_exists(db_session):
 
     assert exc.value.status_code == 404
 
-def test_delete_category_success(db_session, create_user, tmp_path, monkeypatch):
+def test_delete_category_success(db_session, create_user, tmp_path):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     category = Category("Teste", "teste", "test.png")
     db_session.add(category)
     db_session.commit()
@@ -145,6 +192,8 @@ def test_delete_category_success(db_session, create_user, tmp_path, monkeypatch)
     deleted = db_session.query(Category).filter_by(slug="teste").first()
     assert deleted is None
 
+    assert file_path.exists()
+    assert JobService.run_pending(db_session) == 1
     assert not file_path.exists()
 
 def test_delete_category_fail_because_user_is_not_admin(db_session, create_user):
@@ -245,15 +294,13 @@ def test_update_category_fail_with_not_found_category(db_session, create_user):
 
     assert exc.value.status_code == 404
 
-def test_update_category_image_success(db_session, create_user, tmp_path, monkeypatch):
+def test_update_category_image_success(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     category = Category("Teste", "teste", "image.png")
     db_session.add(category)
     db_session.commit()
 
-    monkeypatch.setattr("app.services.category_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     result = CategoryService.update_category_image("teste", image, db_session, admin)
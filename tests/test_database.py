@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.models.base import Base 
+from app.core.sql_instrumentation import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = "sqlite://"
 
@@ -12,6 +13,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,  
 )
+instrument_engine(engine)
 
 TestingSessionLocal = sessionmaker(
     autocommit=False,
@@ -0,0 +1,36 @@
+from collections import Counter
+from sqlalchemy import func
+from app.cli.generate_data import GeneratorConfig, ZipfSampler, generate
+from app.models import Category, Product, User, Order, OrderItem
+from tests.test_database import engine
+import random
+
+def test_generate_loads_requested_counts(db_session):
+    config = GeneratorConfig(categories=3, products=50, users=10, orders=120, chunk_size=50, seed=1)
+
+    counts = generate(engine, config)
+
+    assert db_session.query(Category).count() == counts["categories"] == 3
+    assert db_session.query(Product).count() == counts["products"] == 50
+    assert db_session.query(User).count() == counts["users"] == 10
+    assert db_session.query(Order).count() == counts["orders"] == 120
+    assert db_session.query(OrderItem).count() == counts["order_items"]
+
+def test_generate_order_totals_match_items(db_session):
+    generate(engine, GeneratorConfig(categories=2, products=20, users=5, orders=30, seed=2))
+
+    item_totals = dict(
+        db_session.query(OrderItem.order_id, func.sum(OrderItem.quantity * OrderItem.price))
+        .group_by(OrderItem.order_id)
+        .all()
+    )
+    for order in db_session.query(Order).all():
+        assert round(item_totals[order.id], 2) == order.total
+
+def test_zipf_sampler_is_skewed():
+    sampler = ZipfSampler(1000, 1.1, random.Random(3))
+
+    counts = Counter(sampler.sample() for _ in range(20000))
+    top, _ = zip(*counts.most_common(10))
+
+    assert sum(counts[i] for i in top) > 20000 * 0.3
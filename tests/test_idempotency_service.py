@@ -0,0 +1,205 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from app.models.order import Order
+from app.models.product import Product
+from app.models.category import Category
+from app.models.idempotency_key import IdempotencyKey
+from app.services.order_service import OrderService
+from app.services.idempotency_service import IdempotencyService, REPLAY_HEADER
+from app.schemas.order_schemas import CreateOrderSchema, ItemSchema, OrderResponseSchema
+from tests.test_database import TestingSessionLocal
+
+HASH = IdempotencyService.fingerprint("POST", "/order", {"items": []})
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def counting_handler(body=None):
+    calls = []
+    def handler():
+        calls.append(1)
+        return body or {"ok": len(calls)}
+    return handler, calls
+
+def test_replay_returns_stored_response_without_running_handler(db_session, create_user):
+    user = create_user(db_session)
+    handler, calls = counting_handler()
+
+    first = run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+    second = run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert len(calls) == 1
+    assert json.loads(first.body) == json.loads(second.body) == {"ok": 1}
+    assert second.headers[REPLAY_HEADER] == "true"
+    assert REPLAY_HEADER.lower() not in first.headers
+
+def test_same_key_is_scoped_by_user(db_session, create_user):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    handler, calls = counting_handler()
+
+    run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+    run(IdempotencyService.execute("key-1", HASH, db_session, other, handler))
+
+    assert len(calls) == 2
+
+def test_reused_key_with_different_request_fails(db_session, create_user):
+    user = create_user(db_session)
+    handler, _ = counting_handler()
+    run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    other_hash = IdempotencyService.fingerprint("POST", "/order", {"items": [1]})
+    with pytest.raises(HTTPException) as exc:
+        run(IdempotencyService.execute("key-1", other_hash, db_session, user, handler))
+
+    assert exc.value.status_code == 422
+
+def test_failed_request_releases_key(db_session, create_user):
+    user = create_user(db_session)
+
+    def failing():
+        raise HTTPException(status_code=400, detail="Pedido inválido")
+
+    with pytest.raises(HTTPException):
+        run(IdempotencyService.execute("key-1", HASH, db_session, user, failing))
+    handler, calls = counting_handler()
+    run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert len(calls) == 1
+
+def test_expired_key_runs_request_again(db_session, create_user):
+    user = create_user(db_session)
+    handler, calls = counting_handler()
+    run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+    record = db_session.get(IdempotencyKey, (user.id, "key-1"))
+    record.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+
+    run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert len(calls) == 2
+    assert IdempotencyService.purge_expired(db_session) == 0
+
+def test_concurrent_duplicate_waits_for_in_flight_request(db_session, create_user, monkeypatch):
+    monkeypatch.setattr("app.services.idempotency_service.IDEMPOTENCY_POLL_SECONDS", 0.01)
+    user = create_user(db_session)
+    user_id = user.id
+    db_session.add(IdempotencyKey(user_id, "key-1", HASH, datetime.now(timezone.utc) + timedelta(hours=1)))
+    db_session.commit()
+    handler, calls = counting_handler()
+
+    async def finish_in_flight():
+        await asyncio.sleep(0.05)
+        session = TestingSessionLocal()
+        record = session.get(IdempotencyKey, (user_id, "key-1"))
+        record.status_code = 200
+        record.response_body = json.dumps({"ok": "first"})
+        session.commit()
+        session.close()
+
+    async def scenario():
+        response, _ = await asyncio.gather(
+            IdempotencyService.execute("key-1", HASH, db_session, user, handler),
+            finish_in_flight(),
+        )
+        return response
+
+    response = run(scenario())
+
+    assert calls == []
+    assert json.loads(response.body) == {"ok": "first"}
+
+def test_concurrent_duplicate_times_out_while_in_flight(db_session, create_user, monkeypatch):
+    monkeypatch.setattr("app.services.idempotency_service.IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    monkeypatch.setattr("app.services.idempotency_service.IDEMPOTENCY_POLL_SECONDS", 0.01)
+    user = create_user(db_session)
+    db_session.add(IdempotencyKey(user.id, "key-1", HASH, datetime.now(timezone.utc) + timedelta(hours=1)))
+    db_session.commit()
+    handler, calls = counting_handler()
+
+    with pytest.raises(HTTPException) as exc:
+        run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert exc.value.status_code == 409
+    assert calls == []
+
+def test_abandoned_claim_is_taken_over_after_lock_expires(db_session, create_user):
+    user = create_user(db_session)
+    now = datetime.now(timezone.utc)
+    db_session.add(IdempotencyKey(user.id, "key-1", HASH, now + timedelta(hours=1), locked_until=now - timedelta(seconds=1)))
+    db_session.commit()
+    handler, calls = counting_handler()
+
+    response = run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+    replay = run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert len(calls) == 1
+    assert json.loads(response.body) == json.loads(replay.body) == {"ok": 1}
+    assert replay.headers[REPLAY_HEADER] == "true"
+
+def test_claim_within_lock_is_not_taken_over(db_session, create_user, monkeypatch):
+    monkeypatch.setattr("app.services.idempotency_service.IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    monkeypatch.setattr("app.services.idempotency_service.IDEMPOTENCY_POLL_SECONDS", 0.01)
+    user = create_user(db_session)
+    now = datetime.now(timezone.utc)
+    db_session.add(IdempotencyKey(user.id, "key-1", HASH, now + timedelta(hours=1), locked_until=now + timedelta(seconds=30)))
+    db_session.commit()
+    handler, calls = counting_handler()
+
+    with pytest.raises(HTTPException) as exc:
+        run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert exc.value.status_code == 409
+    assert calls == []
+
+def test_order_is_discarded_when_response_is_not_stored(db_session, create_user):
+    user = create_user(db_session)
+    category = Category("Test", "test", "test.png")
+    db_session.add(category)
+    db_session.flush()
+    product = Product("Product", "product", "description", 10, category.id, "prod.png", True)
+    db_session.add(product)
+    db_session.commit()
+    body = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=2)])
+
+    def handler():
+        OrderService.create_order(body, db_session, user, commit=False)
+        raise RuntimeError("worker caiu antes de responder")
+
+    with pytest.raises(RuntimeError):
+        run(IdempotencyService.execute("key-1", HASH, db_session, user, handler))
+
+    assert db_session.query(Order).count() == 0
+    assert db_session.query(IdempotencyKey).count() == 0
+
+def test_execute_fail_with_not_authenticated_user(db_session):
+    handler, _ = counting_handler()
+
+    with pytest.raises(HTTPException) as exc:
+        run(IdempotencyService.execute("key-1", HASH, db_session, None, handler))
+
+    assert exc.value.status_code == 401
+
+def test_retried_create_order_creates_a_single_order(db_session, create_user):
+    user = create_user(db_session)
+    category = Category("Test", "test", "test.png")
+    db_session.add(category)
+    db_session.flush()
+    product = Product("Product", "product", "description", 10, category.id, "prod.png", True)
+    db_session.add(product)
+    db_session.commit()
+    body = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=2)])
+    request_hash = IdempotencyService.fingerprint("POST", "/order", body.model_dump(mode="json"))
+
+    def handler():
+        order = OrderService.create_order(body, db_session, user, commit=False)
+        return OrderResponseSchema.model_validate(order, from_attributes=True).model_dump(mode="json")
+
+    first = run(IdempotencyService.execute("retry", request_hash, db_session, user, handler))
+    second = run(IdempotencyService.execute("retry", request_hash, db_session, user, handler))
+
+    assert db_session.query(Order).count() == 1
+    assert json.loads(first.body)["id"] == json.loads(second.body)["id"]
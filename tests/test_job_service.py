@@ -0,0 +1,124 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.core import jobs
+from app.models.job import Job
+from app.services.job_service import JobService, JobRunner, PENDING, RUNNING, FAILED
+from tests.test_database import TestingSessionLocal
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(jobs, "_handlers", dict(jobs._handlers))
+    calls = []
+    jobs.register("record", lambda **payload: calls.append(payload))
+    return calls
+
+def failing(**payload):
+    raise RuntimeError("falhou")
+
+def as_utc(value):
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def test_enqueued_job_runs_and_is_removed(db_session, handlers):
+    JobService.enqueue(db_session, "record", value=1)
+    db_session.commit()
+
+    assert JobService.run_pending(db_session) == 1
+    assert handlers == [{"value": 1}]
+    assert db_session.query(Job).count() == 0
+
+def test_rolled_back_enqueue_never_runs(db_session, handlers):
+    JobService.enqueue(db_session, "record", value=1)
+    db_session.rollback()
+
+    assert JobService.run_pending(db_session) == 0
+    assert handlers == []
+
+def test_delayed_job_waits_for_run_at(db_session, handlers):
+    JobService.enqueue(db_session, "record", delay_seconds=60, value=1)
+    db_session.commit()
+
+    assert JobService.run_next(db_session) is False
+
+def test_failed_job_is_retried_with_backoff(db_session, monkeypatch):
+    monkeypatch.setattr(jobs, "_handlers", {"fail": failing})
+    JobService.enqueue(db_session, "fail")
+    db_session.commit()
+
+    assert JobService.run_next(db_session) is True
+    job = db_session.query(Job).one()
+    assert job.status == PENDING
+    assert job.attempts == 1
+    assert "falhou" in job.last_error
+    assert as_utc(job.run_at) > datetime.now(timezone.utc)
+    assert JobService.run_next(db_session) is False
+
+def test_job_fails_permanently_after_max_attempts(db_session, monkeypatch):
+    monkeypatch.setattr(jobs, "_handlers", {"fail": failing})
+    monkeypatch.setattr("app.services.job_service.JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr("app.services.job_service.JOB_BACKOFF_SECONDS", 0)
+    JobService.enqueue(db_session, "fail")
+    db_session.commit()
+
+    assert JobService.run_pending(db_session) == 2
+    job = db_session.query(Job).one()
+    assert job.status == FAILED
+    assert job.attempts == 2
+
+def test_abandoned_running_job_is_reclaimed(db_session, handlers):
+    job = JobService.enqueue(db_session, "record", value=1)
+    job.status = RUNNING
+    job.attempts = 1
+    job.locked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.commit()
+
+    assert JobService.run_pending(db_session) == 1
+    assert handlers == [{"value": 1}]
+
+def test_abandoned_running_job_fails_after_max_attempts(db_session, handlers):
+    job = JobService.enqueue(db_session, "record", value=1)
+    job.status = RUNNING
+    job.attempts = job.max_attempts
+    job.locked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.commit()
+
+    assert JobService.run_pending(db_session) == 0
+    db_session.refresh(job)
+    assert handlers == []
+    assert job.status == FAILED
+    assert job.attempts == job.max_attempts
+
+def test_backoff_grows_exponentially_up_to_limit(monkeypatch):
+    monkeypatch.setattr("app.services.job_service.JOB_BACKOFF_SECONDS", 5)
+    monkeypatch.setattr("app.services.job_service.JOB_BACKOFF_MAX_SECONDS", 30)
+
+    assert [JobService.backoff(attempt) for attempt in (1, 2, 3, 4, 5)] == [5, 10, 20, 30, 30]
+
+def test_runner_is_woken_by_commit(db_session, handlers):
+    async def scenario():
+        runner = JobRunner(TestingSessionLocal, 1, poll_seconds=60)
+        runner.start()
+        await asyncio.sleep(0.05)
+        JobService.enqueue(db_session, "record", value=2)
+        db_session.commit()
+        for _ in range(100):
+            if handlers:
+                break
+            await asyncio.sleep(0.01)
+        await runner.stop()
+
+    asyncio.run(scenario())
+
+    assert handlers == [{"value": 2}]
+
+def test_remove_file_job_is_idempotent(db_session, tmp_path):
+    path = tmp_path / "old.png"
+    path.write_text("fake image content")
+    JobService.enqueue(db_session, jobs.REMOVE_FILE, path=str(path))
+    JobService.enqueue(db_session, jobs.REMOVE_FILE, path=str(path))
+    db_session.commit()
+
+    assert JobService.run_pending(db_session) == 2
+    assert not path.exists()
+    assert db_session.query(Job).count() == 0
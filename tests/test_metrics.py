@@ -0,0 +1,60 @@
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from app.core.metrics import PrometheusMiddleware, metrics_endpoint, instrument_pool, record_cache_access
+
+def create_test_app():
+    router = APIRouter(prefix="/items")
+
+    @router.get("/{slug}")
+    async def get_item(slug: str):
+        return {"slug": slug}
+
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+    app.include_router(router)
+    return app
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_requests_are_labeled_by_route_template():
+    client = TestClient(create_test_app())
+    before = sample("http_requests_total", method="GET", route="/items/{slug}", status="200")
+
+    client.get("/items/a")
+    client.get("/items/b")
+
+    assert sample("http_requests_total", method="GET", route="/items/{slug}", status="200") == before + 2
+    assert sample("http_request_duration_seconds_count", method="GET", route="/items/{slug}", status="200") == before + 2
+
+def test_unmatched_routes_share_a_single_label():
+    client = TestClient(create_test_app())
+    before = sample("http_requests_total", method="GET", route="<unmatched>", status="404")
+
+    client.get("/nao-existe/1")
+    client.get("/nao-existe/2")
+
+    assert sample("http_requests_total", method="GET", route="<unmatched>", status="404") == before + 2
+
+def test_metrics_endpoint_exposes_cache_counters():
+    client = TestClient(create_test_app())
+    record_cache_access("test_cache", True)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'cache_requests_total{cache="test_cache",result="hit"}' in response.text
+
+def test_pool_checkout_gauge_tracks_connections_in_use():
+    engine = create_engine("sqlite://")
+    instrument_pool(engine)
+    before = sample("db_pool_checked_out")
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert sample("db_pool_checked_out") == before + 1
+
+    assert sample("db_pool_checked_out") == before
@@ -0,0 +1,211 @@
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from fastapi import HTTPException
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.category import Category
+from app.enums.order_status import OrderStatus
+from app.core.order_archive import order_archive, INDEX_SUFFIX
+from app.services.order_service import OrderService
+from app.services.order_archive_service import OrderArchiveService
+from app.services.user_order_stats_service import UserOrderStatsService
+from app.services.analytics_service import AnalyticsService, DAY
+from app.models.user_order_stats import UserOrderStats
+
+OLD = datetime.now(timezone.utc) - timedelta(days=120)
+RECENT = datetime.now(timezone.utc) - timedelta(days=5)
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(order_archive, "directory", str(tmp_path))
+    return tmp_path
+
+def create_product(session):
+    category = Category("Test", "test", "test.png")
+    session.add(category)
+    session.flush()
+    product = Product("Product", "product", "description", 10, category.id, "prod.png", True)
+    session.add(product)
+    session.commit()
+    return product
+
+def create_order(session, user, product, status, moment, quantity=2):
+    order = Order(user.id, status)
+    order.created_at = moment
+    session.add(order)
+    session.flush()
+    order.items.append(OrderItem(order.id, product.id, quantity, product.price, moment))
+    order.calculate_price()
+    order.updated_at = moment
+    session.commit()
+    return order
+
+def test_archive_moves_only_old_finished_orders(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    product = create_product(db_session)
+    delivered = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    canceled = create_order(db_session, user, product, OrderStatus.CANCELED, OLD)
+    open_order = create_order(db_session, user, product, OrderStatus.OPEN, OLD)
+    recent = create_order(db_session, user, product, OrderStatus.DELIVERED, RECENT)
+    archived_ids = {delivered.id, canceled.id}
+
+    archived = OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    assert archived == 2
+    remaining = {order_id for (order_id,) in db_session.query(Order.id)}
+    assert remaining == {open_order.id, recent.id}
+    assert db_session.query(OrderItem).filter(OrderItem.order_id.in_(archived_ids)).count() == 0
+    assert any(name.endswith(INDEX_SUFFIX) for name in os.listdir(archive_dir))
+
+def test_archive_writes_one_segment_per_batch(db_session, create_user, archive_dir, monkeypatch):
+    monkeypatch.setattr(order_archive, "block_size", 2)
+    user = create_user(db_session)
+    product = create_product(db_session)
+    orders = [create_order(db_session, user, product, OrderStatus.DELIVERED, OLD + timedelta(hours=i)) for i in range(5)]
+    order_ids = [order.id for order in orders]
+
+    archived = OrderArchiveService.archive_finished_orders(db_session, older_than_days=90, batch_size=3)
+
+    assert archived == 5
+    assert len([name for name in os.listdir(archive_dir) if name.endswith(INDEX_SUFFIX)]) == 2
+    for order_id in order_ids:
+        assert order_archive.find(order_id)["id"] == str(order_id)
+
+def test_get_order_by_id_falls_back_to_archive(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    product = create_product(db_session)
+    order = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD, quantity=3)
+    order_id = order.id
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    result = OrderService.get_order_by_id(order_id, db_session, user)
+
+    assert result.id == order_id
+    assert result.status == OrderStatus.DELIVERED
+    assert result.total == 30
+    assert result.items[0].quantity == 3
+    assert result.items[0].product.id == product.id
+
+def test_get_archived_order_fail_with_user_different_from_order_user(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    product = create_product(db_session)
+    order = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    order_id = order.id
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.get_order_by_id(order_id, db_session, other)
+
+    assert exc.value.status_code == 403
+
+def test_list_user_orders_includes_archived_on_request(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    product = create_product(db_session)
+    archived = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    create_order(db_session, other, product, OrderStatus.DELIVERED, OLD)
+    recent = create_order(db_session, user, product, OrderStatus.OPEN, RECENT)
+    archived_id, recent_id = archived.id, recent.id
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    hot_only = OrderService.list_user_orders(user.id, db_session, user)
+    everything = OrderService.list_user_orders(user.id, db_session, user, include_archived=True)
+    since_recent = OrderService.list_user_orders(user.id, db_session, user, since=RECENT - timedelta(days=1),
+                                                 include_archived=True)
+
+    assert [order.id for order in hot_only] == [recent_id]
+    assert [order.id for order in everything] == [recent_id, archived_id]
+    assert [order.id for order in since_recent] == [recent_id]
+
+def test_restore_order_moves_it_back_to_hot_tables(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    admin = create_user(db_session)
+    admin.is_admin = True
+    db_session.commit()
+    product = create_product(db_session)
+    order = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    order_id = order.id
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    OrderArchiveService.restore_order(order_id, db_session, admin)
+    db_session.expire_all()
+
+    restored = db_session.query(Order).filter(Order.id == order_id).one()
+    assert restored.total == 20
+    assert len(restored.items) == 1
+    assert OrderArchiveService.archive_finished_orders(db_session, older_than_days=90) == 0
+
+def test_restore_order_keeps_version_moving_forward(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    admin = create_user(db_session)
+    admin.is_admin = True
+    db_session.commit()
+    product = create_product(db_session)
+    order = create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    order_id, archived_version = order.id, order.version
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    restored = OrderArchiveService.restore_order(order_id, db_session, admin)
+    restored.status = OrderStatus.CANCELED
+    db_session.commit()
+
+    assert archived_version > 1
+    assert restored.version == archived_version + 2
+
+def test_rebuild_order_stats_counts_archived_orders(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    product = create_product(db_session)
+    create_order(db_session, user, product, OrderStatus.DELIVERED, OLD)
+    create_order(db_session, user, product, OrderStatus.CANCELED, OLD + timedelta(hours=1))
+    create_order(db_session, user, product, OrderStatus.OPEN, RECENT)
+    user_id = user.id
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    UserOrderStatsService.rebuild(db_session)
+    db_session.expire_all()
+
+    stats = db_session.get(UserOrderStats, user_id)
+    assert (stats.orders_count, stats.delivered_count, stats.canceled_count, stats.total_spent) == (3, 1, 1, 40)
+
+def test_refresh_rollups_after_restore_keeps_archived_revenue(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+    admin = create_user(db_session)
+    admin.is_admin = True
+    db_session.commit()
+    product = create_product(db_session)
+    orders = [create_order(db_session, user, product, OrderStatus.DELIVERED, OLD + timedelta(minutes=i), quantity=1)
+              for i in range(3)]
+    order_id = orders[0].id
+    AnalyticsService.refresh_rollups(db_session)
+    OrderArchiveService.archive_finished_orders(db_session, older_than_days=90)
+
+    OrderArchiveService.restore_order(order_id, db_session, admin)
+    refreshed = AnalyticsService.refresh_rollups(db_session)
+
+    revenue = AnalyticsService.revenue_over_time(None, None, DAY, db_session, admin)
+    assert refreshed == 1
+    assert [bucket["revenue"] for bucket in revenue] == [30]
+
+def test_restore_order_fail_with_not_admin_user(db_session, create_user, archive_dir):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderArchiveService.restore_order(uuid4(), db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_restore_order_fail_when_order_is_not_archived(db_session, create_user, archive_dir):
+    admin = create_user(db_session)
+    admin.is_admin = True
+    db_session.commit()
+    product = create_product(db_session)
+    order = create_order(db_session, admin, product, OrderStatus.DELIVERED, RECENT)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderArchiveService.restore_order(order.id, db_session, admin)
+
+    assert exc.value.status_code == 400
@@ -1,12 +1,28 @@
+import json
+import time
 import pytest
 from fastapi import HTTPException
 from app.models.order import Order
+from app.models.user import User
 from app.models.product import Product
 from app.models.category import Category
 from app.enums.order_status import OrderStatus
 from app.services.order_service import OrderService
-from app.schemas.order_schemas import CreateOrderSchema, ItemSchema
+from app.core.fieldsets import render
+from app.schemas.order_schemas import OrderResponseSchema, CreateOrderSchema, QuoteOrderSchema, ItemSchema, BulkOrderStatusSchema, BulkOrderFilterSchema
+from app.models.user_order_stats import UserOrderStats
+from app.core import events
+from app.core.ids import uuid7_datetime
+from app.core.price_book import price_book
+from app.services.product_service import ProductService
+from app.schemas.product_schemas import UpdateProductSchema
+from sqlalchemy import update
+from datetime import datetime, timezone
 from uuid import uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.api.routes.order_routes import order_router
 
 def test_list_orders_user_success(db_session, create_user):
     user = create_user(db_session)
@@ -106,7 +122,7 @@ def test_cancel_order_fail_with_delivered_order(db_session, create_user):
     with pytest.raises(HTTPException) as exc:
         OrderService.cancel_order(order.id, db_session, user)
 
-    assert exc.value.status_code == 400
+    assert exc.value.status_code == 409
 
 def test_delivered_order_success(db_session, create_user):
     user = create_user(db_session)
@@ -237,4 +253,471 @@ def test_create_order_fail_with_inactive_product(db_session, create_user):
     with pytest.raises(HTTPException) as exc:
         OrderService.create_order(schema, db_session, user)
 
-    assert exc.value.status_code == 400
\ No newline at end of file
+    assert exc.value.status_code == 400
+
+def test_list_user_orders_loads_items_without_n_plus_one(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    for _ in range(5):
+        db_session.add(Order(user.id, OrderStatus.OPEN))
+    db_session.commit()
+    db_session.refresh(user)
+
+    with query_counter() as stats:
+        orders = OrderService.list_user_orders(user.id, db_session, user)
+        for order in orders:
+            order.items
+
+    assert len(orders) == 5
+    assert stats.count == 2
+    assert stats.n_plus_one_candidates(threshold=2) == []
+
+def test_list_user_orders_filters_by_created_at(db_session, create_user):
+    user = create_user(db_session)
+    old = Order(user.id, OrderStatus.DELIVERED)
+    old.created_at = datetime(2025, 1, 10, tzinfo=timezone.utc)
+    recent = Order(user.id, OrderStatus.OPEN)
+    recent.created_at = datetime(2025, 3, 10, tzinfo=timezone.utc)
+    db_session.add_all([old, recent])
+    db_session.commit()
+
+    orders = OrderService.list_user_orders(user.id, db_session, user, since=datetime(2025, 3, 1, tzinfo=timezone.utc))
+
+    assert [order.id for order in orders] == [recent.id]
+
+def test_list_user_orders_fail_with_invalid_range(db_session, create_user):
+    user = create_user(db_session)
+    moment = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.list_user_orders(user.id, db_session, user, since=moment, until=moment)
+
+    assert exc.value.status_code == 400
+
+def test_create_order_uses_time_ordered_id_and_item_partition_key(db_session, create_user):
+    user = create_user(db_session)
+    category = Category("Test", "test", "test.png")
+    db_session.add(category)
+    db_session.flush()
+    product = Product("Product", "product", "description", 10, category.id, "prod.png", True)
+    db_session.add(product)
+    db_session.commit()
+
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=1)])
+    order = OrderService.create_order(schema, db_session, user)
+
+    assert uuid7_datetime(order.id) is not None
+    assert all(item.created_at == order.created_at for item in order.items)
+
+def test_get_order_by_id_with_backdated_order(db_session, create_user):
+    user = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    order.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    db_session.add(order)
+    db_session.commit()
+
+    assert OrderService.get_order_by_id(order.id, db_session, user).id == order.id
+
+def test_delivered_order_fail_with_canceled_order(db_session, create_user):
+    user = create_user(db_session)
+    user.is_admin = True
+    order = Order(user.id, OrderStatus.CANCELED)
+    db_session.add(order)
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.delivered_order(order.id, db_session, user)
+
+    assert exc.value.status_code == 409
+
+def test_cancel_order_fail_with_other_user(db_session, create_user):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    db_session.add(order)
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.cancel_order(order.id, db_session, other)
+
+    assert exc.value.status_code == 403
+    db_session.expire_all()
+    assert order.status == OrderStatus.OPEN
+
+def test_cancel_order_with_expected_version(db_session, create_user):
+    user = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    db_session.add(order)
+    db_session.commit()
+    version = order.version
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.cancel_order(order.id, db_session, user, expected_version=version + 1)
+    result = OrderService.cancel_order(order.id, db_session, user, expected_version=version)
+
+    assert exc.value.status_code == 409
+    assert result.status == OrderStatus.CANCELED
+    assert result.version == version + 1
+
+def create_order_client(session, user):
+    app = FastAPI()
+    app.include_router(order_router)
+    app.dependency_overrides[deps.get_session] = lambda: session
+    app.dependency_overrides[deps.get_read_session] = lambda: session
+    app.dependency_overrides[deps.verify_token] = lambda: user
+    return TestClient(app)
+
+def test_order_etag_is_accepted_in_if_match(db_session, create_user):
+    user = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    db_session.add(order)
+    db_session.commit()
+    client = create_order_client(db_session, user)
+
+    etag = client.get(f"/order/{order.id}").headers["ETag"]
+    stale = client.patch(f"/order/{order.id}/cancel", headers={"If-Match": '"2"'})
+    canceled = client.patch(f"/order/{order.id}/cancel", headers={"If-Match": etag})
+
+    assert etag == '"1"'
+    assert stale.status_code == 409
+    assert canceled.status_code == 200
+    assert canceled.headers["ETag"] == '"2"'
+    assert client.get(f"/order/{order.id}", params={"fields": "id"}).headers["ETag"] == '"2"'
+
+def test_expected_version_accepts_etag_forms():
+    assert [OrderService.expected_version(value) for value in ['"3"', 'W/"3"', "3", "*", None]] == [3, 3, 3, None, None]
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.expected_version('"abc"')
+    assert exc.value.status_code == 400
+
+def test_status_transition_uses_a_single_conditional_update(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    db_session.add(order)
+    db_session.commit()
+    order_id = order.id
+    db_session.expire_all()
+
+    with query_counter() as stats:
+        OrderService.cancel_order(order_id, db_session, user)
+
+    order_statements = [statement for statement in stats.statements if "order_db" in statement and "stats" not in statement]
+    assert len(order_statements) == 1
+    assert order_statements[0].startswith("UPDATE order_db")
+
+def test_cancel_order_with_created_at_outside_id_window(db_session, create_user):
+    user = create_user(db_session)
+    order = Order(user.id, OrderStatus.OPEN)
+    order.created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db_session.add(order)
+    db_session.commit()
+
+    result = OrderService.cancel_order(order.id, db_session, user)
+
+    assert result.status == OrderStatus.CANCELED
+
+def place_orders(session, user, statuses):
+    orders = []
+    for status in statuses:
+        order = Order(user.id, status)
+        order.total = 10
+        session.add(order)
+        orders.append(order)
+    session.commit()
+    return orders
+
+def test_bulk_delivered_by_ids_reports_per_order_results(db_session, create_user, create_admin):
+    admin = create_admin(db_session)
+    user = create_user(db_session)
+    first, second, canceled, delivered = place_orders(
+        db_session, user, [OrderStatus.OPEN, OrderStatus.OPEN, OrderStatus.CANCELED, OrderStatus.DELIVERED]
+    )
+    missing = uuid4()
+    body = BulkOrderStatusSchema(ids=[first.id, second.id, canceled.id, delivered.id, missing])
+
+    result = OrderService.bulk_transition(OrderStatus.DELIVERED, body, db_session, admin)
+
+    assert set(result["updated"]) == {first.id, second.id}
+    assert result["unchanged"] == [delivered.id]
+    failures = {failure["id"]: failure for failure in result["failed"]}
+    assert failures[canceled.id]["status"] == OrderStatus.CANCELED
+    assert failures[missing]["status"] is None
+    db_session.expire_all()
+    assert first.status == second.status == OrderStatus.DELIVERED
+    assert db_session.get(UserOrderStats, user.id).delivered_count == 2
+
+def test_bulk_cancel_by_filter_only_touches_matching_open_orders(db_session, create_user, create_admin):
+    admin = create_admin(db_session)
+    user = create_user(db_session)
+    other = create_user(db_session)
+    open_order, delivered = place_orders(db_session, user, [OrderStatus.OPEN, OrderStatus.DELIVERED])
+    other_order, = place_orders(db_session, other, [OrderStatus.OPEN])
+
+    result = OrderService.bulk_transition(
+        OrderStatus.CANCELED, BulkOrderStatusSchema(filter=BulkOrderFilterSchema(user_id=user.id)), db_session, admin
+    )
+
+    assert result["updated"] == [open_order.id]
+    db_session.expire_all()
+    assert delivered.status == OrderStatus.DELIVERED
+    assert other_order.status == OrderStatus.OPEN
+    stats = db_session.get(UserOrderStats, user.id)
+    assert stats.canceled_count == 1
+    assert stats.total_spent == -10
+
+def test_bulk_transition_publishes_one_event_per_order(db_session, create_admin, monkeypatch):
+    monkeypatch.setattr(events, "_handlers", events.defaultdict(list))
+    received = []
+    events.subscribe(events.ORDER_STATUS_CHANGED, lambda session, changes: received.extend(changes))
+    admin = create_admin(db_session)
+    orders = place_orders(db_session, admin, [OrderStatus.OPEN] * 3)
+
+    OrderService.bulk_transition(OrderStatus.DELIVERED, BulkOrderStatusSchema(ids=[o.id for o in orders]), db_session, admin)
+
+    assert {change.order_id for change in received} == {order.id for order in orders}
+    assert all(change.old_status == OrderStatus.OPEN and change.new_status == OrderStatus.DELIVERED for change in received)
+
+def test_bulk_transition_uses_a_single_update(db_session, create_admin, query_counter):
+    admin = create_admin(db_session)
+    orders = place_orders(db_session, admin, [OrderStatus.OPEN] * 5)
+    body = BulkOrderStatusSchema(ids=[order.id for order in orders])
+
+    with query_counter() as stats:
+        OrderService.bulk_transition(OrderStatus.DELIVERED, body, db_session, admin)
+
+    order_statements = [statement for statement in stats.statements if "order_db" in statement and "stats" not in statement]
+    assert len(order_statements) == 1
+    assert order_statements[0].startswith("UPDATE order_db")
+
+def test_bulk_transition_fail_with_not_admin_user(db_session, create_user):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.bulk_transition(OrderStatus.DELIVERED, BulkOrderStatusSchema(ids=[uuid4()]), db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_bulk_transition_fail_without_ids_or_filter(db_session, create_admin):
+    admin = create_admin(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.bulk_transition(OrderStatus.DELIVERED, BulkOrderStatusSchema(), db_session, admin)
+    with pytest.raises(HTTPException) as empty_filter:
+        OrderService.bulk_transition(
+            OrderStatus.DELIVERED, BulkOrderStatusSchema(filter=BulkOrderFilterSchema()), db_session, admin
+        )
+
+    assert exc.value.status_code == 400
+    assert empty_filter.value.status_code == 400
+
+def create_priced_product(session, price=10):
+    category = Category("Test", "test", "test.png")
+    session.add(category)
+    session.flush()
+    product = Product("Product", "product", "description", price, category.id, "prod.png", True)
+    session.add(product)
+    session.commit()
+    return product
+
+def test_create_order_prices_items_from_price_book(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=3)])
+
+    with query_counter() as stats:
+        order = OrderService.create_order(schema, db_session, user)
+        total = order.total
+
+    product_statements = [statement for statement in stats.statements if "product_db" in statement]
+    assert len(product_statements) == 1
+    assert product_statements[0].startswith("INSERT INTO order_item_db")
+    assert total == 30
+    assert [(item.quantity, item.price) for item in order.items] == [(3, 10)]
+
+def test_create_order_reprices_when_product_changed_elsewhere(db_session, create_user):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    db_session.execute(update(Product).where(Product.id == product.id).values(price=12, version=Product.version + 1))
+    db_session.commit()
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=2)])
+
+    order = OrderService.create_order(schema, db_session, user)
+
+    assert order.total == 24
+    assert db_session.query(Order).count() == 1
+
+def test_create_order_fail_when_product_deactivated_elsewhere(db_session, create_user):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    db_session.execute(update(Product).where(Product.id == product.id).values(is_active=False, version=Product.version + 1))
+    db_session.commit()
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=1)])
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.create_order(schema, db_session, user)
+
+    assert exc.value.status_code == 400
+    assert db_session.query(Order).count() == 0
+
+def test_create_order_rereads_product_reactivated_elsewhere(db_session, create_user):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    db_session.execute(update(Product).where(Product.id == product.id).values(is_active=False, version=Product.version + 1))
+    db_session.commit()
+    price_book.load(db_session)
+    db_session.execute(update(Product).where(Product.id == product.id).values(is_active=True, version=Product.version + 1))
+    db_session.commit()
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=1)])
+
+    order = OrderService.create_order(schema, db_session, user)
+
+    assert order.total == 10
+
+def test_quote_order_rereads_price_after_ttl(db_session, create_user, monkeypatch):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    db_session.execute(update(Product).where(Product.id == product.id).values(price=12, version=Product.version + 1))
+    db_session.commit()
+    body = QuoteOrderSchema(items=[ItemSchema(id=product.id, quantity=2)])
+
+    cached = OrderService.quote_order(body, db_session, user)
+    later = time.monotonic() + price_book.ttl_seconds + 1
+    monkeypatch.setattr("app.core.price_book.time.monotonic", lambda: later)
+    expired = OrderService.quote_order(body, db_session, user)
+
+    assert cached["total"] == 20
+    assert expired["total"] == 24
+
+def test_update_product_refreshes_price_book(db_session, create_user):
+    user = create_user(db_session)
+    admin = create_user(db_session)
+    admin.is_admin = True
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    body = UpdateProductSchema(name="Product", slug="product", description="description", price=15,
+                               category_id=product.category_id)
+    ProductService.update_product("product", body, db_session, admin)
+
+    order = OrderService.create_order(CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=1)]),
+                                      db_session, user)
+
+    assert order.total == 15
+
+def test_create_order_fail_with_unknown_product(db_session, create_user):
+    user = create_user(db_session)
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=uuid4(), quantity=1)])
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.create_order(schema, db_session, user)
+
+    assert exc.value.status_code == 400
+
+def test_quote_order_matches_created_order_without_writing(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    product = create_priced_product(db_session, price=12.5)
+    other = Product("Other", "other", "description", 4, product.category_id, "other.png", True)
+    db_session.add(other)
+    db_session.commit()
+    items = [ItemSchema(id=product.id, quantity=3), ItemSchema(id=other.id, quantity=2)]
+
+    with query_counter() as stats:
+        quote = OrderService.quote_order(QuoteOrderSchema(items=items), db_session, user)
+
+    assert stats.count == 1
+    assert not db_session.new and not db_session.dirty
+    assert db_session.query(Order).count() == 0
+    assert [(line["name"], line["price"], line["total"]) for line in quote["items"]] == [("Product", 12.5, 37.5), ("Other", 4, 8)]
+    order = OrderService.create_order(CreateOrderSchema(user_id=user.id, items=items), db_session, user)
+    assert quote["total"] == order.total == 45.5
+    order.calculate_price()
+    assert order.total == quote["total"]
+
+def test_quote_order_served_from_price_book(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    price_book.load(db_session)
+    body = QuoteOrderSchema(items=[ItemSchema(id=product.id, quantity=2)])
+
+    with query_counter() as stats:
+        quote = OrderService.quote_order(body, db_session, user)
+
+    assert stats.count == 0
+    assert quote["total"] == 20
+
+def test_quote_order_on_replica_does_not_fill_price_book(db_session, create_user):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    body = QuoteOrderSchema(items=[ItemSchema(id=product.id, quantity=2)])
+    db_session.info["replica"] = True
+
+    quote = OrderService.quote_order(body, db_session, user)
+
+    assert quote["total"] == 20
+    assert len(price_book) == 0
+
+def test_quote_order_fail_with_invalid_items(db_session, create_user):
+    user = create_user(db_session)
+    product = create_priced_product(db_session)
+    inactive = Product("Inactive", "inactive", "description", 5, product.category_id, "inactive.png", False)
+    db_session.add(inactive)
+    db_session.commit()
+
+    invalid = [[], [ItemSchema(id=uuid4(), quantity=1)], [ItemSchema(id=inactive.id, quantity=1)],
+               [ItemSchema(id=product.id, quantity=0)]]
+    for items in invalid:
+        with pytest.raises(HTTPException) as exc:
+            OrderService.quote_order(QuoteOrderSchema(items=items), db_session, user)
+        assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.quote_order(QuoteOrderSchema(items=[ItemSchema(id=product.id, quantity=1)]), db_session, None)
+    assert exc.value.status_code == 401
+
+def create_ordered_product(session, user):
+    category = Category("Test", "test", "test.png")
+    session.add(category)
+    session.flush()
+    product = Product("Product", "product", "description", 10, category.id, "prod.png", True)
+    session.add(product)
+    session.commit()
+    return OrderService.create_order(CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=2)]), session, user)
+
+def test_get_order_by_id_with_fields_loads_only_requested_columns(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    order_id, user_id = create_ordered_product(db_session, user).id, user.id
+    db_session.expunge_all()
+    user = db_session.get(User, user_id)
+    fields = "total,items.quantity,items.product.name"
+
+    with query_counter() as stats:
+        result = OrderService.get_order_by_id(order_id, db_session, user, fields)
+        body = json.loads(render(OrderResponseSchema, OrderService.fieldset(fields), result))
+
+    assert body == {"total": 20.0, "items": [{"quantity": 2, "product": {"name": "Product"}}]}
+    assert stats.count == 2
+    assert all("description" not in statement and "updated_at" not in statement for statement in stats.statements)
+
+def test_list_user_orders_with_fields_skips_items(db_session, create_user, query_counter):
+    user = create_user(db_session)
+    order_id, user_id = create_ordered_product(db_session, user).id, user.id
+    db_session.expunge_all()
+    user = db_session.get(User, user_id)
+
+    with query_counter() as stats:
+        orders = OrderService.list_user_orders(user.id, db_session, user, fields="id,status")
+        body = json.loads(render(OrderResponseSchema, OrderService.fieldset("id,status"), orders, many=True))
+
+    assert body == [{"id": str(order_id), "status": "aberto"}]
+    assert stats.count == 1
+
+def test_list_user_orders_fail_with_unknown_nested_field(db_session, create_user):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        OrderService.list_user_orders(user.id, db_session, user, fields="items.product.stock")
+
+    assert exc.value.status_code == 400
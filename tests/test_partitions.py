@@ -0,0 +1,15 @@
+from datetime import date
+from app.core.partitions import add_months, month_start, partition_name, ensure_partitions, detach_partitions_before
+from tests.test_database import engine
+
+def test_add_months_crosses_year_boundary():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+def test_partition_name_uses_month_start():
+    assert partition_name("order_db", month_start(date(2026, 3, 17))) == "order_db_p2026_03"
+
+def test_partition_maintenance_is_noop_without_partitioning(db_session):
+    with engine.begin() as connection:
+        assert ensure_partitions(connection) == []
+        assert detach_partitions_before(connection, date(2026, 1, 1)) == []
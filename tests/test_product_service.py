@@ -1,8 +1,17 @@
+import json
 import pytest
 from app.models.product import Product
 from app.models.category import Category
-from app.services.product_service import ProductService
-from app.schemas.product_schemas import UpdateProductSchema
+from app.services.product_service import ProductService, product_cache
+from app.core.cache import MISSING
+from app.core.fieldsets import parse_fields, projected_model, render
+from app.services.job_service import JobService
+from app.schemas.product_schemas import ProductResponseSchema, UpdateProductSchema, BulkProductSelectionSchema, ProductFilterSchema
+from app.core import events
+from app.models.base import Base
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 from fastapi import HTTPException, UploadFile
 from starlette.datastructures import Headers
 from io import BytesIO
@@ -325,7 +334,7 @@ def test_update_product_fail_with_already_exists_new_slug(db_session, create_use
 
     assert exc.value.status_code == 400
     
-def test_create_product_success(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_success(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     category = Category("Category", "category", "image.png")
@@ -333,8 +342,6 @@ def test_create_product_success(db_session, create_user, tmp_path, monkeypatch):
     db_session.commit()
     db_session.flush()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     product = ProductService.create_product(
@@ -353,13 +360,11 @@ def test_create_product_success(db_session, create_user, tmp_path, monkeypatch):
     assert product.price == 10.5
     assert product.description == "description"
 
-def test_create_product_fail_with_invalid_name(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_invalid_name(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -376,13 +381,11 @@ def test_create_product_fail_with_invalid_name(db_session, create_user, tmp_path
 
     assert exc.value.status_code == 400
 
-def test_create_product_fail_with_invalid_slug(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_invalid_slug(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -399,13 +402,11 @@ def test_create_product_fail_with_invalid_slug(db_session, create_user, tmp_path
 
     assert exc.value.status_code == 400
 
-def test_create_product_fail_with_invalid_description(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_invalid_description(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -422,13 +423,11 @@ def test_create_product_fail_with_invalid_description(db_session, create_user, t
 
     assert exc.value.status_code == 400
 
-def test_create_product_fail_with_invalid_price(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_invalid_price(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -477,7 +476,7 @@ def test_create_product_fail_with_not_admin_user(db_session, create_user):
 
     assert exc.value.status_code == 403
 
-def test_create_product_fail_with_already_exists_product_name(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_already_exists_product_name(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     category = Category("Category", "category", "image.png")
@@ -487,8 +486,6 @@ def test_create_product_fail_with_already_exists_product_name(db_session, create
     db_session.add(product)
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -505,13 +502,11 @@ def test_create_product_fail_with_already_exists_product_name(db_session, create
 
     assert exc.value.status_code == 400
 
-def test_create_product_fail_with_not_found_category(db_session, create_user, tmp_path, monkeypatch):
+def test_create_product_fail_with_not_found_category(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
@@ -528,7 +523,7 @@ def test_create_product_fail_with_not_found_category(db_session, create_user, tm
 
     assert exc.value.status_code == 400
 
-def test_update_product_image_success(db_session, create_user, tmp_path, monkeypatch):
+def test_update_product_image_success(db_session, create_user):
     admin = create_user(db_session)
     admin.is_admin = True
     category = Category("Teste", "teste", "image.png")
@@ -538,14 +533,30 @@ def test_update_product_image_success(db_session, create_user, tmp_path, monkeyp
     db_session.add(product)
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     result = ProductService.update_product_image("product", image, db_session, admin)
 
     assert result is not None
 
+def test_update_product_image_removes_old_file_in_background(db_session, create_admin, tmp_path):
+    admin = create_admin(db_session)
+    category = Category("Teste", "teste", "image.png")
+    db_session.add(category)
+    db_session.flush()
+    db_session.add(Product("Product", "product", "description", 10, category.id, "product.png"))
+    db_session.commit()
+    old_file = tmp_path / "product.png"
+    old_file.write_text("fake image content")
+
+    result = ProductService.update_product_image("product", create_fake_image(), db_session, admin)
+
+    assert old_file.exists()
+    assert (tmp_path / result.image_url).exists()
+    assert JobService.run_pending(db_session) == 1
+    assert not old_file.exists()
+    assert (tmp_path / result.image_url).exists()
+
 def test_update_product_image_fail_with_not_authenticated_user(db_session):
     with pytest.raises(HTTPException) as exc:
         ProductService.update_product_image("teste", None, db_session, None)
@@ -560,16 +571,331 @@ def test_update_product_image_fail_with_not_admin_user(db_session, create_user):
 
     assert exc.value.status_code == 403
 
-def test_update_product_image_fail_with_not_found(db_session, create_user, tmp_path, monkeypatch):
+def test_update_product_image_fail_with_not_found(db_session, create_user):
     user = create_user(db_session)
     user.is_admin = True
     db_session.commit()
 
-    monkeypatch.setattr("app.services.product_service.UPLOAD_DIR", tmp_path)
-
     image = create_fake_image()
 
     with pytest.raises(HTTPException) as exc:
         ProductService.update_product_image("teste", image, db_session, user)
 
-    assert exc.value.status_code == 404
\ No newline at end of file
+    assert exc.value.status_code == 404
+
+def test_get_products_by_category_runs_a_single_query(db_session, query_counter):
+    category = Category("Test", "test", "test.png")
+    db_session.add(category)
+    db_session.flush()
+    for i in range(5):
+        db_session.add(Product(f"Test {i}", f"test{i}", "description", 10, category.id, f"test{i}.png", True))
+    db_session.commit()
+
+    with query_counter() as stats:
+        result = ProductService.get_products_by_category("test", db_session)
+
+    assert len(result) == 5
+    assert stats.count == 1
+
+def create_catalog(session):
+    drinks = Category("Drinks", "drinks", "drinks.png")
+    food = Category("Food", "food", "food.png")
+    session.add_all([drinks, food])
+    session.flush()
+    session.add_all([
+        Product("Cola", "cola", "description", 5, drinks.id, "cola.png", True),
+        Product("Juice", "juice", "description", 8, drinks.id, "juice.png", False),
+        Product("Burger", "burger", "description", 25, food.id, "burger.png", True),
+    ])
+    session.commit()
+
+def active_slugs(session):
+    return {product.slug for product in session.query(Product).filter(Product.is_active == True)}
+
+def test_bulk_deactivate_by_slugs_reports_unchanged_and_missing(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+
+    result = ProductService.bulk_set_active(
+        False, BulkProductSelectionSchema(slugs=["cola", "juice", "missing"]), db_session, admin
+    )
+
+    assert result == {"updated": ["cola"], "unchanged": ["juice"], "not_found": ["missing"]}
+    assert active_slugs(db_session) == {"burger"}
+
+def test_bulk_deactivate_by_category(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+
+    result = ProductService.bulk_set_active(False, BulkProductSelectionSchema(category_slug="drinks"), db_session, admin)
+
+    assert result["updated"] == ["cola"]
+    assert active_slugs(db_session) == {"burger"}
+
+def test_bulk_activate_by_filter(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+
+    result = ProductService.bulk_set_active(
+        True, BulkProductSelectionSchema(filter=ProductFilterSchema(name="JUI", max_price=10)), db_session, admin
+    )
+
+    assert result["updated"] == ["juice"]
+    assert active_slugs(db_session) == {"cola", "juice", "burger"}
+
+def test_bulk_filter_by_name_matches_wildcards_literally(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+
+    for name in ("%", "_", "/"):
+        result = ProductService.bulk_set_active(
+            False, BulkProductSelectionSchema(filter=ProductFilterSchema(name=name)), db_session, admin
+        )
+        assert result["updated"] == []
+    assert active_slugs(db_session) == {"cola", "burger"}
+
+def test_bulk_set_active_publishes_changed_products_in_one_update(db_session, create_admin, query_counter, monkeypatch):
+    monkeypatch.setattr(events, "_handlers", events.defaultdict(list))
+    received = []
+    events.subscribe(events.PRODUCTS_CHANGED, lambda changes: received.extend(changes))
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+
+    with query_counter() as stats:
+        ProductService.bulk_set_active(False, BulkProductSelectionSchema(slugs=["cola", "burger"]), db_session, admin)
+
+    product_statements = [statement for statement in stats.statements if "product_db" in statement]
+    assert len(product_statements) == 1
+    assert product_statements[0].startswith("UPDATE product_db")
+    assert {change.slug for change in received} == {"cola", "burger"}
+
+def test_bulk_set_active_fail_without_criteria(db_session, create_admin):
+    admin = create_admin(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.bulk_set_active(False, BulkProductSelectionSchema(), db_session, admin)
+
+    assert exc.value.status_code == 400
+
+def test_bulk_set_active_fail_with_not_found_category(db_session, create_admin):
+    admin = create_admin(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.bulk_set_active(False, BulkProductSelectionSchema(category_slug="missing"), db_session, admin)
+
+    assert exc.value.status_code == 404
+
+def test_bulk_set_active_fail_with_not_admin_user(db_session, create_user):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.bulk_set_active(False, BulkProductSelectionSchema(slugs=["cola"]), db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_get_product_response_is_served_from_cache(db_session, query_counter):
+    create_catalog(db_session)
+
+    first = ProductService.get_product_response("cola", db_session)
+    with query_counter() as stats:
+        second = ProductService.get_product_response("cola", db_session)
+
+    assert stats.count == 0
+    assert first == second
+    assert json.loads(second)["slug"] == "cola"
+    assert product_cache.stats()["hits"] == 1
+    assert product_cache.stats()["misses"] == 1
+
+def test_get_product_response_caches_not_found(db_session, query_counter):
+    with pytest.raises(HTTPException):
+        ProductService.get_product_response("missing", db_session)
+
+    with query_counter() as stats:
+        with pytest.raises(HTTPException) as exc:
+            ProductService.get_product_response("missing", db_session)
+
+    assert exc.value.status_code == 404
+    assert stats.count == 0
+
+def test_negative_cache_expires(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.product_service.PRODUCT_NEGATIVE_CACHE_SECONDS", 0)
+    with pytest.raises(HTTPException):
+        ProductService.get_product_response("cola", db_session)
+    create_catalog(db_session)
+
+    assert json.loads(ProductService.get_product_response("cola", db_session))["slug"] == "cola"
+
+def test_update_product_invalidates_old_and_new_slug(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+    product = db_session.query(Product).filter(Product.slug == "cola").one()
+    ProductService.get_product_response("cola", db_session)
+    with pytest.raises(HTTPException):
+        ProductService.get_product_response("cola-zero", db_session)
+
+    body = UpdateProductSchema(name="Cola Zero", slug="cola-zero", description="description", price=6,
+                               category_id=product.category_id)
+    ProductService.update_product("cola", body, db_session, admin)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.get_product_response("cola", db_session)
+    assert exc.value.status_code == 404
+    assert json.loads(ProductService.get_product_response("cola-zero", db_session))["price"] == 6
+
+def test_deactivate_product_invalidates_cached_response(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+    product = db_session.query(Product).filter(Product.slug == "cola").one()
+    ProductService.get_product_response("cola", db_session)
+
+    ProductService.deactivate_product("cola", db_session, admin)
+
+    assert json.loads(ProductService.get_product_response("cola", db_session))["is_active"] is False
+
+def create_stale_replica(session):
+    """Réplica com uma cópia do catálogo atual, que não recebe as alterações seguintes."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    replica = Session(engine, info={"replica": True})
+    for entity in (Category, Product):
+        for row in session.query(entity).all():
+            replica.merge(row)
+    replica.commit()
+    return replica
+
+def test_replica_read_after_invalidation_does_not_fill_cache(db_session, create_admin):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+    product = db_session.query(Product).filter(Product.slug == "cola").one()
+    replica = create_stale_replica(db_session)
+    ProductService.get_product_response("cola", db_session)
+    body = UpdateProductSchema(name="Cola", slug="cola", description="description", price=6,
+                               category_id=product.category_id)
+    ProductService.update_product("cola", body, db_session, admin)
+
+    stale = ProductService.get_product_response("cola", replica)
+    stale_many = ProductService.get_products_response(["cola"], [str(product.id)], replica)
+
+    assert json.loads(stale)["price"] == 5
+    assert [entry["product"]["price"] for entry in json.loads(stale_many)] == [5, 5]
+    assert product_cache.stats()["size"] == 0
+    assert json.loads(ProductService.get_product_response("cola", db_session))["price"] == 6
+    assert json.loads(ProductService.get_product_response("cola", replica))["price"] == 6
+
+def test_cache_fill_is_discarded_after_concurrent_invalidation():
+    generation = product_cache.generation
+    product_cache.delete("cola")
+
+    assert product_cache.set("cola", b"stale", generation=generation) is False
+    assert product_cache.stats()["size"] == 0
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(product_cache, "max_size", 2)
+    product_cache.set("a", b"a")
+    product_cache.set("b", b"b")
+    product_cache.get("a")
+    product_cache.set("c", b"c")
+
+    assert product_cache.get("b") is MISSING
+    assert product_cache.get("a") == b"a"
+    assert product_cache.stats()["evictions"] == 1
+
+def test_get_cache_stats_fail_with_not_admin_user(db_session, create_user):
+    user = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.get_cache_stats(user)
+
+    assert exc.value.status_code == 403
+
+def test_get_products_by_category_with_fields_loads_only_those_columns(db_session, query_counter):
+    create_catalog(db_session)
+    db_session.expunge_all()
+
+    with query_counter() as stats:
+        products = ProductService.get_products_by_category("drinks", db_session, "name,slug,price,image_url")
+        body = render(ProductResponseSchema, ProductService.fieldset("name,slug,price,image_url"), products, many=True)
+
+    assert stats.count == 1
+    assert all("description" not in statement for statement in stats.statements)
+    assert json.loads(body) == [{"name": "Cola", "slug": "cola", "price": 5.0, "image_url": "/images/cola.png"}]
+
+def test_get_product_response_with_fields_projects_cached_response(db_session, query_counter):
+    create_catalog(db_session)
+    ProductService.get_product_response("cola", db_session)
+
+    with query_counter() as stats:
+        body = ProductService.get_product_response("cola", db_session, "slug, price")
+
+    assert stats.count == 0
+    assert json.loads(body) == {"slug": "cola", "price": 5.0}
+
+def test_projected_models_are_cached_per_field_set():
+    spec = parse_fields(ProductResponseSchema, "price,name")
+
+    assert spec == parse_fields(ProductResponseSchema, "name,price")
+    assert projected_model(ProductResponseSchema, spec) is projected_model(ProductResponseSchema, spec)
+    assert list(projected_model(ProductResponseSchema, spec).model_fields) == ["name", "price"]
+
+def test_fields_fail_with_unknown_field(db_session):
+    with pytest.raises(HTTPException) as exc:
+        ProductService.get_products_by_category("drinks", db_session, "name,password")
+
+    assert exc.value.status_code == 400
+
+def test_get_products_response_returns_request_order_in_one_query(db_session, query_counter):
+    create_catalog(db_session)
+    burger = db_session.query(Product).filter(Product.slug == "burger").one()
+
+    with query_counter() as stats:
+        body = json.loads(ProductService.get_products_response(["juice", "missing", "cola"], [str(burger.id)], db_session))
+
+    assert stats.count == 1
+    assert [(entry["key"], entry["found"]) for entry in body] == [
+        ("juice", True), ("missing", False), ("cola", True), (str(burger.id), True)
+    ]
+    assert body[1]["product"] is None
+    assert body[3]["product"]["slug"] == "burger"
+
+def test_get_products_response_fetches_only_cache_misses(db_session, query_counter):
+    create_catalog(db_session)
+    ProductService.get_product_response("cola", db_session)
+    ProductService.get_products_response(["missing"], [], db_session)
+
+    with query_counter() as stats:
+        body = json.loads(ProductService.get_products_response(["cola", "missing", "burger"], [], db_session, "slug,price"))
+
+    assert len(stats.statements) == 1
+    assert any("IN" in statement for statement in stats.statements)
+    assert [entry["product"] for entry in body] == [{"slug": "cola", "price": 5.0}, None, {"slug": "burger", "price": 25.0}]
+    with query_counter() as stats:
+        ProductService.get_products_response(["cola", "missing", "burger"], [], db_session)
+    assert stats.count == 0
+
+def test_get_products_response_by_id_is_invalidated_on_update(db_session, create_admin, query_counter):
+    admin = create_admin(db_session)
+    create_catalog(db_session)
+    cola = db_session.query(Product).filter(Product.slug == "cola").one()
+    cola_id, category_id = str(cola.id), cola.category_id
+    ProductService.get_products_response([], [cola_id], db_session)
+
+    ProductService.update_product("cola", UpdateProductSchema(
+        name="Cola", slug="cola", description="description", price=6, category_id=category_id
+    ), db_session, admin)
+    body = json.loads(ProductService.get_products_response([], [cola_id], db_session))
+
+    assert body[0]["product"]["price"] == 6.0
+
+def test_get_products_response_fail_with_too_many_keys(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.product_service.PRODUCT_MULTI_GET_LIMIT", 2)
+
+    with pytest.raises(HTTPException) as exc:
+        ProductService.get_products_response(["a", "b"], [str(uuid4())], db_session)
+
+    assert exc.value.status_code == 400
+
+def test_get_products_response_fail_with_invalid_id(db_session):
+    with pytest.raises(HTTPException) as exc:
+        ProductService.get_products_response([], ["not-an-id"], db_session)
+
+    assert exc.value.status_code == 400
@@ -0,0 +1,112 @@
+import time
+import pytest
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.api import deps
+from app.core.replicas import ReplicaRouter, ReadYourWritesMiddleware, PRIMARY_PIN_COOKIE, pinned_to_primary
+
+def create_database(path, name):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE marker (name TEXT)"))
+        connection.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    return engine
+
+@pytest.fixture
+def databases(tmp_path):
+    return {name: create_database(tmp_path / f"{name}.db", name) for name in ("primary", "replica_a", "replica_b")}
+
+def create_test_app():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=10, read_only_paths={"/quote"})
+
+    @app.get("/source")
+    async def source(session = Depends(deps.get_read_session)):
+        return {"name": session.execute(text("SELECT name FROM marker")).scalar()}
+
+    @app.post("/write")
+    async def write(fail: bool = False):
+        if fail:
+            raise HTTPException(status_code=400, detail="Falha")
+        return {}
+
+    @app.post("/quote")
+    async def quote():
+        return {}
+
+    return app
+
+def test_pick_rotates_between_healthy_replicas(databases):
+    router = ReplicaRouter([databases["replica_a"], databases["replica_b"]], 5, 60)
+
+    picked = [router.pick() for _ in range(4)]
+
+    assert picked == [databases["replica_a"], databases["replica_b"], databases["replica_a"], databases["replica_b"]]
+
+def test_pick_skips_unreachable_replica(databases, tmp_path):
+    unreachable = create_engine(f"sqlite:///{tmp_path}/missing/dir/replica.db")
+    router = ReplicaRouter([unreachable, databases["replica_a"]], 5, 60)
+
+    assert {router.pick() for _ in range(3)} == {databases["replica_a"]}
+
+def test_pick_skips_lagging_replica(databases, monkeypatch):
+    router = ReplicaRouter([databases["replica_a"], databases["replica_b"]], 5, 60)
+    monkeypatch.setattr(router, "_lag", lambda engine: 30.0 if engine is databases["replica_a"] else 0.0)
+
+    assert {router.pick() for _ in range(3)} == {databases["replica_b"]}
+
+def test_pick_falls_back_to_primary_without_healthy_replica(databases, monkeypatch):
+    router = ReplicaRouter([databases["replica_a"]], 5, 60)
+    monkeypatch.setattr(router, "_lag", lambda engine: 30.0)
+
+    assert router.pick() is None
+    assert ReplicaRouter([], 5, 60).pick() is None
+
+def test_health_is_checked_once_per_interval(databases, monkeypatch):
+    router = ReplicaRouter([databases["replica_a"]], 5, 60)
+    checks = []
+    monkeypatch.setattr(router, "_lag", lambda engine: checks.append(engine) or 0.0)
+
+    for _ in range(5):
+        router.pick()
+
+    assert len(checks) == 1
+
+def test_pinned_to_primary_until_cookie_expires():
+    assert pinned_to_primary({PRIMARY_PIN_COOKIE: str(time.time() + 10)})
+    assert not pinned_to_primary({PRIMARY_PIN_COOKIE: str(time.time() - 1)})
+    assert not pinned_to_primary({PRIMARY_PIN_COOKIE: "invalido"})
+    assert not pinned_to_primary({})
+
+def test_reads_go_to_replicas_until_client_writes(databases, monkeypatch):
+    monkeypatch.setattr(deps, "db", databases["primary"])
+    monkeypatch.setattr(deps, "replica_router", ReplicaRouter([databases["replica_a"], databases["replica_b"]], 5, 60))
+    client = TestClient(create_test_app())
+
+    assert {client.get("/source").json()["name"] for _ in range(2)} == {"replica_a", "replica_b"}
+
+    response = client.post("/write")
+
+    assert PRIMARY_PIN_COOKIE in response.cookies
+    assert client.get("/source").json()["name"] == "primary"
+
+def test_failed_write_does_not_pin_client(databases, monkeypatch):
+    monkeypatch.setattr(deps, "db", databases["primary"])
+    monkeypatch.setattr(deps, "replica_router", ReplicaRouter([databases["replica_a"]], 5, 60))
+    client = TestClient(create_test_app())
+
+    response = client.post("/write", params={"fail": True})
+
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+    assert client.get("/source").json()["name"] == "replica_a"
+
+def test_read_only_post_does_not_pin_client(databases, monkeypatch):
+    monkeypatch.setattr(deps, "db", databases["primary"])
+    monkeypatch.setattr(deps, "replica_router", ReplicaRouter([databases["replica_a"]], 5, 60))
+    client = TestClient(create_test_app())
+
+    response = client.post("/quote")
+
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+    assert client.get("/source").json()["name"] == "replica_a"
@@ -0,0 +1,59 @@
+from sqlalchemy import create_engine, text
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.sql_instrumentation import instrument_engine, track_queries, QueryTrackingMiddleware
+import logging
+
+def test_track_queries_counts_statements_and_slowest():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with track_queries() as stats:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert len(stats.slowest) == 2
+    assert stats.total_time > 0
+
+def test_queries_outside_tracking_are_not_counted():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with track_queries() as stats:
+        pass
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert stats.count == 0
+
+def test_slow_queries_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr("app.core.sql_instrumentation.SLOW_QUERY_THRESHOLD_MS", 0)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 42"))
+
+    assert any('"event": "slow_query"' in r.message and "SELECT 42" in r.message for r in caplog.records)
+
+def test_middleware_reports_db_time_and_n_plus_one(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(QueryTrackingMiddleware)
+
+    @app.get("/loop")
+    async def loop():
+        with engine.connect() as connection:
+            for _ in range(6):
+                connection.execute(text("SELECT 1"))
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        response = TestClient(app).get("/loop")
+
+    assert 'desc="6 queries"' in response.headers["server-timing"]
+    assert any('"event": "n_plus_one_candidate"' in r.message for r in caplog.records)
@@ -0,0 +1,81 @@
+import os
+import time
+from app.models.product import Product
+from app.models.category import Category
+from app.services.upload_gc_service import UploadGCService
+
+DAY = 86400
+
+def write_file(directory, name, age_seconds=0):
+    path = directory / name
+    path.write_text("fake image content")
+    moment = time.time() - age_seconds
+    os.utime(path, (moment, moment))
+    return path
+
+def setup_dirs(tmp_path):
+    uploads = tmp_path / "images"
+    uploads.mkdir()
+    return uploads, tmp_path / "quarantine"
+
+def create_references(session):
+    category = Category("Test", "test", "category.png")
+    session.add(category)
+    session.flush()
+    session.add(Product("Product", "product", "description", 10, category.id, "product.png", True))
+    session.commit()
+
+def test_unreferenced_old_files_are_quarantined(db_session, tmp_path):
+    uploads, quarantine = setup_dirs(tmp_path)
+    create_references(db_session)
+    write_file(uploads, "product.png", 2 * DAY)
+    write_file(uploads, "category.png", 2 * DAY)
+    write_file(uploads, "orphan.png", 2 * DAY)
+    write_file(uploads, "fresh.png")
+
+    stats = UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY, batch_size=2)
+
+    assert stats == {"scanned": 3, "quarantined": 1, "restored": 0, "deleted": 0}
+    assert sorted(os.listdir(uploads)) == ["category.png", "fresh.png", "product.png"]
+    assert os.listdir(quarantine) == ["orphan.png"]
+
+def test_quarantined_files_are_deleted_after_grace_period(db_session, tmp_path):
+    uploads, quarantine = setup_dirs(tmp_path)
+    quarantine.mkdir()
+    write_file(quarantine, "old.png", 2 * DAY)
+    write_file(quarantine, "recent.png", 60)
+
+    stats = UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY)
+
+    assert stats["deleted"] == 1
+    assert os.listdir(quarantine) == ["recent.png"]
+
+def test_quarantined_file_referenced_again_is_restored(db_session, tmp_path):
+    uploads, quarantine = setup_dirs(tmp_path)
+    quarantine.mkdir()
+    create_references(db_session)
+    write_file(quarantine, "product.png", 2 * DAY)
+
+    stats = UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY)
+
+    assert stats["restored"] == 1
+    assert os.listdir(uploads) == ["product.png"]
+
+def test_dry_run_does_not_touch_files(db_session, tmp_path):
+    uploads, quarantine = setup_dirs(tmp_path)
+    write_file(uploads, "orphan.png", 2 * DAY)
+
+    stats = UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY, dry_run=True)
+
+    assert stats["quarantined"] == 1
+    assert os.listdir(uploads) == ["orphan.png"]
+
+def test_quarantine_age_starts_when_file_is_moved(db_session, tmp_path):
+    uploads, quarantine = setup_dirs(tmp_path)
+    write_file(uploads, "orphan.png", 2 * DAY)
+
+    UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY)
+    stats = UploadGCService.collect(db_session, str(uploads), str(quarantine), grace_seconds=DAY)
+
+    assert stats["deleted"] == 0
+    assert os.listdir(quarantine) == ["orphan.png"]
@@ -0,0 +1,113 @@
+import pytest
+from fastapi import HTTPException
+from app.models.order import Order
+from app.models.product import Product
+from app.models.category import Category
+from app.models.user_order_stats import UserOrderStats
+from app.enums.order_status import OrderStatus
+from app.services.order_service import OrderService
+from app.services.user_order_stats_service import UserOrderStatsService
+from app.schemas.order_schemas import CreateOrderSchema, ItemSchema
+from uuid import uuid4
+
+def create_product(session, price=10):
+    category = Category("Test", f"test-{uuid4()}", "test.png")
+    session.add(category)
+    session.flush()
+    product = Product("Product", f"product-{uuid4()}", "description", price, category.id, "prod.png", True)
+    session.add(product)
+    session.commit()
+    return product
+
+def place_order(session, user, product, quantity=2):
+    schema = CreateOrderSchema(user_id=user.id, items=[ItemSchema(id=product.id, quantity=quantity)])
+    return OrderService.create_order(schema, session, user)
+
+def test_get_user_stats_without_orders_returns_zeros(db_session, create_user):
+    user = create_user(db_session)
+
+    stats = UserOrderStatsService.get_user_stats(user.id, db_session, user)
+
+    assert stats.orders_count == 0
+    assert stats.total_spent == 0
+    assert stats.last_order_at is None
+
+def test_create_order_updates_stats(db_session, create_user):
+    user = create_user(db_session)
+    product = create_product(db_session)
+
+    first = place_order(db_session, user, product)
+    second = place_order(db_session, user, product)
+    db_session.expire_all()
+
+    stats = UserOrderStatsService.get_user_stats(user.id, db_session, user)
+    assert stats.orders_count == 2
+    assert first.total == 20
+    assert stats.total_spent == first.total + second.total
+    assert stats.last_order_at is not None
+
+def test_cancel_and_deliver_update_stats(db_session, create_user):
+    user = create_user(db_session)
+    user.is_admin = True
+    product = create_product(db_session)
+    canceled = place_order(db_session, user, product)
+    delivered = place_order(db_session, user, product)
+
+    OrderService.cancel_order(canceled.id, db_session, user)
+    OrderService.delivered_order(delivered.id, db_session, user)
+    db_session.expire_all()
+
+    stats = db_session.get(UserOrderStats, user.id)
+    assert stats.orders_count == 2
+    assert stats.canceled_count == 1
+    assert stats.delivered_count == 1
+    assert stats.total_spent == delivered.total
+
+def test_canceling_twice_counts_once(db_session, create_user):
+    user = create_user(db_session)
+    product = create_product(db_session)
+    order = place_order(db_session, user, product)
+
+    OrderService.cancel_order(order.id, db_session, user)
+    OrderService.cancel_order(order.id, db_session, user)
+    db_session.expire_all()
+
+    stats = db_session.get(UserOrderStats, user.id)
+    assert stats.canceled_count == 1
+    assert stats.total_spent == 0
+
+def test_get_user_stats_fail_with_other_user(db_session, create_user):
+    user = create_user(db_session)
+    other = create_user(db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        UserOrderStatsService.get_user_stats(other.id, db_session, user)
+
+    assert exc.value.status_code == 403
+
+def test_get_user_stats_fail_with_not_authenticated_user(db_session):
+    with pytest.raises(HTTPException) as exc:
+        UserOrderStatsService.get_user_stats(uuid4(), db_session, None)
+
+    assert exc.value.status_code == 401
+
+def test_rebuild_reconciles_from_orders(db_session, create_user):
+    user = create_user(db_session)
+    other = create_user(db_session)
+    for status, total in [(OrderStatus.OPEN, 10), (OrderStatus.DELIVERED, 20), (OrderStatus.CANCELED, 30)]:
+        order = Order(user.id, status)
+        order.total = total
+        db_session.add(order)
+    db_session.add(UserOrderStats(other.id, orders_count=5, total_spent=99))
+    db_session.commit()
+
+    rebuilt = UserOrderStatsService.rebuild(db_session, batch_size=1)
+    db_session.expire_all()
+
+    stats = db_session.get(UserOrderStats, user.id)
+    assert rebuilt == 1
+    assert stats.orders_count == 3
+    assert stats.delivered_count == 1
+    assert stats.canceled_count == 1
+    assert stats.total_spent == 30
+    assert db_session.get(UserOrderStats, other.id) is None
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app import main
+from app.core.warmup import warm_pool, warm_up
+from app.models.product import Product
+from app.models.category import Category
+from app.models.sales_rollup import SalesRollup
+from app.services.product_service import ProductService, product_cache
+from tests.test_database import engine
+
+def create_sold_product(session, slug, quantity):
+    category = session.query(Category).first()
+    if category is None:
+        category = Category("Test", "test", "test.png")
+        session.add(category)
+        session.flush()
+    product = Product(slug, slug, "description", 10, category.id, f"{slug}.png", True)
+    session.add(product)
+    session.flush()
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    session.add(SalesRollup("day", today, product.id, category.id, quantity, quantity, quantity * 10))
+    session.commit()
+
+def test_warm_pool_opens_connections_up_to_pool_size(tmp_path):
+    pool_engine = create_engine(f"sqlite:///{tmp_path}/pool.db", pool_size=3, max_overflow=5)
+
+    assert warm_pool(pool_engine, 10) == 3
+    assert pool_engine.pool.checkedin() == 3
+
+def test_warm_cache_loads_best_selling_products(db_session, query_counter):
+    create_sold_product(db_session, "cola", 50)
+    create_sold_product(db_session, "juice", 30)
+    create_sold_product(db_session, "burger", 5)
+
+    assert ProductService.warm_cache(db_session, 2) == 2
+
+    with query_counter() as stats:
+        ProductService.get_product_response("cola", db_session)
+        ProductService.get_product_response("juice", db_session)
+    assert stats.count == 0
+    assert product_cache.stats()["size"] == 2
+
+def test_readiness_reports_ready_only_after_warmup(db_session, monkeypatch):
+    monkeypatch.setattr(main, "db", engine)
+    create_sold_product(db_session, "cola", 50)
+    app = main.create_app()
+    client = TestClient(app)
+
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health/ready").status_code == 503
+
+    with TestClient(app) as warm_client:
+        assert warm_client.get("/health/ready").status_code == 200
+        assert product_cache.stats()["size"] == 1
+
+    assert client.get("/health/ready").status_code == 503
+
+def test_warm_up_without_sales_still_succeeds(db_session):
+    warm_up(engine, [], 2, 100)
+
+    assert product_cache.stats()["size"] == 0